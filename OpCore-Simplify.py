@@ -1,38 +1,44 @@
-from Scripts.datasets import os_data
-from Scripts.datasets import chipset_data
-from Scripts import acpi_guru
-from Scripts import compatibility_checker
-from Scripts import config_prodigy
-from Scripts import gathering_files
-from Scripts import hardware_customizer
-from Scripts import kext_maestro
-from Scripts import report_validator
-from Scripts import run
-from Scripts import smbios
-from Scripts import utils
-import updater
+from Scripts import startup_profiler
+import importlib
 import os
 import sys
 import re
 import shutil
 import traceback
-import time
 
 class OCPE:
-    def __init__(self):
+    # 各子系统在首次访问时才导入并实例化，避免启动时加载 acpi_guru、codec_layouts 等大型模块
+    lazy_components = {
+        "ac": ("Scripts.acpi_guru", "ACPIGuru"),
+        "c": ("Scripts.compatibility_checker", "CompatibilityChecker"),
+        "co": ("Scripts.config_prodigy", "ConfigProdigy"),
+        "o": ("Scripts.gathering_files", "gatheringFiles"),
+        "h": ("Scripts.hardware_customizer", "HardwareCustomizer"),
+        "k": ("Scripts.kext_maestro", "KextMaestro"),
+        "s": ("Scripts.smbios", "SMBIOS"),
+        "v": ("Scripts.report_validator", "ReportValidator"),
+        "r": ("Scripts.run", "Run")
+    }
+
+    def __init__(self, profiler=None, clean_temporary_dir=True):
+        from Scripts import utils
+
         self.u = utils.Utils("OpCore Simplify")
-        self.u.clean_temporary_dir()
-        self.ac = acpi_guru.ACPIGuru()
-        self.c = compatibility_checker.CompatibilityChecker()
-        self.co = config_prodigy.ConfigProdigy()
-        self.o = gathering_files.gatheringFiles()
-        self.h = hardware_customizer.HardwareCustomizer()
-        self.k = kext_maestro.KextMaestro()
-        self.s = smbios.SMBIOS()
-        self.v = report_validator.ReportValidator()
-        self.r = run.Run()
+        if clean_temporary_dir:
+            # 会删除所有 ocs_ 临时文件夹，同时运行多个构建时（fleet 命令）只在开始前清理一次
+            self.u.clean_temporary_dir()
+        self.profiler = profiler
         self.result_dir = self.u.get_temporary_dir()
 
+    def __getattr__(self, name):
+        if name not in OCPE.lazy_components:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+
+        module_name, class_name = OCPE.lazy_components[name]
+        component = getattr(importlib.import_module(module_name), class_name)()
+        setattr(self, name, component)
+        return component
+
     def select_hardware_report(self):
         self.ac.dsdt = self.ac.acpi.acpi_tables = None
 
@@ -124,13 +130,16 @@ class OCPE:
             print("要修补 macOS Tahoe 26，您必须从我的存储库下载 OpenCore-Patcher 3.0.0 或更新版本：\033[4mlzhoang2801/OpenCore-Legacy-Patcher\033[0m（GitHub）。")
             print("旧版或官方 Dortania 发布版不支持 macOS Tahoe 26。")
             print("")
-            option = self.u.request_input("是否继续使用 OpenCore Legacy Patcher？ (yes/no): ").strip().lower()
+            option = self.u.request_input("是否继续使用 OpenCore Legacy Patcher？ (yes/no): ", answer_key="oclp", default="no").strip().lower()
             if option == "yes":
                 return True
             elif option == "no":
                 return False
+            self.u.reject_answer("oclp", option)
 
     def select_macos_version(self, hardware_report, native_macos_version, ocl_patched_macos_version):
+        from Scripts.datasets import os_data
+
         suggested_macos_version = native_macos_version[1]
         version_pattern = re.compile(r'^(\d+)(?:\.(\d+)(?:\.(\d+))?)?$')
 
@@ -182,7 +191,7 @@ class OCPE:
             print("")
             print("Q. 退出")
             print("")
-            option = self.u.request_input("请输入您要使用的 macOS 版本（默认：{}）： ".format(os_data.get_macos_name_by_darwin(suggested_macos_version))) or suggested_macos_version
+            option = self.u.request_input("请输入您要使用的 macOS 版本（默认：{}）： ".format(os_data.get_macos_name_by_darwin(suggested_macos_version)), answer_key="macos_version") or suggested_macos_version
             if option.lower() == "q":
                 self.u.exit_program()
 
@@ -195,7 +204,11 @@ class OCPE:
                 elif self.u.parse_darwin_version(native_macos_version[0]) <= self.u.parse_darwin_version(target_version) <= self.u.parse_darwin_version(native_macos_version[-1]):
                     return target_version
 
+            self.u.reject_answer("macos_version", option)
+
     def build_opencore_efi(self, hardware_report, disabled_devices, smbios_model, macos_version, needs_oclp):
+        from Scripts.datasets import kext_data
+
         steps = [
             "复制 EFI 基础到结果文件夹",
             "应用 ACPI 补丁",
@@ -213,7 +226,8 @@ class OCPE:
             raise Exception("目录 '{}' 不存在。".format(self.k.ock_files_dir))
         
         source_efi_dir = os.path.join(self.k.ock_files_dir, "OpenCorePkg")
-        shutil.copytree(source_efi_dir, self.result_dir, dirs_exist_ok=True)
+        # 文件系统支持时以写时复制方式放入结果文件夹，不复制数据；不使用硬链接，编辑结果不会影响 OCK_Files
+        self.k.blob_store.clone_tree(source_efi_dir, self.result_dir)
 
         config_file = os.path.join(self.result_dir, "EFI", "OC", "config.plist")
         config_data = self.u.read_file(config_file)
@@ -236,7 +250,7 @@ class OCPE:
                 if patch.checked:
                     if patch.name == "BATP":
                         patch.checked = getattr(self.ac, patch.function_name)()
-                        self.k.kexts[kext_maestro.kext_data.kext_index_by_name.get("ECEnabler")].checked = patch.checked
+                        self.k.kexts[kext_data.kext_index_by_name.get("ECEnabler")].checked = patch.checked
                         continue
 
                     acpi_load = getattr(self.ac, patch.function_name)()
@@ -311,9 +325,11 @@ class OCPE:
         self.u.progress_bar(title, steps, len(steps), done=True)
         
         print("OpenCore EFI 构建完成。")
-        time.sleep(2)
+        self.u.sleep(2)
         
     def check_bios_requirements(self, org_hardware_report, hardware_report):
+        from Scripts.datasets import chipset_data
+
         requirements = []
         
         org_firmware_type = org_hardware_report.get("BIOS", {}).get("Firmware Type", "Unknown")
@@ -366,6 +382,8 @@ class OCPE:
                 print("\033[91m输入错误。请重新输入。\033[0m")
 
     def main(self):
+        from Scripts.datasets import os_data
+
         hardware_report_path = None
         native_macos_version = None
         disabled_devices = None
@@ -398,6 +416,13 @@ class OCPE:
             print("Q. 退出")
             print("")
 
+            if self.profiler:
+                self.profiler.mark("显示主菜单")
+                self.profiler.report()
+                self.profiler.uninstall()
+                self.profiler = None
+                print("")
+
             option = self.u.request_input("选择一个选项： ")
             if option.lower() == "q":
                 self.u.exit_program()
@@ -413,6 +438,8 @@ class OCPE:
                 self.ac.select_acpi_patches(customized_hardware, disabled_devices)
                 needs_oclp = self.k.select_required_kexts(customized_hardware, macos_version, needs_oclp, self.ac.patches)
                 self.s.smbios_specific_options(customized_hardware, smbios_model, macos_version, self.ac.patches, self.k)
+                # 用户继续浏览菜单时在后台预取所选 kext，选择变化后会按新的选择重新开始
+                self.o.start_prefetch(self.k.kexts, macos_version)
 
             if not hardware_report_path:
                 self.u.head()
@@ -428,13 +455,16 @@ class OCPE:
                 smbios_model = self.s.select_smbios_model(customized_hardware, macos_version)
                 needs_oclp = self.k.select_required_kexts(customized_hardware, macos_version, needs_oclp, self.ac.patches)
                 self.s.smbios_specific_options(customized_hardware, smbios_model, macos_version, self.ac.patches, self.k)
+                self.o.start_prefetch(self.k.kexts, macos_version)
             elif option == "3":
                 self.ac.customize_patch_selection()
             elif option == "4":
                 self.k.kext_configuration_menu(macos_version)
+                self.o.start_prefetch(self.k.kexts, macos_version)
             elif option == "5":
                 smbios_model = self.s.customize_smbios_model(customized_hardware, smbios_model, macos_version)
                 self.s.smbios_specific_options(customized_hardware, smbios_model, macos_version, self.ac.patches, self.k)
+                self.o.start_prefetch(self.k.kexts, macos_version)
             elif option == "6":
                 if needs_oclp and not self.show_oclp_warning():
                     macos_version = self.select_macos_version(hardware_report, native_macos_version, ocl_patched_macos_version)
@@ -442,6 +472,7 @@ class OCPE:
                     smbios_model = self.s.select_smbios_model(customized_hardware, macos_version)
                     needs_oclp = self.k.select_required_kexts(customized_hardware, macos_version, needs_oclp, self.ac.patches)
                     self.s.smbios_specific_options(customized_hardware, smbios_model, macos_version, self.ac.patches, self.k)
+                    self.o.start_prefetch(self.k.kexts, macos_version)
                     continue
 
                 try:
@@ -462,12 +493,324 @@ class OCPE:
                 print("")
                 self.u.request_input("按[Enter]键返回主菜单...")
 
+    def headless_build(self, hardware_report_path, acpi_tables_dir, output_dir, answers=None, files_lock=None):
+        """无人值守构建，按主菜单选项 1 和 6 的流程从硬件报告构建 EFI 并复制到 output_dir
+
+        调用前应先调用 utils.set_headless 进入无人值守模式，所有提示从应答中取值或使用默认值。
+        无法完成构建时抛出异常（utils.HeadlessAbort 或其他错误）。
+
+        参数:
+            hardware_report_path: 硬件报告（Report.json）路径
+            acpi_tables_dir: ACPI 表文件夹
+            output_dir: EFI 输出文件夹
+            answers: 应答字典，除各提示的应答外还可以用 "smbios_model" 指定 SMBIOS 型号
+            files_lock: 多个进程共用 OCK_Files 时的锁，收集文件期间持有
+        """
+        from Scripts import utils
+        import contextlib
+
+        answers = answers or {}
+        self.ac.dsdt = self.ac.acpi.acpi_tables = None
+
+        is_valid, errors, warnings, hardware_report = self.v.validate_report(hardware_report_path)
+        self.v.show_validation_report(hardware_report_path, is_valid, errors, warnings)
+        if not is_valid or errors:
+            raise utils.HeadlessAbort("硬件报告无效: {}".format(hardware_report_path))
+
+        self.ac.read_acpi_tables(acpi_tables_dir)
+
+        hardware_report, native_macos_version, ocl_patched_macos_version = self.c.check_compatibility(hardware_report)
+        macos_version = self.select_macos_version(hardware_report, native_macos_version, ocl_patched_macos_version)
+        customized_hardware, disabled_devices, needs_oclp = self.h.hardware_customization(hardware_report, macos_version)
+        smbios_model = answers.get("smbios_model") or self.s.select_smbios_model(customized_hardware, macos_version)
+        if not self.ac.ensure_dsdt():
+            self.ac.select_acpi_tables()
+        self.ac.select_acpi_patches(customized_hardware, disabled_devices)
+        needs_oclp = self.k.select_required_kexts(customized_hardware, macos_version, needs_oclp, self.ac.patches)
+        self.s.smbios_specific_options(customized_hardware, smbios_model, macos_version, self.ac.patches, self.k)
+
+        if needs_oclp and not self.show_oclp_warning():
+            raise utils.HeadlessAbort("所选 macOS 版本需要 OpenCore Legacy Patcher，请在应答文件中设置 \"oclp\": true 或指定其他 \"macos_version\"")
+
+        # 同一时间只有一个进程更新 OCK_Files，之后的进程看到已是最新版本，每个产品只下载一次
+        with files_lock or contextlib.nullcontext():
+            if not self.o.gather_bootloader_kexts(self.k.kexts, macos_version):
+                raise utils.HeadlessAbort("无法收集构建所需的文件")
+
+        self.build_opencore_efi(customized_hardware, disabled_devices, smbios_model, macos_version, needs_oclp)
+
+        # 结果文件夹只是中间位置，复制到输出目录后删除
+        shutil.copytree(self.result_dir, output_dir, dirs_exist_ok=True)
+        shutil.rmtree(self.result_dir, ignore_errors=True)
+
+        return {
+            "macos_version": macos_version,
+            "smbios_model": smbios_model,
+            "needs_oclp": needs_oclp,
+            "disabled_devices": list(disabled_devices)
+        }
+
+def run_headless_build(argv):
+    """处理 build 命令：OpCore-Simplify.py build --report <Report.json> --acpi <目录> [--answers <应答.json>] --out <目录>"""
+    import argparse
+    from Scripts import utils
+
+    parser = argparse.ArgumentParser(prog="OpCore-Simplify.py build", description="无人值守构建 OpenCore EFI")
+    parser.add_argument("--report", required=True, help="硬件报告（Report.json）")
+    parser.add_argument("--acpi", required=True, help="ACPI 表文件夹")
+    parser.add_argument("--answers", help="应答文件（JSON），未给出的提示使用默认值")
+    parser.add_argument("--out", required=True, help="EFI 输出文件夹")
+    args = parser.parse_args(argv)
+
+    answers = utils.Utils().read_file(args.answers) if args.answers else {}
+    if not isinstance(answers, dict):
+        print("应答文件格式无效: {}".format(args.answers))
+        return 1
+
+    utils.set_headless(answers)
+    try:
+        result = OCPE().headless_build(args.report, args.acpi, args.out, answers)
+    except Exception as e:
+        print("")
+        print("构建失败：{}".format(e))
+        return 1
+    finally:
+        utils.set_headless(None)
+
+    print("")
+    print("EFI 已构建在 {}（macOS {}，SMBIOS {}）".format(os.path.abspath(args.out), result.get("macos_version"), result.get("smbios_model")))
+    return 0
+
+FLEET_REPORT_NAME = "Report.json"  # fleet 目录中每台机器的硬件报告
+FLEET_ACPI_DIR_NAME = "ACPI"  # fleet 目录中每台机器的 ACPI 表文件夹
+FLEET_ANSWERS_NAME = "answers.json"  # 可选，每台机器的应答，覆盖 --answers 中的同名键
+DEFAULT_FLEET_WORKERS = min(4, os.cpu_count() or 1)
+
+_fleet_files_lock = None
+
+def _init_fleet_worker(files_lock, source_spec, deep_verify, release_tags, releases):
+    global _fleet_files_lock
+    _fleet_files_lock = files_lock
+
+    # 发布信息在所有工作进程间共用，每个仓库的发布页只抓取一次
+    from Scripts import release_parser
+    release_parser.session_cache = release_parser.ReleaseCache(release_tags, releases)
+
+    # 以 spawn 方式启动的进程不会继承主进程中的设置
+    if source_spec:
+        from Scripts import artifact_sources
+        artifact_sources.set_default_source(artifact_sources.create_source(source_spec))
+    if deep_verify:
+        from Scripts import integrity_checker
+        integrity_checker.set_deep_verify(True)
+
+def _build_fleet_machine(machine_name, machine_dir, output_dir, log_path, answers):
+    """在工作进程中构建一台机器，构建过程的输出写入 log_path，返回构建结果"""
+    import contextlib
+    import time
+    from Scripts import utils
+
+    start_time = time.monotonic()
+    result = {"machine": machine_name, "status": "失败", "error": None}
+
+    with open(log_path, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        utils.set_headless(answers)
+        try:
+            result.update(OCPE(clean_temporary_dir=False).headless_build(
+                os.path.join(machine_dir, FLEET_REPORT_NAME),
+                os.path.join(machine_dir, FLEET_ACPI_DIR_NAME),
+                output_dir,
+                answers,
+                _fleet_files_lock
+            ))
+            result["status"] = "成功"
+        except (Exception, SystemExit) as e:
+            traceback.print_exc()
+            result["error"] = str(e) or type(e).__name__
+        finally:
+            utils.set_headless(None)
+
+    result["elapsed"] = time.monotonic() - start_time
+    return result
+
+def run_fleet_build(argv, source_spec=None, deep_verify=False):
+    """处理 fleet 命令：OpCore-Simplify.py fleet <机器目录> --out <目录> [--answers <应答.json>] [--workers N]
+
+    机器目录中每个子文件夹为一台机器，包含 Report.json、ACPI 文件夹和可选的 answers.json。
+    各机器在独立的进程中构建，共用 OCK_Files、下载缓存和 ACPI 缓存，EFI 输出到 <out>/<机器名>，
+    构建日志为 <out>/<机器名>.log。
+    """
+    import argparse
+    import multiprocessing
+    import time
+    import unicodedata
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from Scripts import utils
+
+    parser = argparse.ArgumentParser(prog="OpCore-Simplify.py fleet", description="并行构建多台机器的 OpenCore EFI")
+    parser.add_argument("machines_dir", help="机器目录，每个子文件夹包含 Report.json 和 ACPI 文件夹")
+    parser.add_argument("--out", required=True, help="输出文件夹")
+    parser.add_argument("--answers", help="所有机器共用的应答文件（JSON）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_FLEET_WORKERS, help="同时构建的机器数量")
+    args = parser.parse_args(argv)
+
+    u = utils.Utils()
+    common_answers = u.read_file(args.answers) if args.answers else {}
+    if not isinstance(common_answers, dict):
+        print("应答文件格式无效: {}".format(args.answers))
+        return 1
+
+    if not os.path.isdir(args.machines_dir):
+        print("机器目录不存在: {}".format(args.machines_dir))
+        return 1
+
+    machine_names = sorted(name for name in os.listdir(args.machines_dir) if os.path.isfile(os.path.join(args.machines_dir, name, FLEET_REPORT_NAME)))
+    if not machine_names:
+        print("{} 中没有包含 {} 的子文件夹".format(args.machines_dir, FLEET_REPORT_NAME))
+        return 1
+
+    # 各工作进程不再清理临时文件夹，iasl 的下载和版本登记也在开始前完成，避免多个进程同时进行
+    u.clean_temporary_dir()
+    try:
+        from Scripts import dsdt
+        dsdt.DSDT().get_iasl_info()
+    except Exception as e:
+        print(e)
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    results = {}
+    start_time = time.monotonic()
+
+    print("正在使用 {} 个进程构建 {} 台机器...".format(max(1, args.workers), len(machine_names)))
+    print("")
+
+    files_lock = multiprocessing.Lock()
+    # 发布信息保存在 Manager 进程中，所有工作进程共用
+    manager = multiprocessing.Manager()
+    release_tags, releases = manager.dict(), manager.dict()
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=_init_fleet_worker, initargs=(files_lock, source_spec, deep_verify, release_tags, releases)) as executor:
+            futures = {}
+            for machine_name in machine_names:
+                machine_dir = os.path.join(args.machines_dir, machine_name)
+                if not os.path.isdir(os.path.join(machine_dir, FLEET_ACPI_DIR_NAME)):
+                    results[machine_name] = {"machine": machine_name, "status": "失败", "error": "缺少 {} 文件夹".format(FLEET_ACPI_DIR_NAME), "elapsed": 0}
+                    continue
+
+                answers = dict(common_answers)
+                try:
+                    answers.update(u.read_file(os.path.join(machine_dir, FLEET_ANSWERS_NAME)) or {})
+                except (ValueError, TypeError):
+                    results[machine_name] = {"machine": machine_name, "status": "失败", "error": "{} 格式无效".format(FLEET_ANSWERS_NAME), "elapsed": 0}
+                    continue
+
+                future = executor.submit(
+                    _build_fleet_machine,
+                    machine_name,
+                    machine_dir,
+                    os.path.join(args.out, machine_name),
+                    os.path.join(args.out, machine_name + ".log"),
+                    answers
+                )
+                futures[future] = machine_name
+
+            # 按完成顺序显示进度
+            for future in as_completed(futures):
+                machine_name = futures[future]
+                try:
+                    results[machine_name] = future.result()
+                except Exception as e:
+                    # 工作进程异常退出
+                    results[machine_name] = {"machine": machine_name, "status": "失败", "error": str(e) or type(e).__name__, "elapsed": 0}
+                result = results[machine_name]
+                print("{}: {}（{:.1f} 秒）".format(machine_name, result.get("status"), result.get("elapsed")))
+    finally:
+        manager.shutdown()
+        # 工作进程不清理临时文件夹（其他机器可能仍在使用），全部结束后统一删除
+        u.clean_temporary_dir()
+
+    rows = [("机器", "状态", "耗时", "macOS", "SMBIOS")]
+    for machine_name in machine_names:
+        result = results[machine_name]
+        rows.append((machine_name, result.get("status"), "{:.1f}s".format(result.get("elapsed")), result.get("macos_version") or "-", result.get("smbios_model") or "-"))
+
+    def display_width(text):
+        # 中文字符在终端中占两列
+        return sum(2 if unicodedata.east_asian_width(char) in ("W", "F") else 1 for char in text)
+
+    widths = [max(display_width(row[index]) for row in rows) for index in range(len(rows[0]))]
+
+    print("")
+    for index, row in enumerate(rows):
+        print("  ".join(value + " " * (width - display_width(value)) for value, width in zip(row, widths)).rstrip())
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
+
+    failures = [results[machine_name] for machine_name in machine_names if results[machine_name].get("status") != "成功"]
+    print("")
+    for result in failures:
+        print("{}: {}".format(result.get("machine"), result.get("error")))
+    print("共 {} 台，成功 {} 台，失败 {} 台，总耗时 {:.1f} 秒".format(len(machine_names), len(machine_names) - len(failures), len(failures), time.monotonic() - start_time))
+    print("EFI 和构建日志位于 {}".format(os.path.abspath(args.out)))
+
+    return 1 if failures else 0
+
 if __name__ == '__main__':
-    update_flag = updater.Updater().run_update()
-    if update_flag:
+    profiler = None
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        profiler = startup_profiler.StartupProfiler().install()
+
+    source_spec = None
+    if "--source" in sys.argv:
+        from Scripts import artifact_sources
+        index = sys.argv.index("--source")
+        if index + 1 >= len(sys.argv):
+            print("用法: --source <auto|github|gitee|镜像目录|镜像URL>")
+            sys.exit(1)
+        source_spec = sys.argv[index + 1]
+        artifact_sources.set_default_source(artifact_sources.create_source(source_spec))
+        del sys.argv[index:index + 2]
+
+    deep_verify = "--deep-verify" in sys.argv
+    if deep_verify:
+        # 校验已下载的文件时忽略清单中的大小和修改时间，重新计算所有文件的哈希值
+        from Scripts import integrity_checker
+        sys.argv.remove("--deep-verify")
+        integrity_checker.set_deep_verify(True)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "export-mirror":
+        if len(sys.argv) < 3:
+            print("用法: OpCore-Simplify.py export-mirror <镜像目录> [kext名称...]")
+            sys.exit(1)
+
+        from Scripts import gathering_files
+        failures = gathering_files.gatheringFiles().export_mirror(sys.argv[2], sys.argv[3:])
+        print("")
+        if failures:
+            print("以下文件导出失败: {}".format(", ".join(failures)))
+            sys.exit(1)
+        print("镜像已导出到 {}".format(os.path.abspath(sys.argv[2])))
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        sys.exit(run_headless_build(sys.argv[2:]))
+
+    if len(sys.argv) > 1 and sys.argv[1] == "fleet":
+        sys.exit(run_fleet_build(sys.argv[2:], source_spec, deep_verify))
+
+    import updater
+
+    update = updater.Updater()
+    if update.run_update():
         os.execv(sys.executable, ['python3'] + sys.argv)
+    update.start_background_check()
+
+    if profiler:
+        profiler.mark("检查更新完成")
 
-    o = OCPE()
+    o = OCPE(profiler)
     while True:
         try:
             o.main()
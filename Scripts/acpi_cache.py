@@ -0,0 +1,90 @@
+# ACPI 缓存模块
+# 以表内容和 iasl 指纹为键缓存反汇编结果（.dsl）和编译好的 SSDT（.aml），相同的 ACPI 表只需处理一次
+
+import hashlib
+import os
+import shutil
+from Scripts import utils
+
+class ACPICache:
+    """反汇编和 SSDT 编译结果的缓存（Cache/acpi）
+
+    缓存键包含 iasl 的指纹（见 ToolRegistry），更换 iasl 后旧结果自动失效。
+    写入先在临时路径完成再重命名，多个进程（例如 fleet 命令的工作进程）可以同时读写。
+    """
+
+    def __init__(self, cache_dir=None):
+        self.utils = utils.Utils()
+        self.cache_dir = cache_dir or self.utils.get_cache_dir("acpi")
+
+    def _hash_file(self, file_path):
+        with open(file_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def disassembly_key(self, fingerprint, mode, table_dir, table_names):
+        """返回一组表的反汇编缓存键
+
+        iasl 的 -da 选项会用同组其他表解析外部引用，输出与整组表有关，因此以整组表为单位。
+
+        参数:
+            fingerprint: iasl 指纹
+            mode: 反汇编方式（如 "mixed"、"plain"）
+            table_dir: 表所在的文件夹
+            table_names: 表文件名列表
+        """
+        lines = [fingerprint, mode]
+        for name in sorted(table_names):
+            lines.append("{} {}".format(name, self._hash_file(os.path.join(table_dir, name))))
+        return hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+    def restore_disassembly(self, key, destination_dir):
+        """把缓存的 .dsl 文件复制到 destination_dir，没有缓存时返回False"""
+        entry_dir = os.path.join(self.cache_dir, "disassembly", key)
+        if not os.path.isdir(entry_dir):
+            return False
+
+        for name in os.listdir(entry_dir):
+            shutil.copyfile(os.path.join(entry_dir, name), os.path.join(destination_dir, name))
+        return True
+
+    def store_disassembly(self, key, source_dir, file_names):
+        """缓存 source_dir 中的反汇编结果，不存在的文件（反汇编失败）不写入，恢复时同样视为失败"""
+        entry_dir = os.path.join(self.cache_dir, "disassembly", key)
+        if os.path.isdir(entry_dir):
+            return
+
+        temporary_dir = "{}.{}.tmp".format(entry_dir, os.getpid())
+        try:
+            os.makedirs(temporary_dir, exist_ok=True)
+            for name in file_names:
+                if os.path.isfile(os.path.join(source_dir, name)):
+                    shutil.copyfile(os.path.join(source_dir, name), os.path.join(temporary_dir, name))
+            os.rename(temporary_dir, entry_dir)
+        except OSError:
+            # 其他进程已写入相同的结果
+            pass
+        finally:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+
+    def compile_key(self, fingerprint, dsl_content):
+        return hashlib.sha256("{}\n{}".format(fingerprint, dsl_content).encode("utf-8")).hexdigest()
+
+    def restore_aml(self, key, aml_path):
+        """把缓存的 .aml 复制到 aml_path，没有缓存时返回False"""
+        cache_path = os.path.join(self.cache_dir, "ssdt", key + ".aml")
+        if not os.path.isfile(cache_path):
+            return False
+
+        shutil.copyfile(cache_path, aml_path)
+        return True
+
+    def store_aml(self, key, aml_path):
+        cache_path = os.path.join(self.cache_dir, "ssdt", key + ".aml")
+        temporary_path = "{}.{}.tmp".format(cache_path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            shutil.copyfile(aml_path, temporary_path)
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
@@ -10,6 +10,7 @@ from Scripts import run
 from Scripts import utils
 import os
 import binascii
+import copy
 import re
 import tempfile
 import shutil
@@ -22,7 +23,8 @@ class ACPIGuru:
         self.smbios = smbios.SMBIOS()
         self.run = run.Run().run
         self.utils = utils.Utils()
-        self.patches = acpi_patch_data.patches
+        # 每个实例使用独立的补丁列表，同一进程中的多次构建互不影响勾选状态
+        self.patches = copy.deepcopy(acpi_patch_data.patches)
         self.hardware_report = None
         self.disabled_devices = None
         self.acpi_directory = None
@@ -1462,6 +1464,13 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "EC", 0x00001000)
 
         if not compile:
             return False
+
+        # 相同内容的 SSDT 用同一个 iasl 编译过时直接复制缓存的 .aml
+        fingerprint = self.acpi.get_iasl_fingerprint()
+        cache_key = self.acpi.acpi_cache.compile_key(fingerprint, ssdt_content) if fingerprint else None
+        if cache_key and self.acpi.acpi_cache.restore_aml(cache_key, aml_path):
+            os.remove(dsl_path)
+            return True
         
         output = self.run({
             "args":[self.acpi.iasl, dsl_path]
@@ -1471,6 +1480,9 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "EC", 0x00001000)
             return False
         else:
             os.remove(dsl_path)
+
+        if cache_key and os.path.exists(aml_path):
+            self.acpi.acpi_cache.store_aml(cache_key, aml_path)
         
         return os.path.exists(aml_path)
 
@@ -3216,9 +3228,12 @@ DefinitionBlock ("", "SSDT", 2, "ZPSS", "WMIS", 0x00000000)
             print("")
             print("Q. 退出")
             print(" ")
-            menu = self.utils.request_input("请将 ACPI 表文件夹拖放到此处: ")
+            menu = self.utils.request_input("请将 ACPI 表文件夹拖放到此处: ", answer_key="acpi")
             if menu.lower() == "q":
                 self.utils.exit_program()
+            if not menu and utils.is_headless():
+                print("无人值守模式下需要提供 ACPI 表文件夹（--acpi）。")
+                self.utils.exit_program()
             path = self.utils.normalize_path(menu)
             if not path: 
                 continue
@@ -0,0 +1,422 @@
+# 构件来源模块
+# 为元数据和下载文件提供可替换的来源：GitHub、Gitee、本地目录或HTTP镜像
+
+from Scripts import gitee
+from Scripts import github
+from Scripts import resource_fetcher
+from Scripts import utils
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+MIRROR_ENV = "OCS_MIRROR"  # 设置后默认使用该来源（auto、github、gitee、本地目录或 http(s) 镜像地址）
+LATENCY_SMOOTHING = 0.3  # 延迟滑动平均中新样本的权重
+MAX_CONSECUTIVE_FAILURES = 2  # 连续失败达到此次数后视为不健康
+UNHEALTHY_COOLDOWN = 60  # 不健康的来源在此时间（秒）后重新参与选择
+
+class ArtifactSource:
+    """构件来源的基类
+
+    子类需要实现 fetch_content、get_latest_release 和 download_file，
+    其余接口与 ResourceFetcher 保持一致，gatheringFiles 可以直接替换使用。
+    """
+
+    name = "base"
+    probe_url = None  # SourceSelector 用于测量延迟的地址
+
+    def __init__(self, fetcher=None):
+        self.fetcher = fetcher or resource_fetcher.ResourceFetcher()
+
+    def translate_url(self, resource_url):
+        """把 GitHub 上的地址转换为本来源上的对应地址"""
+        return resource_url
+
+    def quiet_copy(self):
+        """返回不打印任何信息的副本（共用连接池、缓存和重试次数），供后台线程使用"""
+        source = copy.copy(self)
+        source.fetcher = copy.copy(self.fetcher)
+        source.fetcher.quiet = True
+        return source
+
+    def fetch_content(self, resource_url, max_age=None):
+        raise NotImplementedError
+
+    def get_latest_release(self, owner, repo):
+        raise NotImplementedError
+
+    def download_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        raise NotImplementedError
+
+    def fetch_and_parse_content(self, resource_url, content_type=None, max_age=None):
+        content = self.fetch_content(resource_url, max_age)
+        if content is None:
+            return None
+        return self.fetcher.parse_content(content, content_type)
+
+    def download_and_save_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        return self.download_file(resource_url, destination_path, sha256_hash, progress_callback) is not None
+
+class GithubSource(ArtifactSource):
+    """直接访问 GitHub（以及 raw.githubusercontent.com 等原始地址）"""
+
+    name = "github"
+    probe_url = "https://github.com/"
+
+    def __init__(self, fetcher=None):
+        super().__init__(fetcher)
+        self.releases = github.Github(self.fetcher)
+
+    def fetch_content(self, resource_url, max_age=None):
+        return self.fetcher.fetch_content(resource_url, max_age)
+
+    def get_latest_release(self, owner, repo):
+        return self.releases.get_latest_release(owner, repo)
+
+    def download_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        return self.fetcher.download_file(resource_url, destination_path, sha256_hash, progress_callback)
+
+    def quiet_copy(self):
+        source = super().quiet_copy()
+        source.releases = type(self.releases)(source.fetcher)
+        return source
+
+class GiteeSource(GithubSource):
+    """从 gitee.com 上的同名仓库获取发布信息"""
+
+    name = "gitee"
+    probe_url = "https://gitee.com/"
+
+    def __init__(self, fetcher=None):
+        super().__init__(fetcher)
+        self.releases = gitee.Gitee(self.fetcher)
+
+    def translate_url(self, resource_url):
+        """同名仓库的发布文件和原始文件改从 gitee.com 获取，其余地址保持不变"""
+        match = re.match(r"https://raw\.githubusercontent\.com/([^/]+)/([^/]+)/(?:refs/heads/)?(.+)$", resource_url)
+        if match:
+            return "https://gitee.com/{}/{}/raw/{}".format(*match.groups())
+
+        match = re.match(r"https://github\.com/([^/]+)/([^/]+)/(releases/download/.+|raw/.+)$", resource_url)
+        if match:
+            return "https://gitee.com/{}/{}/{}".format(match.group(1), match.group(2), match.group(3).replace("raw/refs/heads/", "raw/"))
+
+        return resource_url
+
+class MirrorSource(ArtifactSource):
+    """离线镜像来源
+
+    镜像由 MirrorExporter 生成，目录结构为：
+        index.json                 原始URL到内容哈希的映射，以及各仓库的发布信息
+        blobs/<前2位>/<sha256>     按内容寻址保存的文件
+    location 可以是本地目录，也可以是提供同样目录结构的 http(s) 地址。
+    """
+
+    name = "mirror"
+
+    def __init__(self, location, fetcher=None):
+        super().__init__(fetcher)
+        self.location = location.rstrip("/\\")
+        self.is_remote = self.location.lower().startswith(("http://", "https://"))
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _path(self, *parts):
+        if self.is_remote:
+            return "/".join((self.location,) + parts)
+        return os.path.join(self.location, *parts)
+
+    def blob_parts(self, sha256):
+        return ("blobs", sha256[:2], sha256)
+
+    @property
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                if self.is_remote:
+                    index = self.fetcher.fetch_and_parse_content(self._path("index.json"), "json", max_age=0)
+                else:
+                    index = utils.Utils().read_file(self._path("index.json"))
+                if not isinstance(index, dict):
+                    raise ValueError("镜像 {} 中缺少有效的 index.json。".format(self.location))
+                self._index = index
+            return self._index
+
+    def _lookup(self, resource_url):
+        entry = self.index.get("urls", {}).get(resource_url)
+        if not entry:
+            self.fetcher.log("镜像中没有 {}".format(resource_url))
+        return entry
+
+    def fetch_content(self, resource_url, max_age=None):
+        entry = self._lookup(resource_url)
+        if not entry:
+            return None
+
+        if self.is_remote:
+            # 内容按哈希寻址，永不过期
+            return self.fetcher.fetch_content(self._path(*self.blob_parts(entry["sha256"])), max_age=float("inf"))
+
+        with open(self._path(*self.blob_parts(entry["sha256"])), "rb") as file:
+            return file.read()
+
+    def get_latest_release(self, owner, repo):
+        release = self.index.get("releases", {}).get("{}/{}".format(owner, repo))
+        if release is None:
+            raise ValueError("镜像中没有 {}/{} 的发布信息。".format(owner, repo))
+        return release
+
+    def download_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        entry = self._lookup(resource_url)
+        if not entry:
+            return None
+
+        if sha256_hash and entry["sha256"].lower() != sha256_hash.lower():
+            self.fetcher.log("镜像中 {} 的校验和不匹配。".format(resource_url))
+            return None
+
+        if self.is_remote:
+            return self.fetcher.download_file(self._path(*self.blob_parts(entry["sha256"])), destination_path, entry["sha256"], progress_callback)
+
+        hasher = hashlib.sha256()
+        bytes_copied = 0
+        with open(self._path(*self.blob_parts(entry["sha256"])), "rb") as source, open(destination_path, "wb") as destination:
+            for block in iter(lambda: source.read(1024 * 1024), b""):
+                destination.write(block)
+                hasher.update(block)
+                bytes_copied += len(block)
+                if progress_callback:
+                    progress_callback(bytes_copied, entry.get("size"))
+
+        if hasher.hexdigest() != entry["sha256"]:
+            os.remove(destination_path)
+            self.fetcher.log("镜像文件 {} 已损坏。".format(entry["sha256"]))
+            return None
+
+        return entry["sha256"]
+
+class MirrorExporter(ArtifactSource):
+    """记录型来源：通过上游来源获取内容，同时写入按内容寻址的镜像目录
+
+    构建过程使用 MirrorExporter 替代普通来源运行一次后，调用 save() 写出 index.json，
+    该目录即可作为 MirrorSource 供离线构建使用。
+    """
+
+    name = "export"
+
+    def __init__(self, mirror_dir, upstream):
+        super().__init__(upstream.fetcher)
+        self.mirror_dir = mirror_dir
+        self.upstream = upstream
+        self._lock = threading.Lock()
+
+        index = utils.Utils().read_file(os.path.join(mirror_dir, "index.json"))
+        self.index = index if isinstance(index, dict) else {}
+        self.index.setdefault("urls", {})
+        self.index.setdefault("releases", {})
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.mirror_dir, "blobs", sha256[:2], sha256)
+
+    def _record(self, resource_url, sha256, size):
+        with self._lock:
+            self.index["urls"][resource_url] = {
+                "sha256": sha256,
+                "size": size
+            }
+
+    def _store_bytes(self, resource_url, content):
+        sha256 = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(sha256)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            with open(blob_path + ".tmp", "wb") as file:
+                file.write(content)
+            os.replace(blob_path + ".tmp", blob_path)
+        self._record(resource_url, sha256, len(content))
+
+    def fetch_content(self, resource_url, max_age=None):
+        content = self.upstream.fetch_content(resource_url, max_age)
+        if content is not None:
+            self._store_bytes(resource_url, content)
+        return content
+
+    def get_latest_release(self, owner, repo):
+        release = self.upstream.get_latest_release(owner, repo)
+        if release is not None:
+            with self._lock:
+                self.index["releases"]["{}/{}".format(owner, repo)] = release
+        return release
+
+    def download_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        sha256 = self.upstream.download_file(resource_url, destination_path, sha256_hash, progress_callback)
+        if sha256 is None:
+            return None
+
+        blob_path = self._blob_path(sha256)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            shutil.copyfile(destination_path, blob_path + ".tmp")
+            os.replace(blob_path + ".tmp", blob_path)
+        self._record(resource_url, sha256, os.path.getsize(destination_path))
+        return sha256
+
+    def quiet_copy(self):
+        source = super().quiet_copy()
+        source.upstream = self.upstream.quiet_copy()
+        return source
+
+    def save(self):
+        with self._lock:
+            self.index["exported_at"] = time.time()
+            os.makedirs(self.mirror_dir, exist_ok=True)
+            temporary_path = os.path.join(self.mirror_dir, "index.json.tmp")
+            with open(temporary_path, "w") as file:
+                json.dump(self.index, file, indent=4)
+            os.replace(temporary_path, os.path.join(self.mirror_dir, "index.json"))
+
+class HostScore:
+    """单个来源的健康状况：延迟的滑动平均和连续失败次数"""
+
+    def __init__(self):
+        self.latency = None
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_failure = 0
+
+    def record_success(self, latency=None):
+        if latency is not None:
+            self.latency = latency if self.latency is None else (1 - LATENCY_SMOOTHING) * self.latency + LATENCY_SMOOTHING * latency
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_failure = time.monotonic()
+
+    def is_healthy(self):
+        return self.consecutive_failures < MAX_CONSECUTIVE_FAILURES or time.monotonic() - self.last_failure > UNHEALTHY_COOLDOWN
+
+    def rank_key(self):
+        # 健康的来源优先，其次按延迟排序；尚未测得延迟的排在已知延迟之后
+        return (not self.is_healthy(), self.latency is None, self.latency or 0, self.failures)
+
+class SourceSelector(ArtifactSource):
+    """在多个来源之间按延迟选择，并在请求失败时切换到下一个来源
+
+    首次使用时并发向各来源发送HEAD请求测量延迟，之后每次元数据请求都会更新
+    该来源的延迟。请求失败（异常或返回None）时记录错误并立即改用下一个来源，
+    连续失败的来源在冷却时间内排到最后，因此构建过程中某个主机出错时会自动切换。
+    """
+
+    name = "auto"
+
+    def __init__(self, sources=None, fetcher=None, probe_timeout=5):
+        super().__init__(fetcher)
+        self.sources = sources or [GithubSource(self.fetcher), GiteeSource(self.fetcher)]
+        self.scores = {source: HostScore() for source in self.sources}
+        self.probe_timeout = probe_timeout
+        self._probed = False
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+
+    def probe(self):
+        """并发测量所有来源的延迟"""
+        def probe_source(source):
+            if not source.probe_url:
+                return None
+            return source.fetcher.probe(source.probe_url, self.probe_timeout)
+
+        with ThreadPoolExecutor(max_workers=len(self.sources), thread_name_prefix="probe") as executor:
+            latencies = list(executor.map(probe_source, self.sources))
+
+        with self._lock:
+            for source, latency in zip(self.sources, latencies):
+                if latency is None and source.probe_url:
+                    self.scores[source].record_failure()
+                else:
+                    self.scores[source].record_success(latency)
+            self._probed = True
+
+    def quiet_copy(self):
+        source = super().quiet_copy()
+        source.sources = [child.quiet_copy() for child in self.sources]
+        source.scores = {child: score for child, score in zip(source.sources, self.scores.values())}
+        return source
+
+    def ranked_sources(self):
+        with self._probe_lock:
+            if not self._probed:
+                self.probe()
+
+        with self._lock:
+            return sorted(self.sources, key=lambda source: self.scores[source].rank_key())
+
+    def _call(self, operation, measure_latency=True):
+        last_error = None
+        previous_source = None
+
+        for source in self.ranked_sources():
+            if previous_source:
+                self.fetcher.log("{} 请求失败，切换到 {}".format(previous_source.name, source.name))
+
+            start_time = time.monotonic()
+            try:
+                result = operation(source)
+            except Exception as e:
+                result = None
+                last_error = e
+
+            with self._lock:
+                if result is None:
+                    self.scores[source].record_failure()
+                else:
+                    self.scores[source].record_success(time.monotonic() - start_time if measure_latency else None)
+
+            if result is not None:
+                return result
+            previous_source = source
+
+        if last_error:
+            raise last_error
+        return None
+
+    def fetch_content(self, resource_url, max_age=None):
+        return self._call(lambda source: source.fetch_content(source.translate_url(resource_url), max_age))
+
+    def get_latest_release(self, owner, repo):
+        return self._call(lambda source: source.get_latest_release(owner, repo))
+
+    def download_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        # 下载耗时取决于文件大小，不计入延迟
+        return self._call(lambda source: source.download_file(source.translate_url(resource_url), destination_path, sha256_hash, progress_callback), measure_latency=False)
+
+def create_source(spec):
+    """根据名称创建来源：auto、github、gitee，或镜像的本地目录/http(s) 地址"""
+    if spec.lower() == "auto":
+        return SourceSelector()
+    if spec.lower() == "github":
+        return GithubSource()
+    if spec.lower() == "gitee":
+        return GiteeSource()
+    return MirrorSource(spec)
+
+_default_source = None
+
+def set_default_source(source):
+    global _default_source
+    _default_source = source
+
+def get_default_source():
+    """返回默认来源：已设置的来源，或环境变量 OCS_MIRROR 指定的镜像，否则为 GitHub"""
+    global _default_source
+
+    if _default_source is None:
+        mirror = os.environ.get(MIRROR_ENV)
+        _default_source = create_source(mirror) if mirror else GithubSource()
+    return _default_source
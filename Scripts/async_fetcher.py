@@ -0,0 +1,51 @@
+# 异步资源获取器模块
+# 以协程形式提供 ResourceFetcher 和 ArtifactSource 的接口，便于在一个事件循环中 gather 多个请求
+
+import asyncio
+import functools
+
+class AsyncResourceFetcher:
+    """异步资源获取器
+
+    fetch_content、fetch_and_parse_content、scan_lines、download_file、download_and_save_file
+    和 get_latest_release 是协程，语义与所包装对象的同名方法完全相同（gzip/deflate 解压、HTTP缓存、
+    断点续传、SHA256 校验、退避重试）。请求仍由所包装的对象在线程中执行，与同步调用共用连接池、
+    缓存和会话重试次数，协议相关的代码只有一份。
+
+    参数:
+        fetcher: ResourceFetcher 或 ArtifactSource
+        max_concurrency: 同时执行的请求数上限
+    """
+
+    def __init__(self, fetcher, max_concurrency=8):
+        self.fetcher = fetcher
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+
+    async def _call(self, method_name, *args):
+        # 信号量必须在事件循环中创建
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            return await asyncio.to_thread(functools.partial(getattr(self.fetcher, method_name), *args))
+
+    async def fetch_content(self, resource_url, max_age=None):
+        return await self._call("fetch_content", resource_url, max_age)
+
+    async def fetch_and_parse_content(self, resource_url, content_type=None, max_age=None):
+        return await self._call("fetch_and_parse_content", resource_url, content_type, max_age)
+
+    async def scan_lines(self, resource_url, consumer, max_age=None):
+        """只适用于 ResourceFetcher，consumer 在工作线程中调用"""
+        return await self._call("scan_lines", resource_url, consumer, max_age)
+
+    async def download_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        return await self._call("download_file", resource_url, destination_path, sha256_hash, progress_callback)
+
+    async def download_and_save_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        return await self._call("download_and_save_file", resource_url, destination_path, sha256_hash, progress_callback)
+
+    async def get_latest_release(self, owner, repo):
+        """只适用于 ArtifactSource"""
+        return await self._call("get_latest_release", owner, repo)
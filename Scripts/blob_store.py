@@ -0,0 +1,121 @@
+# 内容寻址存储模块
+# 以 SHA256 保存 OCK_Files 中的文件，相同内容只保留一份，EFI 优先通过写时复制生成
+
+import os
+import shutil
+
+FICLONE = 0x40049409  # Linux 的 ioctl(FICLONE)，在 Btrfs/XFS 等文件系统上创建写时复制副本
+
+class BlobStore:
+    """内容寻址的文件存储（Cache/blobs/<前两位>/<SHA256>）
+
+    add() 把产品文件夹中的文件硬链接到存储中，内容相同的文件（例如多个产品中的同一个 kext）
+    改为指向同一个 blob，只占用一份空间。clone_file()/clone_tree() 用于生成交给用户的 EFI，
+    优先使用写时复制，不支持时回退为复制，从不使用硬链接：用户直接编辑结果文件夹中的文件
+    不能改动 OCK_Files 和存储中的内容。
+
+    硬链接与源文件共用数据，OCK_Files 中需要修改的文件应先删除再写入（utils.write_file 会这样做）。
+    """
+
+    def __init__(self, store_dir=None):
+        self.store_dir = store_dir or os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "Cache", "blobs")
+        self._reflink_unsupported = set()  # 不支持写时复制的 (源设备, 目标设备)
+
+    def blob_path(self, sha256):
+        sha256 = sha256.lower()
+        return os.path.join(self.store_dir, sha256[:2], sha256)
+
+    def add(self, file_path, sha256):
+        """把文件加入存储，已有相同内容时把文件替换为指向该 blob 的硬链接
+
+        返回:
+            bool: 文件被替换为已有 blob 的链接时返回True
+        """
+        blob_path = self.blob_path(sha256)
+
+        try:
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.link(file_path, blob_path)
+                return False
+
+            if os.path.samefile(file_path, blob_path) or os.path.getsize(file_path) != os.path.getsize(blob_path):
+                return False
+
+            temporary_path = file_path + ".blob"
+            os.link(blob_path, temporary_path)
+            os.replace(temporary_path, file_path)
+            return True
+        except OSError:
+            # 不支持硬链接（如 FAT32）或跨文件系统时不去重
+            return False
+
+    def ingest_folder(self, folder_path, files):
+        """把清单中的文件全部加入存储，返回被替换为已有 blob 链接的文件的相对路径列表
+
+        被替换的文件的修改时间变为 blob 的修改时间，需要更新清单中的记录
+        （见 IntegrityChecker.refresh_manifest_entries）。
+
+        参数:
+            folder_path: 产品文件夹
+            files: {相对路径: {"sha256": ...}}，即清单中的文件信息
+        """
+        replaced = []
+        for relative_path, entry in files.items():
+            if entry.get("sha256") and self.add(os.path.join(folder_path, *relative_path.split("/")), entry.get("sha256")):
+                replaced.append(relative_path)
+        return replaced
+
+    def _reflink(self, source_path, destination_path):
+        try:
+            import fcntl
+        except ImportError:
+            return False
+
+        devices = (os.stat(source_path).st_dev, os.stat(os.path.dirname(destination_path)).st_dev)
+        if devices in self._reflink_unsupported:
+            return False
+
+        try:
+            with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+                fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+            shutil.copystat(source_path, destination_path)
+            return True
+        except OSError:
+            self._reflink_unsupported.add(devices)
+            if os.path.exists(destination_path):
+                os.remove(destination_path)
+            return False
+
+    def clone_file(self, source_path, destination_path):
+        """以写时复制生成 destination_path，不支持时复制"""
+        if os.path.lexists(destination_path):
+            os.remove(destination_path)
+
+        if not self._reflink(source_path, destination_path):
+            shutil.copy2(source_path, destination_path)
+
+    def clone_tree(self, source_dir, destination_dir):
+        """与 shutil.copytree(source_dir, destination_dir, dirs_exist_ok=True) 结果相同，但优先使用写时复制"""
+        for root, _, files in os.walk(source_dir):
+            target_dir = os.path.join(destination_dir, os.path.relpath(root, source_dir))
+            os.makedirs(target_dir, exist_ok=True)
+            for name in files:
+                self.clone_file(os.path.join(root, name), os.path.join(target_dir, name))
+
+    def prune(self):
+        """删除不再被任何文件引用的 blob（链接数为1），返回删除的数量"""
+        removed = 0
+        if not os.path.isdir(self.store_dir):
+            return removed
+
+        for root, _, files in os.walk(self.store_dir):
+            for name in files:
+                blob_path = os.path.join(root, name)
+                try:
+                    if os.stat(blob_path).st_nlink <= 1:
+                        os.remove(blob_path)
+                        removed += 1
+                except OSError:
+                    continue
+        return removed
@@ -3,7 +3,6 @@ from Scripts.datasets import os_data
 from Scripts.datasets import pci_data
 from Scripts.datasets import codec_layouts
 from Scripts import utils
-import time
 
 class CompatibilityChecker:
     def __init__(self):
@@ -385,7 +384,7 @@ class CompatibilityChecker:
             if self.hardware_report.get(device_type):
                 index += 1
                 print("{}. {}:".format(index, self.device_type_match(device_type)))
-                time.sleep(0.25)
+                self.utils.sleep(0.25)
                 function()
 
         print("")
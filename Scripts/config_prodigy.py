@@ -270,7 +270,8 @@ class ConfigProdigy:
         recommended_authors = ("Mirone", "InsanelyDeepak", "Toleda", "DalianSky")
         recommended_layouts = [layout for layout in available_layouts if self.utils.contains_any(recommended_authors, layout.comment)]
 
-        default_layout = random.choice(recommended_layouts or available_layouts)
+        # 无人值守模式下使用确定的默认布局，保证同一份报告每次构建结果相同
+        default_layout = (recommended_layouts or available_layouts)[0] if utils.is_headless() else random.choice(recommended_layouts or available_layouts)
 
         while True:
             contents = []
@@ -295,7 +296,7 @@ class ConfigProdigy:
             self.utils.adjust_window_size(content)
             self.utils.head("选择 Codec 布局 ID", resize=False)
             print(content)
-            selected_layout_id = self.utils.request_input(f"输入您要使用的 Codec 布局 ID（默认：{default_layout.id}）： ") or default_layout.id
+            selected_layout_id = self.utils.request_input(f"输入您要使用的 Codec 布局 ID（默认：{default_layout.id}）： ", answer_key="audio_layout_id") or default_layout.id
 
             try:
                 selected_layout_id = int(selected_layout_id)
@@ -304,7 +305,9 @@ class ConfigProdigy:
                     if layout.id == selected_layout_id:
                         return selected_layout_id, audio_controller_properties
             except:
-                continue
+                pass
+
+            self.utils.reject_answer("audio_layout_id", selected_layout_id)
   
     def deviceproperties(self, hardware_report, disabled_devices, macos_version, kexts):
         deviceproperties_add = {}
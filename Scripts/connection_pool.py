@@ -0,0 +1,194 @@
+# HTTP连接池模块
+# 基于 http.client 为每个主机保持长连接，供 ResourceFetcher 复用
+
+import http.client
+import threading
+from urllib.parse import urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+MAX_REDIRECTS = 5  # 最大重定向次数
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+class PooledResponse:
+    """连接池中的HTTP响应
+
+    代理 http.client.HTTPResponse 的接口（read、getheader、info 等），
+    响应体读取完毕后自动把连接归还给连接池。
+    """
+
+    def __init__(self, pool, key, connection, response, url):
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self._released = False
+        self.url = url
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _release_if_done(self):
+        if not self._released and self._response.isclosed():
+            self._released = True
+            self._pool.release(self._key, self._connection)
+
+    def read(self, amt=None):
+        data = self._response.read(amt)
+        self._release_if_done()
+        return data
+
+    def readinto(self, buffer):
+        size = self._response.readinto(buffer)
+        self._release_if_done()
+        return size
+
+    def getcode(self):
+        return self._response.status
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+
+        if self._response.isclosed():
+            self._pool.release(self._key, self._connection)
+        else:
+            # 响应体未读完，连接无法复用
+            self._response.close()
+            self._connection.close()
+
+class ConnectionPool:
+    """按 (协议, 主机, 端口) 保存空闲长连接的连接池
+
+    同一主机的多个请求复用已建立的 TCP/TLS 连接，并支持重定向和系统代理设置。
+    """
+
+    def __init__(self, ssl_context=None, max_idle_per_host=4):
+        self.ssl_context = ssl_context
+        self.max_idle_per_host = max_idle_per_host
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _new_connection(self, scheme, host, port, timeout):
+        proxy = None if proxy_bypass(host) else getproxies().get(scheme)
+
+        if proxy:
+            proxy_parts = urlsplit(proxy if "://" in proxy else "http://" + proxy)
+            if scheme == "https":
+                # 通过 CONNECT 隧道访问 HTTPS 主机
+                connection = http.client.HTTPSConnection(proxy_parts.hostname, proxy_parts.port or 80, timeout=timeout, context=self.ssl_context)
+                connection.set_tunnel(host, port)
+                connection.uses_proxy = False
+            else:
+                connection = http.client.HTTPConnection(proxy_parts.hostname, proxy_parts.port or 80, timeout=timeout)
+                connection.uses_proxy = True
+            return connection
+
+        if scheme == "https":
+            connection = http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context)
+        else:
+            connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        connection.uses_proxy = False
+        return connection
+
+    def acquire(self, key, timeout):
+        with self._lock:
+            idle_connections = self._idle.get(key)
+            if idle_connections:
+                connection = idle_connections.pop()
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+
+        return self._new_connection(*key, timeout), False
+
+    def release(self, key, connection):
+        with self._lock:
+            idle_connections = self._idle.setdefault(key, [])
+            if len(idle_connections) < self.max_idle_per_host:
+                idle_connections.append(connection)
+                return
+
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            for idle_connections in self._idle.values():
+                for connection in idle_connections:
+                    connection.close()
+            self._idle.clear()
+
+    def _send(self, url, headers, timeout, method):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError("不支持的URL协议: {}".format(url))
+
+        key = (scheme, parts.hostname, parts.port or (443 if scheme == "https" else 80))
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        request_headers = dict(headers)
+        request_headers.setdefault("Host", parts.netloc)
+        request_headers.setdefault("Connection", "keep-alive")
+
+        # 复用的空闲连接可能已被服务器关闭，此时丢弃该连接并继续尝试下一个，
+        # 空闲连接用完后会建立新连接，新连接失败时才抛出异常
+        while True:
+            connection, reused = self.acquire(key, timeout)
+            try:
+                connection.request(method, url if connection.uses_proxy else target, headers=request_headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if reused:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+
+            return PooledResponse(self, key, connection, response, url)
+
+    def request(self, url, headers=None, timeout=10, method="GET"):
+        """发送请求并跟随重定向，返回 PooledResponse"""
+        headers = headers or {}
+
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._send(url, headers, timeout, method)
+
+            location = response.getheader("Location")
+            if response.status not in REDIRECT_CODES or not location:
+                return response
+
+            # 读完重定向响应体以便连接复用
+            response.read()
+            response.close()
+            url = urljoin(url, location)
+            if response.status == 303:
+                method = "GET"
+
+        raise http.client.HTTPException("重定向次数过多: {}".format(url))
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_shared_pool(ssl_context=None):
+    """返回进程内共享的连接池，使不同的 ResourceFetcher 实例复用同一组连接"""
+    global _shared_pool
+
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool(ssl_context)
+        return _shared_pool
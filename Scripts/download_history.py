@@ -0,0 +1,105 @@
+# 下载历史模块
+# 以产品名为键保存已下载的版本，更新先追加到日志文件，收集结束时一次性原子写回 history.json
+
+import json
+import os
+import threading
+
+class DownloadHistory:
+    """下载历史（OCK_Files/history.json）
+
+    history.json 仍是按产品名排序的条目列表，读入后以产品名为键保存在字典中。
+    record()/remove() 只向旁边的 history.json.journal 追加一行并落盘，
+    compact() 把全部条目写入临时文件后用 os.replace 原子替换 history.json 再删除日志。
+    程序在收集过程中崩溃时，下次加载会重放日志，已完成的下载不会丢失。
+    """
+
+    def __init__(self, history_path):
+        self.history_path = history_path
+        self.journal_path = history_path + ".journal"
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.history_path, "r") as file:
+                history = json.load(file)
+        except Exception:
+            history = []
+
+        if isinstance(history, list):
+            for entry in history:
+                if isinstance(entry, dict) and entry.get("product_name"):
+                    self.entries[entry.get("product_name")] = entry
+
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, "rb+") as file:
+            valid_length = 0
+            for line in file:
+                try:
+                    record = json.loads(line) if line.endswith(b"\n") else None
+                except ValueError:
+                    record = None
+
+                if record is None:
+                    # 崩溃时写了一半的最后一行：截掉，之后追加的记录从新的一行开始，不会与它拼在一起
+                    file.truncate(valid_length)
+                    break
+
+                self._apply(record)
+                valid_length += len(line)
+
+    def _apply(self, record):
+        if "remove" in record:
+            self.entries.pop(record.get("remove"), None)
+        else:
+            self.entries.setdefault(record.get("product_name"), {}).update(record)
+
+    def _append_journal(self, record):
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def get(self, product_name):
+        return self.entries.get(product_name)
+
+    def record(self, product_name, product_id, product_url, sha256_hash):
+        entry = {
+            "product_name": product_name,
+            "id": product_id,
+            "url": product_url,
+            "sha256": sha256_hash
+        }
+
+        with self._lock:
+            self._apply(entry)
+            self._append_journal(entry)
+
+    def remove(self, product_name):
+        with self._lock:
+            if product_name not in self.entries:
+                return
+            self._apply({"remove": product_name})
+            self._append_journal({"remove": product_name})
+
+    def to_list(self):
+        return [self.entries[product_name] for product_name in sorted(self.entries)]
+
+    def compact(self):
+        """把日志合并进 history.json"""
+        with self._lock:
+            if not os.path.exists(self.journal_path):
+                return
+
+            temporary_path = self.history_path + ".tmp"
+            with open(temporary_path, "w") as file:
+                json.dump(self.to_list(), file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, self.history_path)
+            os.remove(self.journal_path)
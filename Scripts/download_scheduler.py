@@ -0,0 +1,122 @@
+# 下载调度器模块
+# 并发下载多个文件，限制每个主机的连接数，并以多行进度显示整体状态
+
+from Scripts import resource_fetcher
+from Scripts import utils
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+import sys
+import threading
+
+class DownloadTask:
+    """单个下载任务及其进度状态"""
+
+    def __init__(self, name, url, destination_path, sha256_hash=None):
+        self.name = name
+        self.url = url
+        self.destination_path = destination_path
+        self.sha256_hash = sha256_hash
+        self.status = "等待中"
+        self.bytes_downloaded = 0
+        self.total_size = None
+        self.succeeded = False
+        self.downloaded_sha256 = None  # 下载过程中计算出的实际SHA256
+        self.error = None
+
+    def update_progress(self, bytes_downloaded, total_size):
+        self.bytes_downloaded = bytes_downloaded
+        self.total_size = total_size
+
+class DownloadScheduler:
+    """并发下载调度器
+
+    用线程池同时下载多个文件，每个主机的并发连接数受 max_per_host 限制。
+    as_completed() 按完成顺序逐个返回任务，调用方可以在其余文件仍在下载时
+    立即解压和处理已完成的文件；等待期间定期重绘多行进度显示。
+    fetcher 在工作线程中调用，必须不打印任何信息（见 ArtifactSource.quiet_copy）。
+    """
+
+    def __init__(self, fetcher=None, max_workers=6, max_per_host=4, refresh_interval=0.25):
+        self.fetcher = fetcher or resource_fetcher.ResourceFetcher(quiet=True)
+        self.max_per_host = max_per_host
+        self.refresh_interval = refresh_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="download")
+        self.tasks = []
+        self.futures = {}
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self._rendered_lines = 0
+        self._reported_status = {}  # 无人值守模式下每个任务最后输出的状态
+
+    def _host_limit(self, url):
+        host = urlsplit(url).hostname
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.Semaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def _run(self, task):
+        with self._host_limit(task.url):
+            task.status = "下载中"
+            try:
+                task.downloaded_sha256 = self.fetcher.download_file(task.url, task.destination_path, task.sha256_hash, progress_callback=task.update_progress)
+                task.succeeded = task.downloaded_sha256 is not None
+            except Exception as e:
+                task.error = e
+                task.succeeded = False
+
+        task.status = "已完成" if task.succeeded else "失败"
+        return task
+
+    def submit(self, task):
+        self.tasks.append(task)
+        self.futures[self.executor.submit(self._run, task)] = task
+        return task
+
+    def as_completed(self):
+        pending = set(self.futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=self.refresh_interval, return_when=FIRST_COMPLETED)
+            self.render()
+
+            for future in done:
+                yield self.futures[future]
+
+        self.render()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def format_task(self, task):
+        if task.total_size:
+            percent = min(int(task.bytes_downloaded / task.total_size * 100), 100)
+            bar_length = 24
+            filled = int(bar_length * percent / 100)
+            progress = "[{}] {:3d}% {:.1f}/{:.1f}MB".format("█" * filled + "░" * (bar_length - filled), percent, task.bytes_downloaded/(1024*1024), task.total_size/(1024*1024))
+        else:
+            progress = "{:.1f}MB".format(task.bytes_downloaded/(1024*1024))
+
+        return "  {:<26} {:<4} {}".format(task.name[:26], task.status, progress)
+
+    def render(self):
+        if not self.tasks:
+            return
+
+        # 无人值守模式的输出通常写入日志，不使用光标控制，只在任务状态变化时输出一行
+        if utils.is_headless():
+            for task in self.tasks:
+                if self._reported_status.get(task) != task.status:
+                    self._reported_status[task] = task.status
+                    print(self.format_task(task).strip())
+            return
+
+        # 将光标移回上次绘制的第一行，逐行覆盖
+        if self._rendered_lines:
+            sys.stdout.write("\033[{}F".format(self._rendered_lines))
+
+        for task in self.tasks:
+            sys.stdout.write("\033[K" + self.format_task(task) + "\n")
+
+        sys.stdout.flush()
+        self._rendered_lines = len(self.tasks)
@@ -1,26 +1,49 @@
 # 原始来源: https://github.com/corpnewt/SSDTTime/blob/64446d553fcbc14a4e6ebf3d8d16e3357b5cbf50/Scripts/dsdt.py
 
 import os, errno, tempfile, shutil, plistlib, sys, binascii, zipfile, getpass, re
-from Scripts import github
-from Scripts import resource_fetcher
+from Scripts import acpi_cache
+from Scripts import artifact_sources
 from Scripts import run
+from Scripts import tool_registry
 from Scripts import utils
 
+IASL_URL_MACOS = "https://raw.githubusercontent.com/acidanthera/MaciASL/master/Dist/iasl-stable"
+IASL_URL_MACOS_LEGACY = "https://raw.githubusercontent.com/acidanthera/MaciASL/master/Dist/iasl-legacy"
+IASL_URL_LINUX = "https://raw.githubusercontent.com/corpnewt/linux_iasl/main/iasl.zip"
+IASL_URL_LINUX_LEGACY = "https://raw.githubusercontent.com/corpnewt/iasl-legacy/main/iasl-legacy-linux.zip"
+IASL_URL_WINDOWS_LEGACY = "https://raw.githubusercontent.com/corpnewt/iasl-legacy/main/iasl-legacy-windows.zip"
+ACPICA_REPO_OWNER = "acpica"
+ACPICA_REPO_NAME = "acpica"
+
+def find_iasl_url(latest_release):
+    # 从 acpica 的发布信息中找出 Windows 版 iasl 压缩包的地址
+    for line in latest_release.get("body", "").splitlines():
+        if "iasl" in line and ".zip" in line:
+            return line.split("\"")[1]
+
+    for asset in latest_release.get("assets", []):
+        if "/iasl" in asset.get("url") and ".zip" in asset.get("url"):
+            return asset.get("url")
+
+    return None
+
 class DSDT:
     def __init__(self, **kwargs):
         #self.dl = downloader.Downloader()
-        self.github = github.Github()
-        self.fetcher = resource_fetcher.ResourceFetcher()
+        # iasl 和 acpica 发布信息经由默认来源获取，离线镜像中也包含 iasl
+        self.source = artifact_sources.get_default_source()
         self.r  = run.Run()
         #self.u  = utils.Utils("SSDT Time")
         self.u = utils.Utils()
-        self.iasl_url_macOS = "https://raw.githubusercontent.com/acidanthera/MaciASL/master/Dist/iasl-stable"
-        self.iasl_url_macOS_legacy = "https://raw.githubusercontent.com/acidanthera/MaciASL/master/Dist/iasl-legacy"
-        self.iasl_url_linux = "https://raw.githubusercontent.com/corpnewt/linux_iasl/main/iasl.zip"
-        self.iasl_url_linux_legacy = "https://raw.githubusercontent.com/corpnewt/iasl-legacy/main/iasl-legacy-linux.zip"
+        self.iasl_url_macOS = IASL_URL_MACOS
+        self.iasl_url_macOS_legacy = IASL_URL_MACOS_LEGACY
+        self.iasl_url_linux = IASL_URL_LINUX
+        self.iasl_url_linux_legacy = IASL_URL_LINUX_LEGACY
         self.acpi_binary_tools = "https://github.com/acpica/acpica/releases"
-        self.iasl_url_windows_legacy = "https://raw.githubusercontent.com/corpnewt/iasl-legacy/main/iasl-legacy-windows.zip"
+        self.iasl_url_windows_legacy = IASL_URL_WINDOWS_LEGACY
         self.h = {} # {"User-Agent":"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+        self.tool_registry = tool_registry.ToolRegistry()
+        self.acpi_cache = acpi_cache.ACPICache()
         self.iasl = self.check_iasl()
         #self.iasl_legacy = self.check_iasl(legacy=True)
         if not self.iasl:
@@ -142,29 +165,43 @@ class DSDT:
                     return True
                 return False
             
+            # 相同的表和 iasl 之前反汇编过时直接使用缓存的 .dsl
+            fingerprint = self.get_iasl_fingerprint()
+
+            def cache_key(tables, mode):
+                return self.acpi_cache.disassembly_key(fingerprint, mode, temp, tables) if fingerprint else None
+
+            def store_in_cache(key, tables):
+                if key:
+                    self.acpi_cache.store_disassembly(key, temp, [target_files[x]["disassembled_name"] for x in tables])
+
             # 首先检查我们的 DSDT 和 SSDT
             if dsdt_or_ssdt:
-                args = [self.iasl,"-da","-dl","-l"]+list(dsdt_or_ssdt)
-                out_d = self.r.run({"args":args})
-                if out_d[2] != 0:
-                    # 如果上述失败，尝试不使用 `-da` 运行
-                    args = [self.iasl,"-dl","-l"]+list(dsdt_or_ssdt)
+                key = cache_key(dsdt_or_ssdt, "mixed")
+                if not (key and self.acpi_cache.restore_disassembly(key, temp)):
+                    args = [self.iasl,"-da","-dl","-l"]+list(dsdt_or_ssdt)
                     out_d = self.r.run({"args":args})
+                    if out_d[2] != 0:
+                        # 如果上述失败，尝试不使用 `-da` 运行
+                        args = [self.iasl,"-dl","-l"]+list(dsdt_or_ssdt)
+                        out_d = self.r.run({"args":args})
+                    # 让我们尝试单独反汇编任何失败的表
+                    for x in dsdt_or_ssdt:
+                        if not exists(temp,target_files[x]["disassembled_name"]):
+                            args = [self.iasl,"-dl","-l",x]
+                            self.r.run({"args":args})
+                    store_in_cache(key, dsdt_or_ssdt)
                 # 获取反汇编失败的名称列表
-                fail_temp = []
                 for x in dsdt_or_ssdt:
-                    if not exists(temp,target_files[x]["disassembled_name"]):
-                        fail_temp.append(x)
-                # 让我们尝试单独反汇编任何失败的表
-                for x in fail_temp:
-                    args = [self.iasl,"-dl","-l",x]
-                    self.r.run({"args":args})
                     if not exists(temp,target_files[x]["disassembled_name"]):
                         failed.append(x)
             # 检查其他表（DMAR、APIC 等）
             if other_tables:
-                args = [self.iasl]+list(other_tables)
-                out_t = self.r.run({"args":args})
+                key = cache_key(other_tables, "plain")
+                if not (key and self.acpi_cache.restore_disassembly(key, temp)):
+                    args = [self.iasl]+list(other_tables)
+                    out_t = self.r.run({"args":args})
+                    store_in_cache(key, other_tables)
                 # 获取反汇编失败的名称列表
                 for x in other_tables:
                     if not exists(temp,target_files[x]["disassembled_name"]):
@@ -264,18 +301,17 @@ class DSDT:
         return (target_files, failed,)
 
     def get_latest_iasl(self):
-        latest_release = self.github.get_latest_release("acpica", "acpica") or {}
-        
-        for line in latest_release.get("body", "").splitlines():
-            if "iasl" in line and ".zip" in line:
-                return line.split("\"")[1]
-
-        for asset in latest_release.get("assets", []):
-            if "/iasl" in asset.get("url") and ".zip" in asset.get("url"):
-                return asset.get("url")
-            
-        return None
+        return find_iasl_url(self.source.get_latest_release(ACPICA_REPO_OWNER, ACPICA_REPO_NAME) or {})
     
+    def get_iasl_info(self):
+        # 返回 iasl 的路径、SHA-256 和版本号，二进制未变化时直接读取登记表
+        return self.tool_registry.get_tool_info(self.iasl, ["-v"])
+
+    def get_iasl_fingerprint(self):
+        # 返回 iasl 的版本指纹，用作反汇编和编译缓存的键；无法获取时返回None，不使用缓存
+        iasl_info = self.get_iasl_info()
+        return iasl_info.get("fingerprint") if iasl_info else None
+
     def check_iasl(self, legacy=False, try_downloading=True):
         if sys.platform == "win32":
             targets = (os.path.join(os.path.dirname(os.path.realpath(__file__)), "iasl-legacy.exe" if legacy else "iasl.exe"),)
@@ -320,7 +356,8 @@ class DSDT:
         zfile = os.path.basename(url)
         #print("正在下载 {}".format(os.path.basename(url)))
         #self.dl.stream_to_file(url, os.path.join(ztemp,zfile), progress=False, headers=self.h)
-        self.fetcher.download_and_save_file(url, os.path.join(ztemp,zfile))
+        if not self.source.download_and_save_file(url, os.path.join(ztemp,zfile)):
+            raise Exception("无法下载 {}".format(url))
         search_dir = ztemp
         if zfile.lower().endswith(".zip"):
             print(" - 正在解压")
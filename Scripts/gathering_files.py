@@ -1,22 +1,37 @@
-from Scripts import github
+from Scripts import artifact_sources
+from Scripts import async_fetcher
+from Scripts import blob_store
+from Scripts import download_history
+from Scripts import download_scheduler
+from Scripts import dsdt
 from Scripts import kext_maestro
 from Scripts import integrity_checker
-from Scripts import resource_fetcher
+from Scripts import prefetch
 from Scripts import utils
+from Scripts import zip_extractor
+import asyncio
+import copy
 import os
+import plistlib
+import posixpath
 import shutil
 import subprocess
 import platform
 
 os_name = platform.system()
+MAX_METADATA_WORKERS = 8  # 同时抓取发布信息的最大请求数
+HARDWARE_SNIFFER_PRODUCT_NAME = "Hardware-Sniffer-CLI.exe"
+HARDWARE_SNIFFER_REPO_OWNER = "lzhoang2801"
+HARDWARE_SNIFFER_REPO_NAME = "Hardware-Sniffer"
 
 class gatheringFiles:
-    def __init__(self):
+    def __init__(self, source=None):
         self.utils = utils.Utils()
-        self.github = github.Github()
         self.kext = kext_maestro.KextMaestro()
-        self.fetcher = resource_fetcher.ResourceFetcher()
+        # 元数据、发布信息和文件下载都经由 source，可替换为 Gitee 或离线镜像
+        self.source = source or artifact_sources.get_default_source()
         self.integrity_checker = integrity_checker.IntegrityChecker()
+        self.blob_store = blob_store.BlobStore()
         self.dortania_builds_url = "https://raw.githubusercontent.com/dortania/build-repo/builds/latest.json"
         self.ocbinarydata_url = "https://github.com/acidanthera/OcBinaryData/archive/refs/heads/master.zip"
         self.amd_vanilla_patches_url = "https://raw.githubusercontent.com/AMD-OSX/AMD_Vanilla/beta/patches.plist"
@@ -25,16 +40,15 @@ class gatheringFiles:
         self.temporary_dir = self.utils.get_temporary_dir()
         self.ock_files_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "OCK_Files")
         self.download_history_file = os.path.join(self.ock_files_dir, "history.json")
+        self.prefetcher = None
 
-    def get_product_index(self, product_list, product_name_name):
-        for index, product in enumerate(product_list):
-            if product_name_name == product.get("product_name"):
-                return index
-        return None
-        
-    def update_download_database(self, kexts, download_history):
-        download_database = download_history.copy()
-        dortania_builds_data = self.fetcher.fetch_and_parse_content(self.dortania_builds_url, "json")
+    def load_download_history(self):
+        return download_history.DownloadHistory(self.download_history_file)
+
+    def update_download_database(self, kexts, history=None):
+        """返回以产品名为键、按产品名排序的下载信息字典，history 中的条目作为初始值"""
+        download_database = {product_name: dict(entry) for product_name, entry in (history.entries.items() if history else ())}
+        dortania_builds_data = self.source.fetch_and_parse_content(self.dortania_builds_url, "json")
         seen_repos = set()
 
         def add_product_to_download_database(products):
@@ -45,12 +59,12 @@ class gatheringFiles:
                 if not product or not product.get("product_name"):
                     continue
 
-                product_index = self.get_product_index(download_database, product.get("product_name"))
+                download_database.setdefault(product.get("product_name"), {}).update(product)
 
-                if product_index is None:
-                    download_database.append(product)
-                else:
-                    download_database[product_index].update(product)
+        # 不在 Dortania 构建列表中的仓库需要抓取 GitHub 发布页，这些请求在一个事件循环中并发执行，
+        # 结果按 kext 原有顺序合并，保证 download_database 的内容与串行时一致
+        pending_products = []
+        release_repos = []
 
         for kext in kexts:
             if not kext.checked:
@@ -59,20 +73,28 @@ class gatheringFiles:
             if kext.download_info:
                 if not kext.download_info.get("sha256"):
                     kext.download_info["sha256"] = None
-                add_product_to_download_database({"product_name": kext.name, **kext.download_info})
+                pending_products.append({"product_name": kext.name, **kext.download_info})
             elif kext.github_repo and kext.github_repo.get("repo") not in seen_repos:
                 name = kext.github_repo.get("repo")
                 seen_repos.add(name)
                 if name != "IntelBluetoothFirmware" and name in dortania_builds_data:
-                    add_product_to_download_database({
+                    pending_products.append({
                         "product_name": name,
                         "id": dortania_builds_data[name]["versions"][0]["release"]["id"], 
                         "url": dortania_builds_data[name]["versions"][0]["links"]["release"],
                         "sha256": dortania_builds_data[name]["versions"][0]["hashes"]["release"]["sha256"]
                     })
                 else:
-                    latest_release = self.github.get_latest_release(kext.github_repo.get("owner"), kext.github_repo.get("repo")) or {}
-                    add_product_to_download_database(latest_release.get("assets"))
+                    release_repos.append((kext.github_repo.get("owner"), name))
+                    pending_products.append(name)
+
+        latest_releases = asyncio.run(self.fetch_latest_releases(release_repos))
+
+        for product in pending_products:
+            if isinstance(product, str):
+                add_product_to_download_database((latest_releases[product] or {}).get("assets"))
+            else:
+                add_product_to_download_database(product)
 
         add_product_to_download_database({
             "product_name": "OpenCorePkg",
@@ -81,60 +103,104 @@ class gatheringFiles:
             "sha256": dortania_builds_data["OpenCorePkg"]["versions"][0]["hashes"]["release"]["sha256"]
         })
 
-        return sorted(download_database, key=lambda x:x["product_name"])
+        return {product_name: download_database[product_name] for product_name in sorted(download_database)}
     
-    def move_bootloader_kexts_to_product_directory(self, product_name):
-        if not os.path.exists(self.temporary_dir):
-            raise FileNotFoundError("The directory {} does not exist.".format(self.temporary_dir))
-        
-        temp_product_dir = os.path.join(self.temporary_dir, product_name)
-        
-        if not "OpenCore" in product_name:
-            kext_paths = self.utils.find_matching_paths(temp_product_dir, extension_filter=".kext")
-            for kext_path, type in kext_paths:
-                source_kext_path = os.path.join(self.temporary_dir, product_name, kext_path)
-                destination_kext_path = os.path.join(self.ock_files_dir, product_name, os.path.basename(kext_path))
-                
-                if "debug" in kext_path.lower() or "Contents" in kext_path or not self.kext.process_kext(temp_product_dir, kext_path):
-                    continue
-                
-                shutil.move(source_kext_path, destination_kext_path)
-        else:
-            source_bootloader_path = os.path.join(self.temporary_dir, product_name, "X64", "EFI")
-            if os.path.exists(source_bootloader_path):
-                destination_efi_path = os.path.join(self.ock_files_dir, product_name, os.path.basename(source_bootloader_path))
-                shutil.move(source_bootloader_path, destination_efi_path)
-                source_config_path = os.path.join(os.path.dirname(os.path.dirname(source_bootloader_path)), "Docs", "Sample.plist")
-                destination_config_path = os.path.join(destination_efi_path, "OC", "config.plist")
-                shutil.move(source_config_path, destination_config_path)
-
-            ocbinarydata_dir = os.path.join(self.temporary_dir, "OcBinaryData", "OcBinaryData-master")
-            if os.path.exists(ocbinarydata_dir):
-                background_picker_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "datasets", "background_picker.icns")
-                product_dir = os.path.join(self.ock_files_dir, product_name)
-                efi_dirs = self.utils.find_matching_paths(product_dir, name_filter="EFI", type_filter="dir")
-
-                for efi_dir, _ in efi_dirs:
-                    for dir_name in os.listdir(ocbinarydata_dir):
-                        source_dir = os.path.join(ocbinarydata_dir, dir_name)
-                        destination_dir = os.path.join(destination_efi_path, "OC", dir_name)
-                        if os.path.isdir(destination_dir):
-                            shutil.copytree(source_dir, destination_dir, dirs_exist_ok=True)
-
-                    resources_image_dir = os.path.join(product_dir, efi_dir, "OC", "Resources", "Image")
-                    picker_variants = self.utils.find_matching_paths(resources_image_dir, type_filter="dir")
-                    for picker_variant, _ in picker_variants:
-                        if ".icns" in ", ".join(os.listdir(os.path.join(resources_image_dir, picker_variant))):
-                            shutil.copy(background_picker_path, os.path.join(resources_image_dir, picker_variant, "Background.icns"))
-
-            macserial_paths = self.utils.find_matching_paths(temp_product_dir, name_filter="macserial", type_filter="file")
-            if macserial_paths:
-                for macserial_path, _ in macserial_paths:
-                    source_macserial_path = os.path.join(self.temporary_dir, product_name, macserial_path)
-                    destination_macserial_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), os.path.basename(macserial_path))
-                    shutil.move(source_macserial_path, destination_macserial_path)
-                    if os.name != "nt":
-                        subprocess.run(["chmod", "+x", destination_macserial_path])
+    async def fetch_latest_releases(self, repos):
+        """并发获取多个仓库的最新发布信息
+
+        参数:
+            repos: [(所有者, 仓库), ...]
+
+        返回:
+            {仓库: 发布信息}
+        """
+        source = async_fetcher.AsyncResourceFetcher(self.source, MAX_METADATA_WORKERS)
+        latest_releases = await asyncio.gather(*(source.get_latest_release(owner, repo) for owner, repo in repos))
+        return {repo: latest_release for (_, repo), latest_release in zip(repos, latest_releases)}
+
+    def _extract_kexts(self, members, product_dir):
+        # 找出所有 .kext 包的根目录，跳过 Debug 版本和嵌套在其他 kext 内的插件
+        kext_roots = set()
+        for path in members:
+            parts = path.split("/")
+            for index, part in enumerate(parts[:-1]):
+                if part.lower().endswith(".kext"):
+                    kext_roots.add("/".join(parts[:index + 1]))
+
+        extracted_kexts = set()
+
+        for kext_root in sorted(kext_roots):
+            kext_name = posixpath.basename(kext_root)
+            if "debug" in kext_root.lower() or "Contents" in kext_root or "__MACOSX" in kext_root or kext_name in extracted_kexts:
+                continue
+
+            kext_members = {path[len(kext_root) + 1:]: member for path, member in members.items() if path.startswith(kext_root + "/")}
+
+            # 与 KextMaestro.process_kext 相同，要求能读取到有效的 Info.plist
+            plist_paths = sorted(path for path in kext_members if path.lower().endswith(".plist") and "Info" in posixpath.basename(path) and not posixpath.basename(path).startswith("."))
+            try:
+                bundle_info = plistlib.loads(kext_members[plist_paths[0]].read())
+                bundle_info.get("CFBundleIdentifier")
+            except Exception:
+                continue
+
+            for relative_path, member in kext_members.items():
+                member.extract_to(os.path.join(product_dir, kext_name, *relative_path.split("/")))
+            extracted_kexts.add(kext_name)
+
+    def _extract_bootloader(self, members, product_dir, ocbinarydata_zip_path):
+        efi_dir = os.path.join(product_dir, "EFI")
+        efi_prefix = "X64/EFI/"
+
+        if any(path.startswith(efi_prefix) for path in members):
+            for path, member in members.items():
+                if path.startswith(efi_prefix):
+                    member.extract_to(os.path.join(product_dir, *path[len("X64/"):].split("/")))
+
+            if "Docs/Sample.plist" in members:
+                members["Docs/Sample.plist"].extract_to(os.path.join(efi_dir, "OC", "config.plist"))
+
+        if ocbinarydata_zip_path and os.path.exists(ocbinarydata_zip_path):
+            with zip_extractor.ZipExtractor() as extractor:
+                for member in extractor.iter_members(ocbinarydata_zip_path):
+                    parts = member.path.split("/")
+                    if len(parts) < 3 or not os.path.isdir(os.path.join(efi_dir, "OC", parts[1])):
+                        continue
+                    member.extract_to(os.path.join(efi_dir, "OC", *parts[1:]))
+
+            background_picker_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "datasets", "background_picker.icns")
+            resources_image_dir = os.path.join(efi_dir, "OC", "Resources", "Image")
+            picker_variants = self.utils.find_matching_paths(resources_image_dir, type_filter="dir")
+            for picker_variant, _ in picker_variants:
+                if ".icns" in ", ".join(os.listdir(os.path.join(resources_image_dir, picker_variant))):
+                    shutil.copy(background_picker_path, os.path.join(resources_image_dir, picker_variant, "Background.icns"))
+
+        for path, member in members.items():
+            file_name = posixpath.basename(path)
+            if "macserial" not in file_name or file_name.startswith("."):
+                continue
+
+            destination_macserial_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), file_name)
+            member.extract_to(destination_macserial_path)
+            if os.name != "nt":
+                subprocess.run(["chmod", "+x", destination_macserial_path])
+
+    def extract_bootloader_kexts_to_product_directory(self, product_name, zip_path, ocbinarydata_zip_path=None):
+        """直接从发布 zip 中把需要的文件写入 OCK_Files/<product_name>
+
+        kext 产品只写出非 Debug 的 .kext 包；OpenCorePkg 只写出 X64/EFI、Sample.plist 和 macserial，
+        并合并 OcBinaryData 中的资源。嵌套 zip 在内存中展开，不经过临时目录。
+        """
+        product_dir = os.path.join(self.ock_files_dir, product_name)
+        self.utils.create_folder(product_dir, remove_content=True)
+
+        with zip_extractor.ZipExtractor(skip_archive=lambda path: "debug" in path.lower()) as extractor:
+            members = extractor.list_members(zip_path)
+
+            if not "OpenCore" in product_name:
+                self._extract_kexts(members, product_dir)
+            else:
+                self._extract_bootloader(members, product_dir, ocbinarydata_zip_path)
         
         return True
     
@@ -143,15 +209,36 @@ class gatheringFiles:
         print("")
         print("请等待下载 OpenCorePkg、kext(内核扩展)和 macserial...")
 
-        download_history = self.utils.read_file(self.download_history_file)
-        if not isinstance(download_history, list):
-            download_history = []
-
-        download_database = self.update_download_database(kexts, download_history)
-        
-        self.utils.create_folder(self.temporary_dir)
+        if self.prefetcher is not None:
+            # 停止后台预取，已预取的文件在下面的下载中直接使用
+            self.prefetcher.cancel()
 
+        history = self.load_download_history()
+        try:
+            return self._gather_bootloader_kexts(kexts, macos_version, history)
+        finally:
+            # 本次收集期间的历史更新已逐条写入日志，结束时一次性合并进 history.json
+            history.compact()
+            # 重新解压的产品不再引用旧文件，删除没有链接的 blob
+            self.blob_store.prune()
+            if self.prefetcher is not None:
+                self.prefetcher.discard()
+
+    def plan_downloads(self, kexts, macos_version, history, download_database):
+        """列出构建需要的产品及其状态，不打印任何信息
+
+        参数:
+            kexts: kext 列表
+            macos_version: 目标 macOS 的 Darwin 版本
+            history: 下载历史
+            download_database: update_download_database 的返回值
+
+        返回:
+            [{"status", "product_name", ...}, ...]，status 为 "not found"（无下载信息）、
+            "up to date"（已下载最新版本）、"no url"（缺少下载 URL）或 "pending"（需要下载）
+        """
         seen_download_urls = set()
+        plan = []
 
         for product in kexts + [{"Name": "OpenCorePkg"}]:
             if not isinstance(product, dict) and not product.checked:
@@ -181,17 +268,15 @@ class gatheringFiles:
             elif product_name == "UTBDefault":
                 product_name = "USBToolBox"
 
-            product_download_index = self.get_product_index(download_database, product_name)
-            if product_download_index is None:
+            product_info = download_database.get(product_name)
+            if product_info is None:
                 if hasattr(product, 'github_repo') and product.github_repo:
-                    product_download_index = self.get_product_index(download_database, product.github_repo.get("repo"))
+                    product_info = download_database.get(product.github_repo.get("repo"))
             
-            if product_download_index is None:
-                print("\n")
-                print("无法找到 {} 的下载 URL。".format(product_name))
+            if product_info is None:
+                plan.append({"status": "not found", "product_name": product_name})
                 continue
 
-            product_info = download_database[product_download_index]
             product_id = product_info.get("id")
             product_download_url = product_info.get("url")
             sha256_hash = product_info.get("sha256")
@@ -200,82 +285,173 @@ class gatheringFiles:
                 continue
             seen_download_urls.add(product_download_url)
 
-            product_history_index = self.get_product_index(download_history, product_name)
+            history_item = history.get(product_name)
             asset_dir = os.path.join(self.ock_files_dir, product_name)
             manifest_path = os.path.join(asset_dir, "manifest.json")
 
-            if product_history_index is not None:
-                history_item = download_history[product_history_index]
+            if history_item is not None:
                 is_latest_id = (product_id == history_item.get("id"))
                 folder_is_valid, _ = self.integrity_checker.verify_folder_integrity(asset_dir, manifest_path)
                 
                 if is_latest_id and folder_is_valid:
-                    print(f"\n{product_name} 的最新版本已下载。")
+                    plan.append({"status": "up to date", "product_name": product_name})
                     continue
 
-            print("")
-            print("更新中" if product_history_index is not None else "请等待下载", end=" ")
-            print("{}...".format(product_name))
-            if product_download_url:
-                print("来自 {}".format(product_download_url))
-                print("")
-            else:
+            if not product_download_url:
+                plan.append({"status": "no url", "product_name": product_name})
+                continue
+
+            plan.append({
+                "status": "pending",
+                "product_name": product_name,
+                "id": product_id,
+                "url": product_download_url,
+                "sha256": sha256_hash,
+                "has_history": history_item is not None,
+                "asset_dir": asset_dir,
+                "manifest_path": manifest_path
+            })
+
+        return plan
+
+    def start_prefetch(self, kexts, macos_version):
+        """在后台预取当前 kext 选择所需的文件，选择变化后再次调用会按新的选择重新开始"""
+        if self.prefetcher is None:
+            self.prefetcher = prefetch.Prefetcher(self.source.quiet_copy())
+
+        plan_key = (macos_version, tuple(sorted(kext.name for kext in kexts if kext.checked)))
+        # 后台线程使用 kext 状态的快照，用户在菜单中继续修改时不受影响
+        kexts_snapshot = [copy.copy(kext) for kext in kexts]
+        planner = copy.copy(self)
+        planner.source = self.source.quiet_copy()
+
+        def plan():
+            history = planner.load_download_history()
+            download_database = planner.update_download_database(kexts_snapshot, history)
+            products = [product for product in planner.plan_downloads(kexts_snapshot, macos_version, history, download_database) if product.get("status") == "pending"]
+            if any("OpenCore" in product.get("product_name") for product in products):
+                products.append({"product_name": "OcBinaryData", "url": planner.ocbinarydata_url, "sha256": None})
+            return products
+
+        self.prefetcher.start(plan_key, plan)
+
+    def _gather_bootloader_kexts(self, kexts, macos_version, history):
+        download_database = self.update_download_database(kexts, history)
+        
+        self.utils.create_folder(self.temporary_dir)
+
+        pending_products = []
+
+        for product in self.plan_downloads(kexts, macos_version, history, download_database):
+            status = product.pop("status")
+            product_name = product.get("product_name")
+
+            if status == "not found":
+                print("\n")
+                print("无法找到 {} 的下载 URL。".format(product_name))
+            elif status == "up to date":
+                print(f"\n{product_name} 的最新版本已下载。")
+            elif status == "no url":
                 print("")
                 print("无法找到 {} 的下载 URL。".format(product_name))
                 print("")
                 self.utils.request_input()
                 shutil.rmtree(self.temporary_dir, ignore_errors=True)
                 return False
+            else:
+                pending_products.append(product)
 
-            zip_path = os.path.join(self.temporary_dir, product_name) + ".zip"
-            if not self.fetcher.download_and_save_file(product_download_url, zip_path, sha256_hash):
-                folder_is_valid, _ = self.integrity_checker.verify_folder_integrity(asset_dir, manifest_path)
-                if product_history_index is not None and folder_is_valid:
-                    print("使用先前下载的 {} 版本。".format(product_name))
+        if not pending_products:
+            shutil.rmtree(self.temporary_dir, ignore_errors=True)
+            return True
+
+        print("")
+        print("正在并行下载 {} 个文件...".format(len(pending_products)))
+        print("")
+
+        # 已在后台预取的文件直接使用，其余文件经由预取器下载时会续传未完成的预取。
+        # 工作线程不能打印信息，否则会打乱调度器的多行进度显示
+        scheduler = download_scheduler.DownloadScheduler(self.prefetcher or self.source.quiet_copy())
+        products_by_task = {}
+        ocbinarydata_task = None
+
+        for product in pending_products:
+            zip_path = os.path.join(self.temporary_dir, product.get("product_name")) + ".zip"
+            task = scheduler.submit(download_scheduler.DownloadTask(product.get("product_name"), product.get("url"), zip_path, product.get("sha256")))
+            products_by_task[task] = product
+
+            if "OpenCore" in product.get("product_name"):
+                ocbinarydata_task = scheduler.submit(download_scheduler.DownloadTask("OcBinaryData", self.ocbinarydata_url, os.path.join(self.temporary_dir, "OcBinaryData.zip")))
+
+        # 先完成下载的文件先解压处理；OpenCorePkg 需要等待 OcBinaryData 下载完成
+        waiting_for_ocbinarydata = None
+        failures = []
+
+        try:
+            for task in scheduler.as_completed():
+                if task is ocbinarydata_task:
+                    if not task.succeeded:
+                        failures.append(("OcBinaryData", None))
+                        continue
+
+                    if waiting_for_ocbinarydata:
+                        self._install_downloaded_product(waiting_for_ocbinarydata, task.destination_path, history)
+                        waiting_for_ocbinarydata = None
                     continue
-                else:
-                    raise Exception("无法下载 {}。请稍后重试。".format(product_name))
-            
-            self.utils.extract_zip_file(zip_path)
-            self.utils.create_folder(asset_dir, remove_content=True)
-            
-            while True:
-                nested_zip_files = self.utils.find_matching_paths(os.path.join(self.temporary_dir, product_name), extension_filter=".zip")
-                if not nested_zip_files:
-                    break
-                for zip_file, _ in nested_zip_files:
-                    full_zip_path = os.path.join(self.temporary_dir, product_name, zip_file)
-                    self.utils.extract_zip_file(full_zip_path)
-                    os.remove(full_zip_path)
-
-            if "OpenCore" in product_name:
-                oc_binary_data_zip_path = os.path.join(self.temporary_dir, "OcBinaryData.zip")
-                print("")
-                print("请等待下载 OcBinaryData...")
-                print("来自 {}".format(self.ocbinarydata_url))
+
+                product = products_by_task[task]
+                if not task.succeeded:
+                    failures.append((product.get("product_name"), product))
+                    continue
+
+                # 发布信息未提供校验和时，记录下载时计算出的SHA256
+                product["sha256"] = product.get("sha256") or task.downloaded_sha256
+                product["zip_path"] = task.destination_path
+
+                if "OpenCore" in product.get("product_name") and ocbinarydata_task:
+                    if ocbinarydata_task.status != "已完成":
+                        waiting_for_ocbinarydata = product
+                        continue
+                    self._install_downloaded_product(product, ocbinarydata_task.destination_path, history)
+                    continue
+
+                self._install_downloaded_product(product, None, history)
+        finally:
+            scheduler.shutdown()
+
+        for product_name, product in failures:
+            if product is None:
                 print("")
-                self.fetcher.download_and_save_file(self.ocbinarydata_url, oc_binary_data_zip_path)
-
-                if not os.path.exists(oc_binary_data_zip_path):
-                    print("")
-                    print("此时无法下载 OcBinaryData。")
-                    print("请稍后重试。\n")
-                    self.utils.request_input()
-                    shutil.rmtree(self.temporary_dir, ignore_errors=True)
-                    return False
-                
-                self.utils.extract_zip_file(oc_binary_data_zip_path)
+                print("此时无法下载 OcBinaryData。")
+                print("请稍后重试。\n")
+                self.utils.request_input()
+                shutil.rmtree(self.temporary_dir, ignore_errors=True)
+                return False
 
-            if self.move_bootloader_kexts_to_product_directory(product_name):
-                self.integrity_checker.generate_folder_manifest(asset_dir, manifest_path)
-                self._update_download_history(download_history, product_name, product_id, product_download_url, sha256_hash)
+            folder_is_valid, _ = self.integrity_checker.verify_folder_integrity(product.get("asset_dir"), product.get("manifest_path"))
+            if product.get("has_history") and folder_is_valid:
+                print("使用先前下载的 {} 版本。".format(product_name))
+            else:
+                shutil.rmtree(self.temporary_dir, ignore_errors=True)
+                raise Exception("无法下载 {}。请稍后重试。".format(product_name))
 
         shutil.rmtree(self.temporary_dir, ignore_errors=True)
         return True
+
+    def _install_downloaded_product(self, product, ocbinarydata_zip_path, history):
+        product_name = product.get("product_name")
+
+        if self.extract_bootloader_kexts_to_product_directory(product_name, product.get("zip_path"), ocbinarydata_zip_path):
+            manifest_data = self.integrity_checker.generate_folder_manifest(product.get("asset_dir"), product.get("manifest_path"))
+            # 与其他产品内容相同的文件改为链接到同一个 blob
+            replaced_files = self.blob_store.ingest_folder(product.get("asset_dir"), manifest_data or {})
+            # 改为链接的文件修改时间变了，更新清单，下次校验时仍可按大小和修改时间跳过哈希计算
+            self.integrity_checker.refresh_manifest_entries(product.get("asset_dir"), product.get("manifest_path"), manifest_data, replaced_files)
+            history.record(product_name, product.get("id"), product.get("url"), product.get("sha256"))
     
     def get_kernel_patches(self, patches_name, patches_url):
         try:
-            response = self.fetcher.fetch_and_parse_content(patches_url, "plist")
+            response = self.source.fetch_and_parse_content(patches_url, "plist")
 
             return response["Kernel"]["Patch"]
         except: 
@@ -285,40 +461,25 @@ class gatheringFiles:
             print("")
             print("请稍后重试或手动应用它们。")
             print("")
+            if utils.is_headless():
+                # 无人值守构建没有人手动补上这些补丁，缺少它们的 EFI 不能视为构建成功
+                raise utils.HeadlessAbort("无法下载 {}".format(patches_name))
             self.utils.request_input()
             return []
         
-    def _update_download_history(self, download_history, product_name, product_id, product_url, sha256_hash):
-        product_history_index = self.get_product_index(download_history, product_name)
-        
-        entry = {
-            "product_name": product_name, 
-            "id": product_id,
-            "url": product_url,
-            "sha256": sha256_hash
-        }
-
-        if product_history_index is None:
-            download_history.append(entry)
-        else:
-            download_history[product_history_index].update(entry)
-        
-        self.utils.create_folder(os.path.dirname(self.download_history_file))
-        self.utils.write_file(self.download_history_file, download_history)
-        
     def gather_hardware_sniffer(self):
         if os_name != "Windows":
             return
 
         self.utils.head("收集硬件嗅探")
 
-        PRODUCT_NAME = "Hardware-Sniffer-CLI.exe"
-        REPO_OWNER = "lzhoang2801"
-        REPO_NAME = "Hardware-Sniffer"
+        PRODUCT_NAME = HARDWARE_SNIFFER_PRODUCT_NAME
+        REPO_OWNER = HARDWARE_SNIFFER_REPO_OWNER
+        REPO_NAME = HARDWARE_SNIFFER_REPO_NAME
 
         destination_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), PRODUCT_NAME)
         
-        latest_release = self.github.get_latest_release(REPO_OWNER, REPO_NAME) or {}
+        latest_release = self.source.get_latest_release(REPO_OWNER, REPO_NAME) or {}
         
         product_id = None
         product_download_url = None
@@ -340,14 +501,10 @@ class gatheringFiles:
             self.utils.request_input()
             raise Exception("无法找到 {} 的发布信息。".format(PRODUCT_NAME))
 
-        download_history = self.utils.read_file(self.download_history_file)
-        if not isinstance(download_history, list):
-            download_history = []
-
-        product_history_index = self.get_product_index(download_history, PRODUCT_NAME)
+        history = self.load_download_history()
+        history_item = history.get(PRODUCT_NAME)
         
-        if product_history_index is not None:
-            history_item = download_history[product_history_index]
+        if history_item is not None:
             is_latest_id = (product_id == history_item.get("id"))
             
             file_is_valid = False
@@ -361,19 +518,99 @@ class gatheringFiles:
                 return destination_path
 
         print("")
-        print("更新中" if product_history_index is not None else "请等待下载", end=" ")
+        print("更新中" if history_item is not None else "请等待下载", end=" ")
         print("{}...".format(PRODUCT_NAME))
         print("")
         print("来自 {}".format(product_download_url))
         print("")
         
-        if not self.fetcher.download_and_save_file(product_download_url, destination_path, sha256_hash):
+        if not self.source.download_and_save_file(product_download_url, destination_path, sha256_hash):
             manual_download_url = f"https://github.com/{REPO_OWNER}/{REPO_NAME}/releases/latest"
             print("请访问 {} 手动下载 {}\。".format(manual_download_url, PRODUCT_NAME))
             print("")
             self.utils.request_input()
             raise Exception("下载 {} 失败。".format(PRODUCT_NAME))
 
-        self._update_download_history(download_history, PRODUCT_NAME, product_id, product_download_url, sha256_hash)
+        history.record(PRODUCT_NAME, product_id, product_download_url, sha256_hash)
+        history.compact()
         
-        return destination_path
\ No newline at end of file
+        return destination_path
+
+    def export_mirror(self, mirror_dir, kext_names=None):
+        """把构建所需的全部元数据和文件导出为离线镜像
+
+        kext_names 为空时导出所有 kext 的全部发布资产。返回下载失败的文件名列表。
+        """
+        exporter = artifact_sources.MirrorExporter(mirror_dir, self.source)
+        upstream_source = self.source
+        self.source = exporter
+
+        export_dir = os.path.join(self.temporary_dir, "mirror-export")
+        self.utils.create_folder(export_dir, remove_content=True)
+        failures = []
+
+        try:
+            kexts = []
+            for kext in kext_maestro.kext_data.kexts:
+                kext = copy.copy(kext)
+                kext.checked = not kext_names or kext.name in kext_names
+                kexts.append(kext)
+
+            print("正在获取发布信息...")
+            download_database = self.update_download_database(kexts)
+
+            scheduler = download_scheduler.DownloadScheduler(exporter.quiet_copy())
+            seen_download_urls = set()
+
+            # 构建时缺少 iasl 会自动下载，镜像中保存各平台的 iasl，离线构建也能处理 ACPI
+            iasl_products = [{"product_name": "iasl", "url": url} for url in (dsdt.IASL_URL_MACOS, dsdt.IASL_URL_LINUX)]
+            try:
+                iasl_url_windows = dsdt.find_iasl_url(exporter.get_latest_release(dsdt.ACPICA_REPO_OWNER, dsdt.ACPICA_REPO_NAME) or {})
+            except Exception:
+                iasl_url_windows = None
+            if iasl_url_windows:
+                iasl_products.append({"product_name": "iasl", "url": iasl_url_windows})
+            else:
+                failures.append("iasl (Windows)")
+
+            for product in list(download_database.values()) + [{"product_name": "OcBinaryData", "url": self.ocbinarydata_url}] + iasl_products:
+                product_download_url = product.get("url")
+                if not product_download_url or product_download_url in seen_download_urls:
+                    continue
+                seen_download_urls.add(product_download_url)
+
+                destination_path = os.path.join(export_dir, "{}-{}".format(len(seen_download_urls), os.path.basename(product_download_url)))
+                scheduler.submit(download_scheduler.DownloadTask(product.get("product_name"), product_download_url, destination_path, product.get("sha256")))
+
+            print("")
+            print("正在下载 {} 个文件...".format(len(seen_download_urls)))
+            print("")
+
+            try:
+                for task in scheduler.as_completed():
+                    if not task.succeeded:
+                        failures.append(task.name)
+                    elif os.path.exists(task.destination_path):
+                        os.remove(task.destination_path)
+            finally:
+                scheduler.shutdown()
+
+            for patches_name, patches_url in (("AMD Vanilla Patches", self.amd_vanilla_patches_url), ("Aquantia macOS Patches", self.aquantia_macos_patches_url), ("Hyper Threading Patches", self.hyper_threading_patches_url)):
+                if exporter.fetch_content(patches_url) is None:
+                    failures.append(patches_name)
+
+            try:
+                latest_release = exporter.get_latest_release(HARDWARE_SNIFFER_REPO_OWNER, HARDWARE_SNIFFER_REPO_NAME) or {}
+            except Exception:
+                latest_release = {}
+
+            asset_name = HARDWARE_SNIFFER_PRODUCT_NAME.split('.')[0]
+            asset = next((asset for asset in latest_release.get("assets", []) if asset.get("product_name") == asset_name), None)
+            if not asset or not exporter.download_and_save_file(asset.get("url"), os.path.join(export_dir, HARDWARE_SNIFFER_PRODUCT_NAME), asset.get("sha256")):
+                failures.append(HARDWARE_SNIFFER_PRODUCT_NAME)
+        finally:
+            self.source = upstream_source
+            exporter.save()
+            shutil.rmtree(export_dir, ignore_errors=True)
+
+        return failures
@@ -1,12 +1,12 @@
+from Scripts import release_parser
 from Scripts import resource_fetcher
 from Scripts import utils
-import random
 import json
 
 class Gitee:
-    def __init__(self):
+    def __init__(self, fetcher=None):
         self.utils = utils.Utils()
-        self.fetcher = resource_fetcher.ResourceFetcher()
+        self.fetcher = fetcher or resource_fetcher.ResourceFetcher()
 
     def extract_payload(self, response):
         for line in response.splitlines():
@@ -44,83 +44,33 @@ class Gitee:
         return payload
 
     def get_latest_release(self, owner, repo):
-        url = "https://gitee.com/{}/{}/releases".format(owner, repo)
-        response = self.fetcher.fetch_and_parse_content(url)
+        latest_release = release_parser.session_cache.get_latest("gitee", owner, repo)
+        if latest_release is not None:
+            return latest_release
 
-        if not response:
+        # 发布页很大，只读取到最新发布的标签名和说明为止
+        url = "https://gitee.com/{}/{}/releases".format(owner, repo)
+        release_page = release_parser.ReleasePageParser()
+        if not self.fetcher.scan_lines(url, release_page.feed):
             raise ValueError("无法从 Gitee 获取发布信息。")
 
-        tag_name = self._extract_tag_name(response)
-        body = self._extract_body_content(response)
+        tag_name = release_page.tag_name
+        latest_release = release_parser.session_cache.get("gitee", owner, repo, tag_name)
+        if latest_release is not None:
+            return latest_release
 
         release_tag_url = "https://gitee.com/{}/{}/releases/expanded_assets/{}".format(owner, repo, tag_name)
-        response = self.fetcher.fetch_and_parse_content(release_tag_url)
-
-        if not response:
+        asset_list = release_parser.AssetListParser("https://gitee.com", self.extract_asset_name)
+        if not self.fetcher.scan_lines(release_tag_url, asset_list.feed):
             raise ValueError("无法从 Gitee 获取扩展资产信息。")
 
-        assets = self._extract_assets(response)
-
-        return {
-            "body": body,
-            "assets": assets
+        latest_release = {
+            "body": release_page.body or "",
+            "assets": asset_list.assets
         }
+        release_parser.session_cache.store("gitee", owner, repo, tag_name, latest_release)
 
-    def _extract_tag_name(self, response):
-        for line in response.splitlines():
-            if "<a" in line and "href=\"" in line and "/releases/tag/" in line:
-                return line.split("/releases/tag/")[1].split("\"")[0]
-        return None
-
-    def _extract_body_content(self, response):
-        for line in response.splitlines():
-            if "<div" in line and "body-content" in line:
-                return response.split(line.split(">", 1)[0], 1)[1].split("</div>", 1)[0][1:]
-        return ""
-
-    def _extract_assets(self, response):
-        assets = []
-
-        in_li_block = False
-
-        for line in response.splitlines():
-
-            if "<li" in line:
-                in_li_block = True
-                download_link = None
-                sha256 = None
-                asset_id = None
-            elif in_li_block and "</li" in line:
-                if download_link and asset_id:
-                    assets.append({
-                        "product_name": self.extract_asset_name(download_link.split("/")[-1]), 
-                        "id": int(asset_id), 
-                        "url": "https://gitee.com" + download_link,
-                        "sha256": sha256
-                    })
-                in_li_block = False
-
-            if in_li_block:  
-                if download_link is None and "<a" in line and "href=\"" in line and "/releases/download" in line:
-                    download_link = line.split("href=\"", 1)[1].split("\"", 1)[0]
-
-                    if not ("tlwm" in download_link or ("tlwm" not in download_link and "DEBUG" not in download_link.upper())):
-                        in_li_block = False
-                        continue
-
-                if sha256 is None and "sha256:" in line:
-                    sha256 = line.split("sha256:", 1)[1].split("<", 1)[0]
-
-                if asset_id is None and "<relative-time" in line:
-                    asset_id = self._generate_asset_id(line)
-
-        return assets
-
-    def _generate_asset_id(self, line):
-        try:
-            return "".join(char for char in line.split("datetime=\"")[-1].split("\"")[0][::-1] if char.isdigit())[:9]
-        except:
-            return "".join(random.choices('0123456789', k=9))
+        return latest_release
 
     def extract_asset_name(self, file_name):
         end_idx = len(file_name)
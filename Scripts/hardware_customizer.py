@@ -36,7 +36,7 @@ class HardwareCustomizer:
                     print("")
 
                     while True:
-                        answer = self.utils.request_input("Build EFI for UEFI? (Yes/no): ").strip().lower()
+                        answer = self.utils.request_input("Build EFI for UEFI? (Yes/no): ", answer_key="uefi", default="yes").strip().lower()
                         if answer == "yes":
                             self.customized_hardware[device_type]["Firmware Type"] = "UEFI"
                             break
@@ -44,6 +44,7 @@ class HardwareCustomizer:
                             self.customized_hardware[device_type]["Firmware Type"] = "Legacy"
                             break
                         else:
+                            self.utils.reject_answer("uefi", answer)
                             print("\033[91m无效选择，请重试。\033[0m\n\n")
                 continue
             
@@ -243,7 +244,7 @@ class HardwareCustomizer:
                 print("")
             
             while True:
-                choice = self.utils.request_input(f"请选择一个 {device_type} 组合 (1-{len(valid_combinations)}): ")
+                choice = self.utils.request_input(f"请选择一个 {device_type} 组合 (1-{len(valid_combinations)}): ", answer_key=device_type.lower(), default="1")
                 
                 try:
                     choice_num = int(choice)
@@ -256,8 +257,10 @@ class HardwareCustomizer:
 
                         return selected_devices
                     else:
+                        self.utils.reject_answer(device_type.lower(), choice)
                         print("无效选项。请重试。")
                 except ValueError:
+                    self.utils.reject_answer(device_type.lower(), choice)
                     print("请输入有效的数字。")
         else:
             for index, device_name in enumerate(devices, start=1):
@@ -275,7 +278,7 @@ class HardwareCustomizer:
                 print()
             
             while True:
-                choice = self.utils.request_input(f"请选择一个 {device_type} 设备 (1-{len(devices)}): ")
+                choice = self.utils.request_input(f"请选择一个 {device_type} 设备 (1-{len(devices)}): ", answer_key=device_type.lower(), default="1")
                 
                 try:
                     choice_num = int(choice)
@@ -288,8 +291,10 @@ class HardwareCustomizer:
                         
                         return [selected_device]
                     else:
+                        self.utils.reject_answer(device_type.lower(), choice)
                         print("无效选项。请重试。")
                 except ValueError:
+                    self.utils.reject_answer(device_type.lower(), choice)
                     print("请输入有效的数字。")
 
     def _disable_device(self, device_type, device_name, device_props):
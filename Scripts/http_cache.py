@@ -0,0 +1,105 @@
+# HTTP缓存模块
+# 在磁盘上缓存元数据和补丁 plist 的响应体，并使用 ETag/Last-Modified 进行条件请求
+
+from Scripts import utils
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_MAX_AGE = 10 * 60  # 缓存在此时间（秒）内视为新鲜，不访问网络
+
+class CacheEntry:
+    def __init__(self, url, body_path, metadata):
+        self.url = url
+        self.body_path = body_path
+        self.metadata = metadata
+
+    @property
+    def stored_at(self):
+        return self.metadata.get("stored_at", 0)
+
+    def is_fresh(self, max_age):
+        return max_age > 0 and time.time() - self.stored_at < max_age
+
+    def validators(self):
+        """返回用于条件请求的请求头"""
+        headers = {}
+        if self.metadata.get("etag"):
+            headers["If-None-Match"] = self.metadata.get("etag")
+        if self.metadata.get("last_modified"):
+            headers["If-Modified-Since"] = self.metadata.get("last_modified")
+        return headers
+
+    def read_body(self):
+        with open(self.body_path, "rb") as file:
+            return file.read()
+
+class HttpCache:
+    """基于磁盘的HTTP响应缓存
+
+    每个URL对应 Cache/http 下的一个响应体文件和一个元数据 JSON 文件。
+    max_age 秒内的重复请求直接使用缓存；过期后携带 If-None-Match/If-Modified-Since
+    重新验证，服务器返回 304 时继续使用缓存内容。
+    """
+
+    def __init__(self, cache_dir=None, max_age=DEFAULT_MAX_AGE):
+        self.utils = utils.Utils()
+        self.cache_dir = cache_dir or self.utils.get_cache_dir("http")
+        self.max_age = max_age
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".body"), os.path.join(self.cache_dir, key + ".json")
+
+    def _write_atomic(self, path, data):
+        temporary_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(temporary_path, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+
+    def lookup(self, url):
+        body_path, metadata_path = self._paths(url)
+        if not os.path.exists(body_path) or not os.path.exists(metadata_path):
+            return None
+
+        try:
+            with open(metadata_path, "r") as file:
+                metadata = json.load(file)
+        except Exception:
+            return None
+
+        if metadata.get("url") != url:
+            return None
+
+        return CacheEntry(url, body_path, metadata)
+
+    def store(self, url, body, headers):
+        body_path, metadata_path = self._paths(url)
+        metadata = {
+            "url": url,
+            "stored_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "size": len(body)
+        }
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._write_atomic(body_path, body)
+            self._write_atomic(metadata_path, json.dumps(metadata, indent=4).encode("utf-8"))
+        except Exception as e:
+            print("写入HTTP缓存失败: {}".format(e))
+
+    def refresh(self, entry, headers):
+        """服务器返回 304 后更新缓存时间和验证信息"""
+        entry.metadata["stored_at"] = time.time()
+        if headers.get("ETag"):
+            entry.metadata["etag"] = headers.get("ETag")
+        if headers.get("Last-Modified"):
+            entry.metadata["last_modified"] = headers.get("Last-Modified")
+
+        try:
+            self._write_atomic(self._paths(entry.url)[1], json.dumps(entry.metadata, indent=4).encode("utf-8"))
+        except Exception as e:
+            print("写入HTTP缓存失败: {}".format(e))
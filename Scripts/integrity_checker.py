@@ -1,44 +1,264 @@
 import os
 import hashlib
 import json
+import mmap
 from Scripts import utils
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_BLOCK_SIZE = 1024 * 1024  # 计算哈希时每次读取的字节数（1MB）
+MMAP_THRESHOLD = 16 * 1024 * 1024  # 不小于此大小的文件通过 mmap 计算哈希
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 1)  # 并行计算哈希的默认线程数
+MANIFEST_VERSION = 2  # 清单格式版本：文件信息加 Merkle 目录哈希
+
+_deep_verify = False
+
+def set_deep_verify(enabled):
+    """设置是否默认深度校验（忽略清单中的文件大小和修改时间，重新计算所有文件的哈希值）"""
+    global _deep_verify
+    _deep_verify = enabled
 
 class IntegrityChecker:
-    def __init__(self):
+    def __init__(self, max_workers=None):
         self.utils = utils.Utils()
+        self.max_workers = max_workers or DEFAULT_HASH_WORKERS
 
-    def get_sha256(self, file_path, block_size=65536):
+    def get_sha256(self, file_path, block_size=HASH_BLOCK_SIZE):
         if not os.path.exists(file_path) or os.path.isdir(file_path):
             return None
 
         sha256 = hashlib.sha256()
         with open(file_path, 'rb') as f:
-            for block in iter(lambda: f.read(block_size), b''):
-                sha256.update(block)
+            if os.fstat(f.fileno()).st_size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    sha256.update(mapped)
+            else:
+                for block in iter(lambda: f.read(block_size), b''):
+                    sha256.update(block)
         return sha256.hexdigest()
 
+    def hash_files(self, file_paths):
+        """并行计算多个文件的 SHA256，按 file_paths 的顺序返回结果
+
+        hashlib 处理较大的数据块时会释放 GIL，多个线程可以同时读盘和计算。
+        """
+        file_paths = list(file_paths)
+        if len(file_paths) <= 1 or self.max_workers <= 1:
+            return [self.get_sha256(file_path) for file_path in file_paths]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hash") as executor:
+            return list(executor.map(self.get_sha256, file_paths))
+
+    def _manifest_entry(self, file_path, sha256):
+        stat = os.stat(file_path)
+        return {
+            "sha256": sha256,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns
+        }
+
+    def _tree_children(self, files):
+        """返回 {目录: {名称: (类型, 相对路径)}}，类型为 "f"（文件）或 "d"（目录），根目录为空字符串"""
+        children = {"": {}}
+        for relative_path in files:
+            parent = ""
+            parts = relative_path.split("/")
+            for index, name in enumerate(parts[:-1]):
+                directory = "/".join(parts[:index + 1])
+                children[parent][name] = ("d", directory)
+                children.setdefault(directory, {})
+                parent = directory
+            children[parent][parts[-1]] = ("f", relative_path)
+        return children
+
+    def build_directory_hashes(self, files):
+        """按 Merkle 树计算每个目录的哈希值
+
+        目录的哈希值由其直接子项（文件的 SHA256、子目录的哈希值）按名称排序后计算得到，
+        任何文件变化都会逐级改变到根目录（空字符串）为止的所有目录哈希值。
+        """
+        children = self._tree_children(files)
+        directory_hashes = {}
+
+        # 先计算较深的目录
+        for directory in sorted(children, key=lambda path: path.count("/") + bool(path), reverse=True):
+            lines = []
+            for name, (kind, path) in sorted(children[directory].items()):
+                child_hash = files[path].get("sha256") if kind == "f" else directory_hashes[path]
+                lines.append("{} {} {}".format(kind, name, child_hash))
+            directory_hashes[directory] = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+
+        return directory_hashes
+
+    def load_manifest(self, manifest_path):
+        """读取清单，返回 {"files": {...}, "directories": {...}}，无法读取时返回None
+
+        兼容旧格式（以相对路径为键的字典，值为哈希值或文件信息），目录哈希值按需计算。
+        """
+        manifest_data = self.utils.read_file(manifest_path)
+        if not isinstance(manifest_data, dict):
+            return None
+
+        directories = None
+        if isinstance(manifest_data.get("version"), int):
+            files = manifest_data.get("files") or {}
+            directories = manifest_data.get("directories")
+        else:
+            files = manifest_data
+
+        files = {relative_path: entry if isinstance(entry, dict) else {"sha256": entry} for relative_path, entry in files.items()}
+        return {
+            "files": files,
+            "directories": directories or self.build_directory_hashes(files),
+            "is_current": directories is not None
+        }
+
+    def _write_manifest(self, manifest_path, files):
+        self.utils.write_file(manifest_path, {
+            "version": MANIFEST_VERSION,
+            "files": dict(sorted(files.items())),
+            "directories": self.build_directory_hashes(files)
+        })
+
+    def diff_manifests(self, old_manifest, new_manifest, subtree=""):
+        """比较两个清单（load_manifest 的返回值），只进入哈希值不同的目录
+
+        参数:
+            old_manifest: 旧清单
+            new_manifest: 新清单
+            subtree: 只比较此目录或文件（相对路径，如 "EFI/OC/Drivers"），默认比较全部
+
+        返回:
+            {"added": [...], "removed": [...], "modified": [...]}，均为文件的相对路径
+        """
+        subtree = subtree.replace("\\", "/").strip("/")
+        old_children = self._tree_children(old_manifest.get("files"))
+        new_children = self._tree_children(new_manifest.get("files"))
+        old_directories = old_manifest.get("directories")
+        new_directories = new_manifest.get("directories")
+        changes = {
+            "added": [],
+            "removed": [],
+            "modified": []
+        }
+
+        def collect_files(children, directory, kind_of_change):
+            for kind, path in children.get(directory, {}).values():
+                if kind == "f":
+                    changes[kind_of_change].append(path)
+                else:
+                    collect_files(children, path, kind_of_change)
+
+        def compare(directory):
+            if old_directories.get(directory) == new_directories.get(directory):
+                return
+
+            old_items = old_children.get(directory, {})
+            new_items = new_children.get(directory, {})
+            for name in sorted(set(old_items) | set(new_items)):
+                old_kind, path = old_items.get(name, (None, None))
+                new_kind, new_path = new_items.get(name, (None, None))
+                path = path or new_path
+
+                if old_kind == new_kind == "d":
+                    compare(path)
+                    continue
+                if old_kind == new_kind == "f":
+                    if old_manifest["files"][path].get("sha256") != new_manifest["files"][path].get("sha256"):
+                        changes["modified"].append(path)
+                    continue
+
+                # 新增、删除，或文件与目录互相替换
+                if old_kind == "f":
+                    changes["removed"].append(path)
+                elif old_kind == "d":
+                    collect_files(old_children, path, "removed")
+                if new_kind == "f":
+                    changes["added"].append(path)
+                elif new_kind == "d":
+                    collect_files(new_children, path, "added")
+
+        old_file = old_manifest.get("files").get(subtree)
+        new_file = new_manifest.get("files").get(subtree)
+        if old_file or new_file:
+            # subtree 是单个文件
+            if old_file and new_file:
+                if old_file.get("sha256") != new_file.get("sha256"):
+                    changes["modified"].append(subtree)
+            elif old_file:
+                changes["removed"].append(subtree)
+                collect_files(new_children, subtree, "added")
+            else:
+                collect_files(old_children, subtree, "removed")
+                changes["added"].append(subtree)
+        else:
+            compare(subtree)
+
+        return changes
+
     def generate_folder_manifest(self, folder_path, manifest_path=None):
+        """生成文件夹清单
+
+        每个文件记录 SHA256、大小和修改时间（纳秒），另外按 Merkle 树记录每个目录的哈希值，
+        用于只校验某个子目录，或比较两个清单时跳过内容相同的目录。
+        """
         if not os.path.isdir(folder_path):
             return None
 
         if manifest_path is None:
             manifest_path = os.path.join(folder_path, "manifest.json")
 
-        manifest_data = {}
+        file_paths = {}
         for root, _, files in os.walk(folder_path):
             for name in files:
                 file_path = os.path.join(root, name)
                 relative_path = os.path.relpath(file_path, folder_path).replace('\\', '/')
-                
+
                 if relative_path == os.path.basename(manifest_path):
                     continue
 
-                manifest_data[relative_path] = self.get_sha256(file_path)
-        
-        self.utils.write_file(manifest_path, manifest_data)
+                file_paths[relative_path] = file_path
+
+        manifest_data = {}
+        for (relative_path, file_path), sha256 in zip(file_paths.items(), self.hash_files(file_paths.values())):
+            manifest_data[relative_path] = self._manifest_entry(file_path, sha256)
+
+        self._write_manifest(manifest_path, manifest_data)
         return manifest_data
 
-    def verify_folder_integrity(self, folder_path, manifest_path=None):
+    def refresh_manifest_entries(self, folder_path, manifest_path, files, relative_paths):
+        """文件内容不变但被替换（例如改为指向 blob 的硬链接）后，更新清单中这些文件的大小和修改时间
+
+        参数:
+            folder_path: 文件夹
+            manifest_path: 清单文件路径
+            files: generate_folder_manifest 的返回值，会被原地更新
+            relative_paths: 被替换的文件的相对路径
+        """
+        if not relative_paths:
+            return files
+
+        for relative_path in relative_paths:
+            files[relative_path] = self._manifest_entry(os.path.join(folder_path, *relative_path.split("/")), files[relative_path].get("sha256"))
+
+        self._write_manifest(manifest_path, files)
+        return files
+
+    def verify_folder_integrity(self, folder_path, manifest_path=None, deep=None, subtree=None):
+        """按清单校验文件夹
+
+        大小和修改时间都与清单一致的文件视为未修改，不再计算哈希值；其余文件重新计算哈希值。
+        旧格式清单校验通过后会升级为新格式，哈希值一致但修改时间变化的文件也会更新清单，
+        之后的校验可以直接跳过。
+
+        参数:
+            folder_path: 要校验的文件夹
+            manifest_path: 清单文件路径，默认为文件夹中的 manifest.json
+            deep: 为True时重新计算所有文件的哈希值，None 表示使用 set_deep_verify 的设置
+            subtree: 只校验此子目录或文件（相对路径，如 "EFI/OC/Drivers"）
+
+        返回:
+            (是否有效, 问题列表或错误信息)
+        """
         if not os.path.isdir(folder_path):
             return None, "文件夹未找到。"
 
@@ -48,39 +268,59 @@ class IntegrityChecker:
         if not os.path.exists(manifest_path):
             return None, "清单文件未找到。"
 
-        manifest_data = self.utils.read_file(manifest_path)
-        if not isinstance(manifest_data, dict):
+        manifest = self.load_manifest(manifest_path)
+        if manifest is None:
             return None, "清单文件格式无效。"
-            
-        issues = {
-            "modified": [],
-            "missing": [],
-            "untracked": []
-        }
 
-        manifest_files = set(manifest_data.keys())
-        actual_files = set()
+        deep = _deep_verify if deep is None else deep
+        subtree = (subtree or "").replace("\\", "/").strip("/")
+        manifest_files = manifest.get("files")
 
-        for root, _, files in os.walk(folder_path):
-            for name in files:
-                file_path = os.path.join(root, name)
-                relative_path = os.path.relpath(file_path, folder_path).replace('\\', '/')
+        current_files = {}
+        pending_files = []
+        refreshed_entries = {}
 
-                if relative_path == os.path.basename(manifest_path):
-                    continue
-                
-                actual_files.add(relative_path)
+        subtree_path = os.path.join(folder_path, *subtree.split("/"))
+        if os.path.isfile(subtree_path):
+            file_paths = [subtree_path]
+        else:
+            file_paths = [os.path.join(root, name) for root, _, files in os.walk(subtree_path) for name in files]
 
-                if relative_path not in manifest_data:
-                    issues["untracked"].append(relative_path)
-                else:
-                    current_hash = self.get_sha256(file_path)
-                    if current_hash != manifest_data.get(relative_path):
-                        issues["modified"].append(relative_path)
+        for file_path in file_paths:
+            relative_path = os.path.relpath(file_path, folder_path).replace('\\', '/')
+
+            if relative_path == os.path.basename(manifest_path):
+                continue
 
-        missing_files = manifest_files - actual_files
-        issues["missing"] = list(missing_files)
+            entry = manifest_files.get(relative_path)
+            stat = os.stat(file_path)
+            if entry is not None and not deep and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+                current_files[relative_path] = entry
+                continue
+
+            pending_files.append((relative_path, file_path, entry, stat))
+
+        current_hashes = self.hash_files(file_path for _, file_path, _, _ in pending_files)
+        for (relative_path, file_path, entry, stat), current_hash in zip(pending_files, current_hashes):
+            current_files[relative_path] = {"sha256": current_hash}
+            if entry is not None and current_hash == entry.get("sha256"):
+                refreshed_entries[relative_path] = self._manifest_entry(file_path, current_hash)
+
+        changes = self.diff_manifests(manifest, {
+            "files": current_files,
+            "directories": self.build_directory_hashes(current_files)
+        }, subtree)
+
+        issues = {
+            "modified": changes.get("modified"),
+            "missing": changes.get("removed"),
+            "untracked": changes.get("added")
+        }
 
         is_valid = not any(issues.values())
-        
+
+        if is_valid and (refreshed_entries or not manifest.get("is_current")):
+            manifest_files.update(refreshed_entries)
+            self._write_manifest(manifest_path, manifest_files)
+
         return is_valid, issues
@@ -1,3 +1,4 @@
+from Scripts import blob_store
 from Scripts import integrity_checker
 from Scripts.datasets import cpu_data
 from Scripts.datasets import kext_data
@@ -5,8 +6,8 @@ from Scripts.datasets import os_data
 from Scripts.datasets import pci_data
 from Scripts.datasets import codec_layouts
 from Scripts import utils
+import copy
 import os
-import shutil
 
 try:
     long
@@ -26,6 +27,7 @@ class KextMaestro:
     """
     def __init__(self):
         self.utils = utils.Utils()
+        self.blob_store = blob_store.BlobStore()
         self.matching_keys = [
             "IOPCIMatch", 
             "IONameMatch", 
@@ -35,7 +37,8 @@ class KextMaestro:
             "HDAConfigDefault"
         ]
         self.ock_files_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "OCK_Files")
-        self.kexts = kext_data.kexts
+        # 每个实例使用独立的 kext 列表，同一进程中的多次构建互不影响勾选状态
+        self.kexts = copy.deepcopy(kext_data.kexts)
         
     def extract_pci_id(self, kext_path):
         """
@@ -177,7 +180,7 @@ class KextMaestro:
                     print("2. \033[1mVoodooHDA\033[0m - 音质较低，需要手动注入到/Library/Extensions")
                     print("")
                     while True:
-                        kext_option = self.utils.request_input("选择系统的音频kext: ").strip()
+                        kext_option = self.utils.request_input("选择系统的音频kext: ", answer_key="audio_kext", default="1").strip()
                         if kext_option == "1":
                             needs_oclp = True
                             selected_kexts.append("AppleALC")
@@ -185,6 +188,7 @@ class KextMaestro:
                         elif kext_option == "2":
                             break
                         else:
+                            self.utils.reject_answer("audio_kext", kext_option)
                             print("\033[91m无效选择，请重试。\033[0m\n\n")
                 else:
                     selected_kexts.append("AppleALC")
@@ -251,11 +255,12 @@ class KextMaestro:
                         self.utils.request_input("按Enter键继续...")
                         continue
 
-                    kext_option = self.utils.request_input("为您的AMD {} GPU选择kext (默认值: {}): ".format(gpu_props.get("Codename"), recommended_name)).strip() or str(recommended_option)
+                    kext_option = self.utils.request_input("为您的AMD {} GPU选择kext (默认值: {}): ".format(gpu_props.get("Codename"), recommended_name), answer_key="amd_gpu_kext").strip() or str(recommended_option)
                     
                     if kext_option.isdigit() and 0 < int(kext_option) < max_option + 1:
                         selected_option = int(kext_option)
                     else:
+                        self.utils.reject_answer("amd_gpu_kext", kext_option)
                         print("\033[93m无效选择，使用推荐选项: {}\033[0m".format(recommended_option))
                         selected_option = recommended_option
 
@@ -329,11 +334,12 @@ class KextMaestro:
                     self.utils.request_input("按Enter键继续...")
                     selected_option = recommended_option
                 else:
-                    kext_option = self.utils.request_input("为您的Intel WiFi设备选择kext (默认值: {}): ".format(recommended_name)).strip() or str(recommended_option)
+                    kext_option = self.utils.request_input("为您的Intel WiFi设备选择kext (默认值: {}): ".format(recommended_name), answer_key="intel_wifi_kext").strip() or str(recommended_option)
                     
                     if kext_option.isdigit() and 0 < int(kext_option) < 3:
                         selected_option = int(kext_option)
                     else:
+                        self.utils.reject_answer("intel_wifi_kext", kext_option)
                         print("\033[91m无效选择，使用推荐选项: {}\033[0m".format(recommended_option))
                         selected_option = recommended_option
                 
@@ -349,13 +355,14 @@ class KextMaestro:
                         print("\033[1;93m注意:\033[0m 从macOS Sonoma 14开始，没有补丁的情况下，AirportItlwm的iServices将无法工作")
                         print("")
                         while True:
-                            option = self.utils.request_input("应用OCLP根补丁修复iServices? (yes/No): ").strip().lower()
+                            option = self.utils.request_input("应用OCLP根补丁修复iServices? (yes/No): ", answer_key="iservices_patch", default="no").strip().lower()
                             if option == "yes":
                                 selected_kexts.append("IOSkywalkFamily")
                                 break
                             elif option == "no":
                                 break
                             else:
+                                self.utils.reject_answer("iservices_patch", option)
                                 print("\033[91m无效选择，请重试。\033[0m\n\n")
             elif device_id in pci_data.AtherosWiFiIDs[:8]:
                 selected_kexts.append("corecaptureElCap")
@@ -511,7 +518,7 @@ class KextMaestro:
                                     destination_kext_path = os.path.join(kexts_directory, os.path.basename(kext_path))
                     
                     if os.path.exists(source_kext_path):
-                        shutil.copytree(source_kext_path, destination_kext_path, dirs_exist_ok=True)
+                        self.blob_store.clone_tree(source_kext_path, destination_kext_path)
                 except:
                     continue
 
@@ -751,12 +758,13 @@ class KextMaestro:
             print("- 强制加载不支持的kext可能导致系统不稳定。 \033[0;31m请谨慎操作。\033[0m")
             print("")
             
-            option = self.utils.request_input("您想在不支持的macOS版本上强制加载{}吗？ (yes/No): ".format("这些kext" if len(incompatible_kexts) > 1 else "这个kext"))
+            option = self.utils.request_input("您想在不支持的macOS版本上强制加载{}吗？ (yes/No): ".format("这些kext" if len(incompatible_kexts) > 1 else "这个kext"), answer_key="force_load_unsupported_kexts", default="no")
             
             if option.lower() == "yes":
                 return True
             elif option.lower() == "no":
                 return False
+            self.utils.reject_answer("force_load_unsupported_kexts", option)
 
     def kext_configuration_menu(self, macos_version):
         """
@@ -0,0 +1,153 @@
+# 预取模块
+# 用户仍在菜单中操作时，在后台线程中提前下载构建 EFI 所需的 kext 和 OpenCorePkg
+
+from Scripts import resource_fetcher
+from Scripts import utils
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+PREFETCH_MAX_RATE = 4 * 1024 * 1024  # 后台预取的最大下载速度（字节/秒），None 表示不限速
+
+class Prefetcher:
+    """后台预取器
+
+    start() 在后台线程中按下载计划逐个下载文件到 Cache/prefetch，一次只下载一个文件并限速，
+    尽量不影响用户的其他网络使用。计划变化（例如用户勾选了其他 kext）时再次调用 start()，
+    旧的预取会被取消，已经下载好的文件保留并继续使用。
+
+    download_file() 与 ResourceFetcher 的同名方法接口相同，可以直接作为 DownloadScheduler 的
+    fetcher：已预取并通过校验的文件直接移动到目标位置，否则从来源下载（会续传被取消的预取）。
+
+    参数:
+        source: 下载使用的来源，应为不打印信息的副本（见 ArtifactSource.quiet_copy）
+        cache_dir: 预取文件目录，默认为 Cache/prefetch
+        max_rate: 后台预取的最大下载速度（字节/秒）
+    """
+
+    def __init__(self, source, cache_dir=None, max_rate=PREFETCH_MAX_RATE):
+        self.source = source
+        self.cache_dir = cache_dir or utils.Utils().get_cache_dir("prefetch")
+        self.max_rate = max_rate
+        self.plan_key = None
+        self._ready = {}  # URL -> (文件路径, SHA256)
+        self._thread = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def _cache_path(self, resource_url):
+        name = hashlib.sha256(resource_url.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.cache_dir, "{}-{}".format(name, os.path.basename(resource_url.split("?", 1)[0]) or "download"))
+
+    def start(self, plan_key, plan):
+        """按计划开始预取
+
+        参数:
+            plan_key: 标识计划内容的可比较值，与当前计划相同时不重新开始
+            plan: 在后台线程中调用的函数，返回 [{"product_name", "url", "sha256"}, ...]
+        """
+        if plan_key == self.plan_key and self._thread is not None:
+            return
+
+        # 只通知旧线程停止，不在这里等待：旧线程可能正在获取下载计划，等待会卡住菜单。
+        # 新线程开始下载前会先等旧线程退出，两者不会同时写同一个预取文件
+        self._cancelled.set()
+        self.plan_key = plan_key
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(plan, self._cancelled, self._thread), name="prefetch", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """取消正在进行的预取并等待后台线程停止
+
+        下载中的文件在下一块数据到达时停止；获取下载计划的请求无法中断，但受请求超时和重试次数限制。
+        每个线程开始下载前都会等待上一个线程退出，因此等待最新的线程即可。
+        等待之后 discard() 删除预取目录时不会有线程仍在写入。
+        """
+        self._cancelled.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+        self.plan_key = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _throttle(self, cancelled):
+        start_time = time.monotonic()
+        first_bytes = []
+
+        def progress_callback(bytes_downloaded, total_size):
+            if cancelled.is_set():
+                raise resource_fetcher.DownloadCancelled()
+
+            if not self.max_rate:
+                return
+
+            # 续传时回调的字节数包含已有部分，按本次实际下载的字节计算速度
+            if not first_bytes:
+                first_bytes.append(bytes_downloaded)
+            expected_time = (bytes_downloaded - first_bytes[0]) / self.max_rate
+            elapsed = time.monotonic() - start_time
+            if expected_time > elapsed:
+                time.sleep(expected_time - elapsed)
+
+        return progress_callback
+
+    def _run(self, plan, cancelled, previous_thread):
+        try:
+            products = plan()
+            if previous_thread is not None:
+                previous_thread.join()
+            if cancelled.is_set():
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            for product in products:
+                if cancelled.is_set():
+                    return
+
+                resource_url = product.get("url")
+                with self._lock:
+                    if not resource_url or resource_url in self._ready:
+                        continue
+
+                cache_path = self._cache_path(resource_url)
+                sha256 = self.source.download_file(resource_url, cache_path, product.get("sha256"), self._throttle(cancelled))
+                if sha256:
+                    with self._lock:
+                        self._ready[resource_url] = (cache_path, sha256)
+        except resource_fetcher.DownloadCancelled:
+            pass
+        except Exception:
+            # 预取只是优化，失败时由正式构建重新下载
+            pass
+
+    def download_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        with self._lock:
+            cache_path, sha256 = self._ready.pop(resource_url, (None, None))
+
+        if cache_path and os.path.exists(cache_path) and (not sha256_hash or sha256_hash.lower() == sha256.lower()):
+            # 预取目录和目标位置可能不在同一个文件系统，shutil.move 会在这种情况下改为复制
+            shutil.move(cache_path, destination_path)
+            if progress_callback:
+                size = os.path.getsize(destination_path)
+                progress_callback(size, size)
+            return sha256
+
+        # 下载到预取目录中的同一路径，可以续传被取消的预取
+        cache_path = self._cache_path(resource_url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        sha256 = self.source.download_file(resource_url, cache_path, sha256_hash, progress_callback)
+        if sha256:
+            shutil.move(cache_path, destination_path)
+        return sha256
+
+    def discard(self):
+        """取消预取并删除所有预取文件"""
+        self.cancel()
+        with self._lock:
+            self._ready.clear()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -0,0 +1,124 @@
+# 发布页解析模块
+# 逐行解析 GitHub/Gitee 发布页，获得所需信息后即可停止读取，并在会话内缓存解析结果
+
+import copy
+import random
+import threading
+
+class ReleasePageParser:
+    """解析发布列表页，找到最新发布的标签名和说明后结束"""
+
+    def __init__(self):
+        self.tag_name = None
+        self.body = None
+        self._body_lines = None
+
+    def feed(self, line):
+        """处理一行，已获得标签名和说明时返回True"""
+        if self.tag_name is None and "<a" in line and "href=\"" in line and "/releases/tag/" in line:
+            self.tag_name = line.split("/releases/tag/")[1].split("\"")[0]
+
+        if self.body is None:
+            if self._body_lines is not None:
+                self._body_lines.append(line)
+            elif "<div" in line and "body-content" in line:
+                # 说明从 body-content 开始标签的 ">" 之后开始，到第一个 "</div>" 为止
+                self._body_lines = [line.split(">", 1)[1] if ">" in line else ""]
+
+            if self._body_lines and "</div>" in self._body_lines[-1]:
+                self.body = "\n".join(self._body_lines).split("</div>", 1)[0]
+
+        return self.tag_name is not None and self.body is not None
+
+class AssetListParser:
+    """解析展开的资产列表，读到列表结束标签后结束
+
+    参数:
+        host_url: 下载链接的主机前缀，如 https://github.com
+        asset_name: 从文件名得到产品名的函数
+    """
+
+    def __init__(self, host_url, asset_name):
+        self.host_url = host_url
+        self.asset_name = asset_name
+        self.assets = []
+        self._in_li_block = False
+        self._seen_li = False
+        self._download_link = None
+        self._sha256 = None
+        self._asset_id = None
+
+    def feed(self, line):
+        """处理一行，资产列表结束时返回True"""
+        if "<li" in line:
+            self._in_li_block = True
+            self._seen_li = True
+            self._download_link = None
+            self._sha256 = None
+            self._asset_id = None
+        elif self._in_li_block and "</li" in line:
+            if self._download_link and self._asset_id:
+                self.assets.append({
+                    "product_name": self.asset_name(self._download_link.split("/")[-1]),
+                    "id": int(self._asset_id),
+                    "url": self.host_url + self._download_link,
+                    "sha256": self._sha256
+                })
+            self._in_li_block = False
+        elif not self._in_li_block and self._seen_li and "</ul" in line:
+            return True
+
+        if self._in_li_block:
+            if self._download_link is None and "<a" in line and "href=\"" in line and "/releases/download" in line:
+                self._download_link = line.split("href=\"", 1)[1].split("\"", 1)[0]
+
+                if not ("tlwm" in self._download_link or ("tlwm" not in self._download_link and "DEBUG" not in self._download_link.upper())):
+                    self._in_li_block = False
+                    return False
+
+            if self._sha256 is None and "sha256:" in line:
+                self._sha256 = line.split("sha256:", 1)[1].split("<", 1)[0]
+
+            if self._asset_id is None and "<relative-time" in line:
+                self._asset_id = generate_asset_id(line)
+
+        return False
+
+def generate_asset_id(line):
+    try:
+        return "".join(char for char in line.split("datetime=\"")[-1].split("\"")[0][::-1] if char.isdigit())[:9]
+    except:
+        return "".join(random.choices('0123456789', k=9))
+
+class ReleaseCache:
+    """会话内的发布信息缓存
+
+    以 (主机, 所有者, 仓库) 记录最新标签，以 (主机, 所有者, 仓库, 标签) 记录解析后的发布信息，
+    同一会话中多次查询同一仓库时不再重复抓取发布页。返回的是副本，调用方可以随意修改。
+
+    参数:
+        latest_tags: 保存最新标签的映射，默认为普通字典；传入 multiprocessing.Manager 的字典可在多个进程间共用
+        releases: 保存发布信息的映射，同上
+    """
+
+    def __init__(self, latest_tags=None, releases=None):
+        self._latest_tags = {} if latest_tags is None else latest_tags
+        self._releases = {} if releases is None else releases
+        self._lock = threading.Lock()
+
+    def get_latest(self, host, owner, repo):
+        with self._lock:
+            tag_name = self._latest_tags.get((host, owner, repo))
+            release = self._releases.get((host, owner, repo, tag_name))
+            return copy.deepcopy(release)
+
+    def get(self, host, owner, repo, tag_name):
+        with self._lock:
+            return copy.deepcopy(self._releases.get((host, owner, repo, tag_name)))
+
+    def store(self, host, owner, repo, tag_name, release):
+        with self._lock:
+            self._latest_tags[(host, owner, repo)] = tag_name
+            self._releases[(host, owner, repo, tag_name)] = copy.deepcopy(release)
+
+session_cache = ReleaseCache()
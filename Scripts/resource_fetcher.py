@@ -1,27 +1,63 @@
 # 资源获取器模块
 # 用于从网络获取和解析各种资源内容
 
+from Scripts import connection_pool
+from Scripts import http_cache
 from Scripts import integrity_checker
+from Scripts import retry
 from Scripts import utils
+import codecs
+import http.client
+import io
 import ssl
 import os
 import json
 import plistlib
 import socket
-import sys
-import gzip
+import hashlib
 import zlib
 import time
 
-# 根据Python版本选择合适的urllib模块
-if sys.version_info >= (3, 0):
-    from urllib.request import urlopen, Request
-    from urllib.error import URLError
-else:
-    import urllib2
-    from urllib2 import urlopen, Request, URLError
+MIN_CHUNK_SIZE = 64 * 1024  # 下载块大小下限（64KB）
+MAX_CHUNK_SIZE = 1024 * 1024  # 下载块大小上限（1MB）
+CHUNK_TARGET_TIME = 0.05  # 读取一个块的目标耗时（秒），据此调整块大小
+PROGRESS_INTERVAL = 0.2  # 进度条最短重绘间隔（秒）
+SCAN_DRAIN_LIMIT = 256 * 1024  # scan_lines 提前停止后，剩余部分不超过此大小（字节）时仍读完
 
-MAX_ATTEMPTS = 3  # 最大尝试次数
+class DownloadCancelled(BaseException):
+    """由进度回调抛出以取消下载
+
+    与 asyncio.CancelledError 一样继承 BaseException，不会被各层的 except Exception 当作
+    普通失败处理（例如 SourceSelector 不会因此切换来源）；已下载的 .part 文件保留，可以续传。
+    """
+
+class ContentDecoder:
+    """按 Content-Encoding 逐块解压响应体
+
+    gzip（包括未声明但以 gzip 魔数开头的内容）和 deflate 使用 zlib.decompressobj 增量解压，
+    无需先读入整个压缩后的响应体；未压缩的内容原样返回。解压失败时抛出 zlib.error。
+    """
+
+    def __init__(self, content_encoding=None):
+        self.content_encoding = content_encoding
+        self._decompressor = None
+        self._started = False
+
+    def decode(self, chunk):
+        if not chunk:
+            return b""
+
+        if not self._started:
+            self._started = True
+            if self.content_encoding == "gzip" or chunk.startswith(b"\x1f\x8b"):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            elif self.content_encoding == "deflate":
+                self._decompressor = zlib.decompressobj()
+
+        return self._decompressor.decompress(chunk) if self._decompressor else chunk
+
+    def flush(self):
+        return self._decompressor.flush() if self._decompressor else b""
 
 class ResourceFetcher:
     """资源获取器类
@@ -33,11 +69,15 @@ class ResourceFetcher:
     - 完整性校验（SHA256）
     """
     
-    def __init__(self, headers=None):
+    def __init__(self, headers=None, quiet=False, pool=None, cache=None, retry_policy=None):
         """初始化资源获取器
         
         参数:
             headers: 自定义HTTP请求头
+            quiet: 为True时不打印请求错误信息（用于后台线程）
+            pool: 连接池，默认使用进程内共享的连接池
+            cache: fetch_and_parse_content 使用的HTTP缓存，默认使用 Cache/http
+            retry_policy: 重试策略，默认使用共享会话重试次数的 retry.RetryPolicy
         """
         # 请求头设置，默认使用Chrome浏览器的User-Agent
         self.request_headers = headers or {
@@ -45,8 +85,17 @@ class ResourceFetcher:
         }
         self.buffer_size = 16 * 1024  # 缓冲区大小（16KB）
         self.ssl_context = self.create_ssl_context()  # 创建SSL上下文
+        self.pool = pool or connection_pool.get_shared_pool(self.ssl_context)  # 长连接池
+        self.cache = cache or http_cache.HttpCache()  # 条件请求缓存
+        self.retry_policy = retry_policy or retry.RetryPolicy()  # 退避重试策略
         self.integrity_checker = integrity_checker.IntegrityChecker()  # 完整性检查器实例
         self.utils = utils.Utils()  # 工具类实例
+        self.quiet = quiet
+
+    def log(self, message):
+        """打印信息，静默模式下忽略"""
+        if not self.quiet:
+            print(message)
 
     def create_ssl_context(self):
         """创建SSL上下文
@@ -69,79 +118,170 @@ class ResourceFetcher:
             ssl_context = ssl._create_unverified_context()
         return ssl_context
 
-    def _make_request(self, resource_url, timeout=10):
+    def _make_request(self, resource_url, timeout=10, extra_headers=None):
         """发送HTTP请求
         
         参数:
             resource_url: 资源URL
             timeout: 超时时间（秒）
+            extra_headers: 附加的请求头（如条件请求头）
             
         返回:
-            http.client.HTTPResponse: HTTP响应对象，失败则返回None
+            tuple: (connection_pool.PooledResponse, None)，失败则返回 (None, retry.RequestFailure)
         """
         try:
             headers = dict(self.request_headers)
             headers["Accept-Encoding"] = "gzip, deflate"  # 支持压缩
+            headers.update(extra_headers or {})
             
-            # 发送请求并返回响应
-            return urlopen(Request(resource_url, headers=headers), timeout=timeout, context=self.ssl_context)
+            # 通过连接池发送请求（复用长连接并跟随重定向）
+            response = self.pool.request(resource_url, headers=headers, timeout=timeout)
+            if response.status >= 400:
+                response.read()  # 读完错误响应体以便复用连接
+                response.close()
+                self.log("HTTP错误 {}: {}".format(response.status, response.reason))
+                return None, retry.RequestFailure(status=response.status, retry_after=response.getheader("Retry-After"))
+            return response, None
         except socket.timeout as e:
-            print("超时错误: {}".format(e))
+            self.log("超时错误: {}".format(e))
+            error = e
         except ssl.SSLError as e:
-            print("SSL错误: {}".format(e))
-        except (URLError, socket.gaierror) as e:
-            print("连接错误: {}".format(e))
+            self.log("SSL错误: {}".format(e))
+            error = e
+        except (OSError, http.client.HTTPException) as e:
+            self.log("连接错误: {}".format(e))
+            error = e
         except Exception as e:
-            print("请求失败: {}".format(e))
+            self.log("请求失败: {}".format(e))
+            error = e
 
-        return None
+        return None, retry.RequestFailure(error=error)
 
-    def fetch_and_parse_content(self, resource_url, content_type=None):
-        """获取并解析内容
+    def _request_with_retry(self, resource_url, extra_headers=None, accepted_statuses=(200,)):
+        """发送请求，可重试的错误按重试策略退避后重试
+
+        返回:
+            connection_pool.PooledResponse: 状态码在 accepted_statuses 中的响应，失败则返回None
+        """
+        attempt = 0
+
+        while True:
+            attempt += 1
+            response, failure = self._make_request(resource_url, extra_headers=extra_headers)
+
+            if response:
+                if response.getcode() in accepted_statuses:
+                    self.retry_policy.record_success()
+                    return response
+                response.close()
+                failure = retry.RequestFailure(status=response.getcode())
+
+            delay = self.retry_policy.next_delay(attempt, failure)
+            if delay is None:
+                return None
+
+            self.log("从{}获取内容失败，{:.1f}秒后重试...".format(resource_url, delay))
+            self.retry_policy.wait(delay)
+
+    def probe(self, resource_url, timeout=5):
+        """发送HEAD请求测量主机的响应延迟
+
+        返回:
+            float: 收到响应所用的秒数，主机不可用（连接失败或5xx）则返回None
+        """
+        start_time = time.monotonic()
+        try:
+            response = self.pool.request(resource_url, headers=self.request_headers, timeout=timeout, method="HEAD")
+            response.read()
+            response.close()
+        except Exception as e:
+            self.log("探测{}失败: {}".format(resource_url, e))
+            return None
+
+        if response.status >= 500:
+            return None
+        return time.monotonic() - start_time
+
+    def _read_content(self, response):
+        """逐块读取响应体并解压，解压失败时返回None
+
+        解压后的数据直接写入 BytesIO，内存中不会同时保留完整的压缩数据和解压结果，
+        getvalue() 也不会再复制一份。
+        """
+        content_encoding = response.info().get("Content-Encoding")
+        decoder = ContentDecoder(content_encoding)
+        body = io.BytesIO()
+
+        try:
+            while True:
+                chunk = response.read(self.buffer_size)
+                if not chunk:
+                    break
+                body.write(decoder.decode(chunk))
+            body.write(decoder.flush())
+        except zlib.error as e:
+            response.close()
+            self.log("解压缩{}内容失败: {}".format(content_encoding or "gzip", e))
+            return None
+
+        return body.getvalue()
+
+    def fetch_content(self, resource_url, max_age=None):
+        """获取资源内容（已解压的字节），优先使用HTTP缓存
         
         参数:
             resource_url: 资源URL
-            content_type: 内容类型（json、plist或None）
+            max_age: 缓存新鲜期（秒），None 表示使用缓存的默认值，0 表示总是重新验证
             
         返回:
-            解析后的内容（字典、列表或字符串），失败则返回None
+            bytes: 资源内容，失败则返回None
         """
-        attempt = 0
-        response = None
-
-        # 尝试多次获取资源
-        while attempt < 3:
-            response = self._make_request(resource_url)
+        max_age = self.cache.max_age if max_age is None else max_age
+        cached = self.cache.lookup(resource_url)
 
-            if not response:
-                attempt += 1
-                print("从{}获取内容失败，正在重试...".format(resource_url))
-                continue
+        if cached and cached.is_fresh(max_age):
+            return cached.read_body()
 
-            if response.getcode() == 200:  # 状态码200表示成功
-                break
+        response = self._request_with_retry(resource_url, cached.validators() if cached else None, (200, 304) if cached else (200,))
 
-            attempt += 1
+        if response and response.getcode() == 304:  # 内容未修改，继续使用缓存
+            response.read()
+            self.cache.refresh(cached, response.info())
+            return cached.read_body()
 
         if not response:
-            print("从{}获取内容失败".format(resource_url))
+            if cached:
+                self.log("从{}获取内容失败，使用缓存内容".format(resource_url))
+                return cached.read_body()
+            self.log("从{}获取内容失败".format(resource_url))
             return None
         
-        content = response.read()  # 读取响应内容
+        content = self._read_content(response)
+        if content is None:
+            return cached.read_body() if cached else None
 
-        # 处理压缩内容
-        if response.info().get("Content-Encoding") == "gzip" or content.startswith(b"\x1f\x8b"):
-            try:
-                content = gzip.decompress(content)
-            except Exception as e:
-                print("解压缩gzip内容失败: {}".format(e))
-        elif response.info().get("Content-Encoding") == "deflate":
-            try:
-                content = zlib.decompress(content)
-            except Exception as e:
-                print("解压缩deflate内容失败: {}".format(e))
+        self.cache.store(resource_url, content, response.info())
+        return content
+
+    def fetch_and_parse_content(self, resource_url, content_type=None, max_age=None):
+        """获取并解析内容
         
-        # 解析内容
+        参数:
+            resource_url: 资源URL
+            content_type: 内容类型（json、plist或None）
+            max_age: 缓存新鲜期（秒），见 fetch_content
+            
+        返回:
+            解析后的内容（字典、列表或字符串），失败则返回None
+        """
+        content = self.fetch_content(resource_url, max_age)
+        if content is None:
+            return None
+
+        return self.parse_content(content, content_type)
+
+    def parse_content(self, content, content_type=None):
+        """按内容类型解析字节内容（json、plist或None表示UTF-8文本）"""
         try:
             if content_type == "json":
                 return json.loads(content)
@@ -150,121 +290,382 @@ class ResourceFetcher:
             else:
                 return content.decode("utf-8")
         except Exception as e:
-            print("解析{}内容失败: {}".format(content_type, e))
-            
+            self.log("解析{}内容失败: {}".format(content_type, e))
+
         return None
 
-    def _download_with_progress(self, response, local_file):
+    def scan_lines(self, resource_url, consumer, max_age=None):
+        """逐块读取文本资源并按行交给 consumer，consumer 返回True时立即停止读取
+
+        用于只需要页面开头部分的场景（如发布页中的标签名），无需逐行处理整个页面。
+        consumer 停止后，如果剩余部分不超过 SCAN_DRAIN_LIMIT 仍会读完（不再交给 consumer），
+        连接可以放回连接池，页面也会写入HTTP缓存，之后的请求可以用 ETag 重新验证；
+        剩余部分较大时关闭连接，不写入缓存。
+
+        参数:
+            resource_url: 资源URL
+            consumer: 回调 consumer(行)，返回True表示已获得所需内容
+            max_age: 缓存新鲜期（秒），见 fetch_content
+
+        返回:
+            bool: 成功获取到内容返回True，请求失败或解压失败返回False
+        """
+        max_age = self.cache.max_age if max_age is None else max_age
+        cached = self.cache.lookup(resource_url)
+
+        def scan_cached():
+            for line in cached.read_body().decode("utf-8", errors="replace").splitlines():
+                if consumer(line):
+                    break
+            return True
+
+        if cached and cached.is_fresh(max_age):
+            return scan_cached()
+
+        response = self._request_with_retry(resource_url, cached.validators() if cached else None, (200, 304) if cached else (200,))
+
+        if response and response.getcode() == 304:
+            response.read()
+            self.cache.refresh(cached, response.info())
+            return scan_cached()
+
+        if not response:
+            if cached:
+                self.log("从{}获取内容失败，使用缓存内容".format(resource_url))
+                return scan_cached()
+            self.log("从{}获取内容失败".format(resource_url))
+            return False
+
+        content_encoding = response.info().get("Content-Encoding")
+        content_decoder = ContentDecoder(content_encoding)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        body = io.BytesIO()
+        pending = ""
+        stopped = False
+        drained = 0
+        completed = False
+
+        try:
+            while True:
+                chunk = response.read(self.buffer_size)
+                if chunk:
+                    data = content_decoder.decode(chunk)
+                else:
+                    data = content_decoder.flush()
+                body.write(data)
+
+                if stopped:
+                    drained += len(chunk)
+                    if drained > SCAN_DRAIN_LIMIT:
+                        return True
+                else:
+                    # 最后一行可能不完整，留到下一块数据到达后再处理
+                    lines = (pending + decoder.decode(data, final=not chunk)).splitlines(keepends=True)
+                    pending = lines.pop() if chunk and lines and not lines[-1].endswith(("\n", "\r")) else ""
+
+                    for line in lines:
+                        if consumer(line.rstrip("\r\n")):
+                            stopped = True
+                            break
+
+                    # 剩余长度未知（分块传输）时边读边计数
+                    if stopped and (getattr(response, "length", None) or 0) > SCAN_DRAIN_LIMIT:
+                        return True
+
+                if not chunk:
+                    break
+
+            completed = True
+        except zlib.error as e:
+            if stopped:
+                # consumer 已获得所需内容，只是剩余部分无法缓存
+                return True
+            # 已交给 consumer 的内容不完整，不能视为成功
+            self.log("解压缩{}内容失败: {}".format(content_encoding or "gzip", e))
+            return False
+        finally:
+            if completed:
+                self.cache.store(resource_url, body.getvalue(), response.info())
+            else:
+                response.close()
+
+        return True
+
+    def _download_with_progress(self, response, local_file, progress_callback=None, resume_offset=0, hasher=None):
         """带进度显示的下载功能
         
+        数据读入一个复用的缓冲区，块大小在 MIN_CHUNK_SIZE 与 MAX_CHUNK_SIZE 之间按实际速度调整；
+        进度条每 PROGRESS_INTERVAL 秒最多重绘一次，避免终端输出拖慢下载。
+        
         参数:
             response: HTTP响应对象
             local_file: 本地文件对象
+            progress_callback: 可选的进度回调 callback(已下载字节数, 总字节数)，提供时不打印进度条
+            resume_offset: 断点续传时本地已有的字节数
+            hasher: 可选的 hashlib 对象，写入的同时增量计算哈希
         """
         total_size = response.getheader("Content-Length")  # 获取文件总大小
         if total_size:
-            total_size = int(total_size)
-        bytes_downloaded = 0
+            total_size = int(total_size) + resume_offset
+        bytes_downloaded = resume_offset
         start_time = time.time()
         last_time = start_time
-        last_bytes = 0
+        last_bytes = resume_offset
+        last_render_time = 0
         speeds = []  # 用于计算平均下载速度
 
         speed_str = "-- KB/s"
-        
-        while True:
-            chunk = response.read(self.buffer_size)  # 读取数据块
-            if not chunk:
-                break
-            local_file.write(chunk)  # 写入本地文件
-            bytes_downloaded += len(chunk)  # 更新已下载字节数
+
+        buffer = memoryview(bytearray(MAX_CHUNK_SIZE))  # 复用的读缓冲区
+        chunk_size = MIN_CHUNK_SIZE
+
+        # 进度回调抛出 DownloadCancelled 等异常时也关闭响应，避免连接泄漏
+        try:
+            while True:
+                read_start = time.monotonic()
+                size = response.readinto(buffer[:chunk_size])  # 读取数据块
+                if not size:
+                    break
+                read_time = time.monotonic() - read_start
+
+                chunk = buffer[:size]
+                local_file.write(chunk)  # 写入本地文件
+                if hasher:
+                    hasher.update(chunk)  # 边下载边计算哈希，校验时无需再次读取文件
+                bytes_downloaded += size  # 更新已下载字节数
+
+                # 读满一块用时很短说明速度快，增大块以减少调用次数；用时过长则减小块，保持进度更新及时
+                if size == chunk_size and read_time < CHUNK_TARGET_TIME / 4:
+                    chunk_size = min(chunk_size * 2, MAX_CHUNK_SIZE)
+                elif read_time > CHUNK_TARGET_TIME * 2:
+                    chunk_size = max(chunk_size // 2, MIN_CHUNK_SIZE)
+
+                if progress_callback:
+                    progress_callback(bytes_downloaded, total_size)
+                    continue
             
-            current_time = time.time()
-            time_diff = current_time - last_time  # 计算时间差
+                current_time = time.time()
+                time_diff = current_time - last_time  # 计算时间差
             
-            if time_diff > 0.5:  # 每0.5秒更新一次速度
-                current_speed = (bytes_downloaded - last_bytes) / time_diff
-                speeds.append(current_speed)
-                if len(speeds) > 5:  # 保留最近5个速度样本
-                    speeds.pop(0)
-                avg_speed = sum(speeds) / len(speeds)  # 计算平均速度
+                if time_diff > 0.5:  # 每0.5秒更新一次速度
+                    current_speed = (bytes_downloaded - last_bytes) / time_diff
+                    speeds.append(current_speed)
+                    if len(speeds) > 5:  # 保留最近5个速度样本
+                        speeds.pop(0)
+                    avg_speed = sum(speeds) / len(speeds)  # 计算平均速度
                 
-                # 格式化速度字符串
-                if avg_speed < 1024*1024:
-                    speed_str = "{:.1f} KB/s".format(avg_speed/1024)
-                else:
-                    speed_str = "{:.1f} MB/s".format(avg_speed/(1024*1024))
+                    # 格式化速度字符串
+                    if avg_speed < 1024*1024:
+                        speed_str = "{:.1f} KB/s".format(avg_speed/1024)
+                    else:
+                        speed_str = "{:.1f} MB/s".format(avg_speed/(1024*1024))
                 
-                last_time = current_time
-                last_bytes = bytes_downloaded
-            
-            # 显示进度条
-            if total_size:
-                percent = int(bytes_downloaded / total_size * 100)
-                bar_length = 40
-                filled = int(bar_length * bytes_downloaded / total_size)
-                bar = "█" * filled + "░" * (bar_length - filled)  # 进度条
-                progress = "{} [{}] {:3d}% {:.1f}/{:.1f}MB".format(
-                    speed_str, bar, percent, 
-                    bytes_downloaded/(1024*1024), 
-                    total_size/(1024*1024)
-                )
-            else:
-                progress = "已下载：{} {:.1f}MB".format(speed_str, bytes_downloaded/(1024*1024))
-            
-            # 清除当前行并打印新进度
-            print(" " * 80, end="\r")
-            print(progress, end="\r")
-            
-        print()  # 下载完成后换行
+                    last_time = current_time
+                    last_bytes = bytes_downloaded
+
+                if current_time - last_render_time >= PROGRESS_INTERVAL or bytes_downloaded == total_size:
+                    self._render_progress(speed_str, bytes_downloaded, total_size)
+                    last_render_time = current_time
+        finally:
+            response.close()
+
+        if not progress_callback:
+            print()  # 下载完成后换行
+
+    def _render_progress(self, speed_str, bytes_downloaded, total_size):
+        """在同一行重绘进度条"""
+        if total_size:
+            percent = int(bytes_downloaded / total_size * 100)
+            bar_length = 40
+            filled = int(bar_length * bytes_downloaded / total_size)
+            bar = "█" * filled + "░" * (bar_length - filled)  # 进度条
+            progress = "{} [{}] {:3d}% {:.1f}/{:.1f}MB".format(
+                speed_str, bar, percent, 
+                bytes_downloaded/(1024*1024), 
+                total_size/(1024*1024)
+            )
+        else:
+            progress = "已下载：{} {:.1f}MB".format(speed_str, bytes_downloaded/(1024*1024))
 
-    def download_and_save_file(self, resource_url, destination_path, sha256_hash=None):
+        # 用空格补齐覆盖上一次的内容，一次写入
+        print("\r" + progress.ljust(79), end="", flush=True)
+
+    def _parse_content_range(self, content_range):
+        """解析 Content-Range 头（bytes start-end/total），返回 (start, total)"""
+        try:
+            unit, byte_range = content_range.split(" ", 1)
+            start, total = byte_range.split("-", 1)[0], byte_range.split("/", 1)[1]
+            if unit.strip().lower() != "bytes":
+                return None, None
+            return int(start), None if total.strip() == "*" else int(total)
+        except Exception:
+            return None, None
+
+    def _load_resume_info(self, resource_url, part_path):
+        """读取上次未完成下载的记录，仅当URL一致且有验证信息时才可续传"""
+        if not os.path.exists(part_path):
+            return None
+
+        try:
+            with open(part_path + ".json", "r") as file:
+                resume_info = json.load(file)
+        except Exception:
+            resume_info = None
+
+        if not resume_info or resume_info.get("url") != resource_url or not (resume_info.get("etag") or resume_info.get("last_modified")):
+            self._remove_partial_download(part_path)
+            return None
+
+        return resume_info
+
+    def _save_resume_info(self, part_path, resume_info):
+        try:
+            with open(part_path + ".json", "w") as file:
+                json.dump(resume_info, file)
+        except Exception:
+            pass
+
+    def _remove_partial_download(self, part_path, keep_data=False):
+        for path in ((part_path + ".json",) if keep_data else (part_path, part_path + ".json")):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def download_and_save_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
         """下载文件并保存
         
+        参数与 download_file 相同
+            
+        返回:
+            bool: 下载成功返回True，失败返回False
+        """
+        return self.download_file(resource_url, destination_path, sha256_hash, progress_callback) is not None
+
+    def download_file(self, resource_url, destination_path, sha256_hash=None, progress_callback=None):
+        """下载文件并保存，返回文件的SHA256
+        
+        先写入 destination_path + ".part"，下载中断后如果服务器支持 Range 请求，
+        则从已下载的位置继续，而不是从头重新下载。SHA256 在下载过程中增量计算。
+        
         参数:
             resource_url: 资源URL
             destination_path: 本地保存路径
             sha256_hash: 可选的SHA256校验和
+            progress_callback: 可选的进度回调，见 _download_with_progress
             
         返回:
-            bool: 下载成功返回True，失败返回False
+            str: 下载成功返回文件的SHA256（十六进制），失败返回None
         """
+        part_path = destination_path + ".part"
+        resume_info = self._load_resume_info(resource_url, part_path)  # 上一次响应的验证信息、总大小以及是否支持 Range
         attempt = 0
+        failure = None
 
-        while attempt < MAX_ATTEMPTS:
+        while True:
+            if attempt:
+                # 按重试策略决定是否重试以及等待多久
+                delay = self.retry_policy.next_delay(attempt, failure)
+                if delay is None:
+                    break
+                self.log("{:.1f}秒后重试下载{}...".format(delay, resource_url))
+                self.retry_policy.wait(delay)
             attempt += 1
-            response = self._make_request(resource_url)
+
+            resume_offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if not resume_info or not resume_info.get("accept_ranges"):
+                resume_offset = 0
+
+            headers = {"Accept-Encoding": "identity"}
+            if resume_offset:
+                headers["Range"] = "bytes={}-".format(resume_offset)
+                if resume_info.get("etag") or resume_info.get("last_modified"):
+                    headers["If-Range"] = resume_info.get("etag") or resume_info.get("last_modified")
+
+            response, failure = self._make_request(resource_url, extra_headers=headers)
 
             if not response:
-                print("从{}获取内容失败，正在重试...".format(resource_url))
+                self.log("从{}获取内容失败".format(resource_url))
+                if resume_offset and failure.status == 416:
+                    # 本地的部分文件已超出服务器上的文件大小，从头重新下载
+                    self._remove_partial_download(part_path)
+                    resume_info = None
+                    failure = retry.RequestFailure(retryable=True)
                 continue
 
+            if response.getcode() == 206:
+                start, total_size = self._parse_content_range(response.getheader("Content-Range", ""))
+                if start != resume_offset or (total_size and resume_info.get("total_size") and total_size != resume_info.get("total_size")):
+                    # 服务器返回的范围与本地文件不一致，只能重新下载
+                    response.close()
+                    self._remove_partial_download(part_path)
+                    resume_info = None
+                    failure = retry.RequestFailure(retryable=True)
+                    continue
+                self.log("从 {:.1f}MB 处继续下载...".format(resume_offset/(1024*1024)))
+                mode = "ab"
+            else:
+                content_length = response.getheader("Content-Length")
+                resume_info = {
+                    "url": resource_url,
+                    "etag": response.getheader("ETag"),
+                    "last_modified": response.getheader("Last-Modified"),
+                    "total_size": int(content_length) if content_length else None,
+                    "accept_ranges": (response.getheader("Accept-Ranges") or "").lower() == "bytes"
+                }
+                self._save_resume_info(part_path, resume_info)
+                resume_offset = 0
+                mode = "wb"
+
+            # 续传时只需补算已下载部分的哈希
+            hasher = hashlib.sha256()
+            if mode == "ab":
+                with open(part_path, "rb") as local_file:
+                    for block in iter(lambda: local_file.read(1024 * 1024), b""):
+                        hasher.update(block)
+
             # 下载文件
-            with open(destination_path, "wb") as local_file:
-                self._download_with_progress(response, local_file)
+            try:
+                with open(part_path, mode) as local_file:
+                    self._download_with_progress(response, local_file, progress_callback, resume_offset, hasher)
+            except (OSError, http.client.HTTPException) as e:
+                response.close()
+                self.log("下载中断: {}".format(e))
+                failure = retry.RequestFailure(error=e)
+                continue
+
+            downloaded_size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if resume_info.get("total_size") and downloaded_size < resume_info.get("total_size"):
+                self.log("下载不完整（{}/{} 字节）".format(downloaded_size, resume_info.get("total_size")))
+                failure = retry.RequestFailure(retryable=True)
+                continue
 
-            # 检查文件是否存在且大小大于0
-            if os.path.exists(destination_path) and os.path.getsize(destination_path) > 0:
+            # 检查文件大小是否大于0
+            if downloaded_size > 0:
+                downloaded_hash = hasher.hexdigest()
                 if sha256_hash:
-                    print("正在验证SHA256校验和...")
-                    downloaded_hash = self.integrity_checker.get_sha256(destination_path)
-                    if downloaded_hash.lower() == sha256_hash.lower():
-                        print("校验和验证成功。")
-                        return True
-                    else:
-                        print("校验和不匹配！正在删除文件并重新下载...")
-                        os.remove(destination_path)
+                    self.log("正在验证SHA256校验和...")
+                    if downloaded_hash.lower() != sha256_hash.lower():
+                        self.log("校验和不匹配！正在删除文件...")
+                        self._remove_partial_download(part_path)
+                        resume_info = None
+                        failure = retry.RequestFailure(retryable=True)
                         continue
+                    self.log("校验和验证成功。")
                 else:
-                    print("未提供SHA256校验和，下载文件未验证。")
-                    return True
+                    self.log("未提供SHA256校验和，下载文件未验证。")
+
+                os.replace(part_path, destination_path)
+                self._remove_partial_download(part_path, keep_data=True)
+                self.retry_policy.record_success()
+                return downloaded_hash
             
             # 删除损坏的文件
-            if os.path.exists(destination_path):
-                os.remove(destination_path)
+            self._remove_partial_download(part_path)
+            resume_info = None
+            failure = retry.RequestFailure(retryable=True)
 
-            if attempt < MAX_ATTEMPTS:
-                print("{}下载失败，正在重试...".format(resource_url))
+        # 服务器支持断点续传时保留 .part 文件，下次调用可以继续下载
+        if not resume_info or not resume_info.get("accept_ranges"):
+            self._remove_partial_download(part_path)
 
-        print("尝试{}次后，下载{}失败。".format(MAX_ATTEMPTS, resource_url))
-        return False
+        self.log("尝试{}次后，下载{}失败。".format(attempt, resource_url))
+        return None
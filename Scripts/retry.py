@@ -0,0 +1,120 @@
+# 重试策略模块
+# 区分可重试和永久性错误，按指数退避加随机抖动等待，并限制整个会话的重试总次数
+
+from email.utils import parsedate_to_datetime
+import http.client
+import random
+import socket
+import ssl
+import threading
+import time
+
+MAX_ATTEMPTS = 3  # 单个请求的最大尝试次数
+BASE_DELAY = 0.5  # 第一次重试的最大等待时间（秒），之后每次翻倍
+MAX_DELAY = 30  # 单次退避等待的上限（秒）
+MAX_RETRY_AFTER = 60  # 服务器要求等待超过此时间（秒）时不再重试
+SESSION_RETRY_BUDGET = 30  # 整个会话中可用的重试次数
+RETRYABLE_STATUS_CODES = (408, 425, 429)  # 另外所有 5xx 状态码都可以重试
+
+def parse_retry_after(value):
+    """解析 Retry-After 头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except Exception:
+        return None
+
+class RequestFailure:
+    """一次失败的请求
+
+    参数:
+        status: HTTP状态码（连接层错误时为None）
+        error: 请求过程中出现的异常
+        retry_after: 响应中的 Retry-After 头
+        retryable: 明确指定是否可重试（如下载不完整、校验和不匹配），None 表示按状态码和异常判断
+    """
+
+    def __init__(self, status=None, error=None, retry_after=None, retryable=None):
+        self.status = status
+        self.error = error
+        self.retry_after = parse_retry_after(retry_after)
+        self.retryable = retryable
+
+class RetryBudget:
+    """会话内所有请求共享的重试次数
+
+    每次重试消耗一次，请求成功时返还一小部分，避免在服务器持续出错或限流时
+    所有请求都各自重试到上限，进一步加重服务器负担。
+    """
+
+    def __init__(self, capacity=SESSION_RETRY_BUDGET, refill_per_success=0.1):
+        self.capacity = capacity
+        self.refill_per_success = refill_per_success
+        self.tokens = capacity
+        self._lock = threading.Lock()
+
+    def spend(self):
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.refill_per_success)
+
+session_budget = RetryBudget()
+
+class RetryPolicy:
+    """重试策略：可重试错误按带抖动的指数退避等待后重试，永久性错误（如404）立即放弃"""
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY, max_retry_after=MAX_RETRY_AFTER, budget=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget or session_budget
+
+    def is_retryable(self, failure):
+        if failure.retryable is not None:
+            return failure.retryable
+
+        if failure.status is not None:
+            return failure.status in RETRYABLE_STATUS_CODES or 500 <= failure.status < 600
+
+        error = failure.error
+        if isinstance(error, ssl.SSLCertVerificationError):
+            return False
+        return isinstance(error, (socket.timeout, OSError, http.client.HTTPException))
+
+    def backoff(self, attempt):
+        """第 attempt 次失败后的等待时间（完全抖动：0 到指数上限之间的随机值）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def next_delay(self, attempt, failure):
+        """返回第 attempt 次尝试失败后应等待的秒数，不应重试时返回None"""
+        if attempt >= self.max_attempts or not self.is_retryable(failure):
+            return None
+
+        delay = self.backoff(attempt)
+        if failure.retry_after is not None:
+            if failure.retry_after > self.max_retry_after:
+                return None
+            delay = max(delay, failure.retry_after)
+
+        if not self.budget.spend():
+            return None
+        return delay
+
+    def record_success(self):
+        self.budget.deposit()
+
+    def wait(self, delay):
+        time.sleep(delay)
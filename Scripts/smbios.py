@@ -3,6 +3,7 @@ from Scripts.datasets import kext_data
 from Scripts.datasets import os_data
 from Scripts import gathering_files
 from Scripts import run
+from Scripts import tool_registry
 from Scripts import utils
 import os
 import uuid
@@ -16,6 +17,7 @@ class SMBIOS:
         self.g = gathering_files.gatheringFiles()
         self.run = run.Run().run
         self.utils = utils.Utils()
+        self.tool_registry = tool_registry.ToolRegistry()
         self.script_dir = os.path.dirname(os.path.realpath(__file__))
 
     def check_macserial(self, retry_count=0):
@@ -38,18 +40,16 @@ class SMBIOS:
         if retry_count >= max_retries:
             raise Exception("Failed to find macserial after {} attempts".format(max_retries))
         
-        download_history = self.utils.read_file(self.g.download_history_file)
-
-        if download_history:
-            product_index = self.g.get_product_index(download_history, "OpenCorePkg")
-            
-            if product_index is not None:
-                download_history.pop(product_index)
-                self.utils.write_file(self.g.download_history_file, download_history)
+        history = self.g.load_download_history()
+        history.remove("OpenCorePkg")
+        history.compact()
 
         self.g.gather_bootloader_kexts([], "")
         return self.check_macserial(retry_count + 1)
         
+    def get_macserial_info(self):
+        return self.tool_registry.get_tool_info(self.check_macserial(), ["-v"])
+
     def generate_random_mac(self):
         random_mac = ''.join([format(random.randint(0, 255), '02X') for _ in range(6)])
         return random_mac
@@ -0,0 +1,101 @@
+# 启动耗时分析器模块
+# 按 -X importtime 的格式统计每个模块的导入耗时
+
+import importlib.abc
+import sys
+import time
+
+class _TimingLoader(importlib.abc.Loader):
+    """包装真实加载器，在执行模块代码时计时"""
+
+    def __init__(self, loader, profiler, fullname):
+        self._loader = loader
+        self._profiler = profiler
+        self._fullname = fullname
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter(self._fullname)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._leave(self._fullname)
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """位于 sys.meta_path 首位的查找器，为找到的模块包装计时加载器"""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimingLoader(spec.loader, self._profiler, fullname)
+            return spec
+        return None
+
+class StartupProfiler:
+    """启动耗时分析器
+
+    安装后记录之后导入的每个模块的自身耗时和累计耗时（微秒），
+    并可通过 mark() 记录启动过程中的关键节点。
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.records = []  # (深度, 模块名, 自身耗时, 累计耗时)，按完成顺序
+        self.marks = []
+        self._stack = []
+        self._finder = None
+
+    def install(self):
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+        return self
+
+    def uninstall(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+
+    def _enter(self, fullname):
+        # [模块名, 开始时间, 子模块累计耗时]
+        self._stack.append([fullname, time.perf_counter(), 0.0])
+
+    def _leave(self, fullname):
+        name, started, children = self._stack.pop()
+        cumulative = time.perf_counter() - started
+        if self._stack:
+            self._stack[-1][2] += cumulative
+        self.records.append((len(self._stack), name, cumulative - children, cumulative))
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.start_time))
+
+    def report(self, top=15):
+        print("import time: self [us] | cumulative | imported package")
+        for depth, name, self_time, cumulative in self.records:
+            print("import time: {:>9} | {:>10} | {}{}".format(int(self_time * 1e6), int(cumulative * 1e6), "  " * depth, name))
+
+        print("")
+        print("累计耗时最多的 {} 个模块：".format(top))
+        for depth, name, self_time, cumulative in sorted(self.records, key=lambda record: record[3], reverse=True)[:top]:
+            print("  {:>8.1f} ms  {}".format(cumulative * 1000, name))
+
+        if self.marks:
+            print("")
+            for label, elapsed in self.marks:
+                print("  {:>8.1f} ms  {}".format(elapsed * 1000, label))
@@ -0,0 +1,80 @@
+from Scripts import integrity_checker
+from Scripts import run
+from Scripts import utils
+import os
+import json
+import re
+import threading
+
+class ToolRegistry:
+    """外部工具（iasl、macserial 等）的版本指纹登记表
+
+    以二进制路径为键，记录 mtime、大小、SHA-256 和工具报告的版本号，
+    持久化到 Cache/tool_registry.json。只有二进制文件发生变化时才会重新计算哈希
+    和执行版本查询，供编译 SSDT、反汇编等缓存层作为缓存键使用。
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, registry_path=None):
+        self.utils = utils.Utils()
+        self.run = run.Run().run
+        self.integrity_checker = integrity_checker.IntegrityChecker()
+        self.registry_path = registry_path or os.path.join(self.utils.get_cache_dir(), "tool_registry.json")
+
+    def _load(self):
+        try:
+            registry = self.utils.read_file(self.registry_path)
+        except Exception:
+            registry = None
+        return registry if isinstance(registry, dict) else {}
+
+    def _save(self, registry):
+        temporary_path = "{}.{}.tmp".format(self.registry_path, os.getpid())
+        with open(temporary_path, "w") as file:
+            json.dump(registry, file, indent=4)
+        os.replace(temporary_path, self.registry_path)
+
+    def probe_version(self, tool_path, version_args):
+        output = self.run({
+            "args": [tool_path] + list(version_args)
+        })
+
+        for line in (output[0] + "\n" + output[1]).splitlines():
+            match = re.search(r"version\s*:?\s*(\S+)", line, re.IGNORECASE)
+            if match:
+                return match.group(1)
+
+        return None
+
+    def get_tool_info(self, tool_path, version_args=("-v",)):
+        if not tool_path or not os.path.isfile(tool_path):
+            return None
+
+        tool_path = os.path.realpath(tool_path)
+        stat = os.stat(tool_path)
+
+        with ToolRegistry._lock:
+            registry = self._load()
+            tool_info = registry.get(tool_path)
+
+            if tool_info and tool_info.get("mtime_ns") == stat.st_mtime_ns and tool_info.get("size") == stat.st_size:
+                return tool_info
+
+            sha256 = self.integrity_checker.get_sha256(tool_path)
+            tool_info = {
+                "path": tool_path,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": sha256,
+                "version": self.probe_version(tool_path, version_args)
+            }
+            tool_info["fingerprint"] = "{}-{}".format(tool_info["version"] or "unknown", sha256[:16])
+
+            registry[tool_path] = tool_info
+            try:
+                self._save(registry)
+            except Exception as e:
+                print("保存工具登记表失败: {}".format(e))
+
+        return tool_info
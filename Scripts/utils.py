@@ -9,6 +9,20 @@ import subprocess
 import pathlib
 import zipfile
 import tempfile
+import time
+
+_answers = None  # 无人值守模式下的应答（dict），None 表示交互模式
+
+class HeadlessAbort(Exception):
+    """无人值守模式下程序需要用户介入（要求退出或应答无效）时抛出"""
+
+def set_headless(answers):
+    """进入无人值守模式：提示从 answers 中按键取值或使用默认值，不清屏、不等待；传入None恢复交互模式"""
+    global _answers
+    _answers = answers
+
+def is_headless():
+    return _answers is not None
 
 class Utils:
     def __init__(self, script_name = "OpCore Simplify"):
@@ -31,9 +45,18 @@ class Utils:
     def get_temporary_dir(self):
         return tempfile.mkdtemp(prefix="ocs_")
 
+    def get_cache_dir(self, *subdirs):
+        cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "Cache", *subdirs)
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+
     def write_file(self, file_path, data):
         file_extension = os.path.splitext(file_path)[1]
 
+        # 文件可能是指向 OCK_Files 或 blob 的硬链接，先删除再写入，避免修改到其他链接的内容
+        if os.path.isfile(file_path) and os.stat(file_path).st_nlink > 1:
+            os.remove(file_path)
+
         with open(file_path, "w" if file_extension == ".json" else "wb") as file:
             if file_extension == ".json":
                 json.dump(data, file, indent=4)
@@ -158,7 +181,15 @@ class Utils:
         elif os.name == 'nt':
             os.startfile(folder_path)
 
-    def request_input(self, prompt="按[Enter]键继续..."):
+    def request_input(self, prompt="按[Enter]键继续...", answer_key=None, default=""):
+        """读取用户输入
+
+        无人值守模式下不读取标准输入：有 answer_key 时返回应答文件中的值（true/false 转为 yes/no），
+        否则返回 default。应答是否有效由调用方判断，无效时调用方应调用 reject_answer()。
+        """
+        if _answers is not None:
+            return self._headless_answer(prompt, answer_key, default)
+
         if sys.version_info[0] < 3:
             user_response = raw_input(prompt)
         else:
@@ -169,6 +200,29 @@ class Utils:
         
         return user_response
 
+    def _headless_answer(self, prompt, answer_key, default):
+        answer = _answers.get(answer_key, default) if answer_key else default
+        if isinstance(answer, bool):
+            answer = "yes" if answer else "no"
+        answer = "" if answer is None else str(answer)
+
+        print("{}{}".format(prompt, answer))
+        return answer
+
+    def reject_answer(self, answer_key, answer):
+        """调用方认定输入无效时调用
+
+        交互模式下不做任何事，由调用方提示用户重新输入；无人值守模式下应答不会改变，
+        重新提示只会无限循环，因此抛出 HeadlessAbort。
+        """
+        if _answers is not None:
+            raise HeadlessAbort("应答 {} 的值 \"{}\" 无效".format(answer_key, answer))
+
+    def sleep(self, seconds):
+        """交互模式下暂停，便于用户阅读输出；无人值守模式下不等待"""
+        if _answers is None:
+            time.sleep(seconds)
+
     def progress_bar(self, title, steps, current_step_index, done=False):
         self.head(title)
         print("")
@@ -186,11 +240,15 @@ class Utils:
         print("")
 
     def head(self, text = None, width = 68, resize=True):
+        if text == None:
+            text = self.script_name
+        if _answers is not None:
+            # 无人值守模式下输出通常写入日志，不调整窗口、不清屏
+            print("\n== {} ==".format(text))
+            return
         if resize:
             self.adjust_window_size()
         os.system('cls' if os.name=='nt' else 'clear')
-        if text == None:
-            text = self.script_name
         separator = "═" * (width - 2)
         title = " {} ".format(text)
         if len(title) > width - 2:
@@ -260,12 +318,17 @@ class Utils:
         return result[:w1] if len(result) > w1 else result
     
     def adjust_window_size(self, content=""):
+        if _answers is not None:
+            return
         lines = content.splitlines()
         rows = len(lines)
         cols = max(len(line) for line in lines) if lines else 0
         print('\033[8;{};{}t'.format(max(rows+6, 30), max(cols+2, 100)))
 
     def exit_program(self):
+        if _answers is not None:
+            raise HeadlessAbort("无法继续构建，原因见上方输出")
+
         self.head()
         width = 68
         print("")
@@ -298,13 +298,14 @@ class WifiProfileExtractor:
         print("")
         
         while True:
-            user_input = self.utils.request_input("您想扫描WiFi配置文件吗？(yes/no): ").strip().lower()
+            user_input = self.utils.request_input("您想扫描WiFi配置文件吗？(yes/no): ", answer_key="scan_wifi_profiles", default="no").strip().lower()
             
             if user_input == "yes":
                 break
             elif user_input == "no":
                 return []
             else:
+                self.utils.reject_answer("scan_wifi_profiles", user_input)
                 print("\033[91m无效选择，请重新输入。\033[0m\n\n")
 
         profiles = []
@@ -0,0 +1,86 @@
+# 选择性解压模块
+# 直接读取 zip 中央目录，在内存中递归打开嵌套 zip，只写出需要的文件
+
+import io
+import os
+import posixpath
+import shutil
+import zipfile
+
+class ZipMember:
+    """zip（或嵌套 zip）中的一个文件
+
+    path 为展开嵌套 zip 后的虚拟路径：a/b.zip 中的 c.txt 对应 a/b/c.txt，
+    与逐层 extractall 后得到的目录结构一致。
+    """
+
+    def __init__(self, path, archive, info):
+        self.path = path
+        self.archive = archive
+        self.info = info
+
+    @property
+    def size(self):
+        return self.info.file_size
+
+    def read(self):
+        return self.archive.read(self.info)
+
+    def extract_to(self, destination_path):
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        with self.archive.open(self.info) as source, open(destination_path, "wb") as destination:
+            shutil.copyfileobj(source, destination, 1024 * 1024)
+
+class ZipExtractor:
+    """选择性解压器
+
+    打开的 zip 在 close()（或 with 语句结束）前保持可读，以便先列出成员再按需写出。
+
+    参数:
+        skip_archive: 可选的判断函数 skip_archive(虚拟路径)，返回 True 时不展开该嵌套 zip
+    """
+
+    def __init__(self, skip_archive=None):
+        self.skip_archive = skip_archive or (lambda path: False)
+        self._archives = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for archive in self._archives:
+            archive.close()
+        self._archives = []
+
+    def _is_safe_path(self, path):
+        normalized_path = posixpath.normpath(path)
+        return not (normalized_path.startswith("/") or normalized_path == ".." or normalized_path.startswith("../"))
+
+    def iter_members(self, zip_source, prefix=""):
+        """遍历 zip 中的所有文件（不含目录），嵌套 zip 在内存中展开"""
+        archive = zipfile.ZipFile(zip_source, "r")
+        self._archives.append(archive)
+
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+
+            path = prefix + info.filename.replace("\\", "/")
+            if not self._is_safe_path(path):
+                continue
+
+            if path.lower().endswith(".zip"):
+                if self.skip_archive(path):
+                    continue
+                nested_prefix = os.path.splitext(path)[0] + "/"
+                yield from self.iter_members(io.BytesIO(archive.read(info)), nested_prefix)
+                continue
+
+            yield ZipMember(path, archive, info)
+
+    def list_members(self, zip_source):
+        """返回 {虚拟路径: ZipMember}"""
+        return {member.path: member for member in self.iter_members(zip_source)}
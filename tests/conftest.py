@@ -0,0 +1,7 @@
+# 测试配置
+# 把仓库根目录加入 sys.path，使测试可以 from Scripts import ...
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,75 @@
+# 测试用本地HTTP服务器
+# 在后台线程中运行 ThreadingHTTPServer，代替 GitHub、Gitee 和镜像等远程主机
+
+import http.server
+import threading
+
+class QuietHandler(http.server.BaseHTTPRequestHandler):
+    """不打印访问日志的请求处理器，self.server.state 为测试与处理器共享的字典"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body, status=200, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+class LocalServer:
+    def __init__(self, handler_class, **state):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        self.server.daemon_threads = True
+        self.server.state = state
+        self.state = state
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def url(self, path="/"):
+        return "http://127.0.0.1:{}{}".format(self.port, path)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._thread = None
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+class StaticHandler(http.server.SimpleHTTPRequestHandler):
+    """提供目录中的静态文件（用作HTTP镜像），使用方式: functools.partial(StaticHandler, directory=目录)"""
+
+    def log_message(self, *args):
+        pass
+
+def isolated_fetcher(cache_dir):
+    """返回使用独立连接池、HTTP缓存目录且不重试的 ResourceFetcher，测试之间互不影响"""
+    from Scripts import connection_pool
+    from Scripts import http_cache
+    from Scripts import resource_fetcher
+    from Scripts import retry
+
+    return resource_fetcher.ResourceFetcher(
+        quiet=True,
+        pool=connection_pool.ConnectionPool(),
+        cache=http_cache.HttpCache(cache_dir),
+        retry_policy=retry.RetryPolicy(max_attempts=1, budget=retry.RetryBudget())
+    )
@@ -0,0 +1,166 @@
+import functools
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from urllib.parse import urlsplit
+
+from local_server import LocalServer, QuietHandler, StaticHandler, isolated_fetcher
+from Scripts import artifact_sources
+from Scripts import dsdt
+
+IASL_ZIP = b"PK fake iasl archive" * 100
+BUILDS_JSON = b'{"OpenCorePkg": {"versions": []}}'
+
+class UpstreamHandler(QuietHandler):
+    """代替 GitHub 的上游服务器"""
+
+    def do_GET(self):
+        self.server.state["requests"].append(self.path)
+        if self.path == "/iasl.zip":
+            return self.send_body(IASL_ZIP)
+        if self.path == "/latest.json":
+            return self.send_body(BUILDS_JSON)
+        self.send_body(b"not found", 404)
+
+class MirrorSourceTest(unittest.TestCase):
+    """先通过 MirrorExporter 从上游导出镜像，再在上游不可用时从本地目录和HTTP镜像读取"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.mirror_dir = os.path.join(self.work_dir, "mirror")
+        self.upstream = LocalServer(UpstreamHandler, requests=[]).start()
+        self.iasl_url = self.upstream.url("/iasl.zip")
+        self.builds_url = self.upstream.url("/latest.json")
+        self.release = {"body": "", "assets": [{"product_name": "iasl-win", "url": "https://github.com/acpica/acpica/releases/download/R1/iasl-win-1.zip"}]}
+
+        upstream_source = artifact_sources.GithubSource(isolated_fetcher(os.path.join(self.work_dir, "upstream-cache")))
+        upstream_source.get_latest_release = lambda owner, repo: self.release
+        exporter = artifact_sources.MirrorExporter(self.mirror_dir, upstream_source)
+        self.assertEqual(exporter.fetch_content(self.builds_url), BUILDS_JSON)
+        # export_mirror 通过不打印信息的副本下载，副本记录的条目应写入同一个索引
+        self.assertEqual(exporter.quiet_copy().download_file(self.iasl_url, os.path.join(self.work_dir, "iasl.zip")), hashlib.sha256(IASL_ZIP).hexdigest())
+        exporter.get_latest_release(dsdt.ACPICA_REPO_OWNER, dsdt.ACPICA_REPO_NAME)
+        exporter.save()
+
+        # 之后的读取不能再访问上游
+        upstream_source.fetcher.pool.close()
+        self.upstream.stop()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def check_source(self, source):
+        self.assertEqual(source.fetch_content(self.builds_url), BUILDS_JSON)
+        self.assertEqual(source.fetch_and_parse_content(self.builds_url, "json"), {"OpenCorePkg": {"versions": []}})
+
+        destination_path = os.path.join(self.work_dir, "downloaded.zip")
+        self.assertEqual(source.download_file(self.iasl_url, destination_path), hashlib.sha256(IASL_ZIP).hexdigest())
+        with open(destination_path, "rb") as file:
+            self.assertEqual(file.read(), IASL_ZIP)
+
+        release = source.get_latest_release(dsdt.ACPICA_REPO_OWNER, dsdt.ACPICA_REPO_NAME)
+        self.assertEqual(dsdt.find_iasl_url(release), self.release["assets"][0]["url"])
+        with self.assertRaises(ValueError):
+            source.get_latest_release("acidanthera", "Lilu")
+
+        self.assertIsNone(source.fetch_content(self.upstream.url("/missing")))
+        self.assertIsNone(source.download_file(self.iasl_url, destination_path, "0" * 64))
+
+    def test_local_directory(self):
+        self.check_source(artifact_sources.MirrorSource(self.mirror_dir, isolated_fetcher(os.path.join(self.work_dir, "cache"))))
+
+    def test_local_directory_corrupt_blob(self):
+        sha256 = hashlib.sha256(IASL_ZIP).hexdigest()
+        with open(os.path.join(self.mirror_dir, "blobs", sha256[:2], sha256), "wb") as file:
+            file.write(b"corrupt")
+
+        source = artifact_sources.MirrorSource(self.mirror_dir, isolated_fetcher(os.path.join(self.work_dir, "cache")))
+        destination_path = os.path.join(self.work_dir, "downloaded.zip")
+        self.assertIsNone(source.download_file(self.iasl_url, destination_path))
+        self.assertFalse(os.path.exists(destination_path))
+
+    def test_http_mirror(self):
+        with LocalServer(functools.partial(StaticHandler, directory=self.mirror_dir)) as mirror:
+            fetcher = isolated_fetcher(os.path.join(self.work_dir, "cache"))
+            self.check_source(artifact_sources.MirrorSource(mirror.url(""), fetcher))
+            fetcher.pool.close()
+
+class StandInHandler(QuietHandler):
+    """代替 GitHub/Gitee 的主机，state["delay"] 秒后才响应"""
+
+    def do_HEAD(self):
+        time.sleep(self.server.state["delay"])
+        self.send_body(b"")
+
+    def do_GET(self):
+        time.sleep(self.server.state["delay"])
+        self.server.state["requests"].append(self.path)
+        self.send_body(self.server.state["body"])
+
+class StandInSource(artifact_sources.GithubSource):
+    """把 GitHub 地址转发到本地替身主机的来源"""
+
+    def __init__(self, name, server, fetcher):
+        super().__init__(fetcher)
+        self.name = name
+        self.server = server
+        self.probe_url = server.url("/")
+
+    def translate_url(self, resource_url):
+        return self.server.url(urlsplit(resource_url).path)
+
+class SourceSelectorTest(unittest.TestCase):
+    url = "https://raw.githubusercontent.com/dortania/build-repo/builds/latest.json"
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.preferred = LocalServer(StandInHandler, delay=0, body=b"preferred", requests=[]).start()
+        self.fallback = LocalServer(StandInHandler, delay=0, body=b"fallback", requests=[]).start()
+        self.fetchers = [isolated_fetcher(os.path.join(self.work_dir, name)) for name in ("preferred", "fallback", "selector")]
+        self.sources = [
+            StandInSource("preferred", self.preferred, self.fetchers[0]),
+            StandInSource("fallback", self.fallback, self.fetchers[1])
+        ]
+        self.selector = artifact_sources.SourceSelector(self.sources, self.fetchers[2])
+
+    def tearDown(self):
+        for fetcher in self.fetchers:
+            fetcher.pool.close()
+        self.preferred.stop()
+        self.fallback.stop()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_slow_source_ranked_last(self):
+        self.preferred.state["delay"] = 0.5
+        self.assertEqual(self.selector.fetch_content(self.url, max_age=0), b"fallback")
+        self.assertEqual([source.name for source in self.selector.ranked_sources()], ["fallback", "preferred"])
+        self.assertEqual(self.preferred.state["requests"], [])
+        self.assertGreater(self.selector.scores[self.sources[0]].latency, self.selector.scores[self.sources[1]].latency)
+
+    def test_down_source_skipped_after_probe(self):
+        self.preferred.stop()
+        self.assertEqual(self.selector.fetch_content(self.url, max_age=0), b"fallback")
+        self.assertEqual(self.selector.ranked_sources()[0].name, "fallback")
+        self.assertEqual(self.selector.scores[self.sources[0]].consecutive_failures, 1)
+
+    def test_failover_when_source_goes_down(self):
+        self.fallback.state["delay"] = 0.2
+        self.assertEqual(self.selector.fetch_content(self.url, max_age=0), b"preferred")
+
+        # 探测之后首选主机下线，请求失败后切换到另一个来源（使用未缓存的地址，避免读到缓存内容）
+        self.fetchers[0].pool.close()
+        self.preferred.stop()
+        self.assertEqual(self.selector.fetch_content(self.url.replace("latest", "first"), max_age=0), b"fallback")
+        self.assertEqual(self.fallback.state["requests"], ["/dortania/build-repo/builds/first.json"])
+        self.assertEqual(self.selector.scores[self.sources[0]].consecutive_failures, 1)
+
+        # 连续失败后不健康的来源排到最后，不再先尝试它
+        self.selector.fetch_content(self.url.replace("latest", "second"), max_age=0)
+        self.assertEqual(self.selector.scores[self.sources[0]].consecutive_failures, 2)
+        self.assertEqual(self.selector.ranked_sources()[0].name, "fallback")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+
+from local_server import LocalServer, QuietHandler, isolated_fetcher
+from Scripts import async_fetcher
+from Scripts import gathering_files
+
+class SlowHandler(QuietHandler):
+    """每个请求等待 0.2 秒后返回请求路径"""
+
+    def do_GET(self):
+        time.sleep(0.2)
+        self.send_body(self.path.encode("utf-8"))
+
+class ReleaseSource:
+    def __init__(self):
+        self.requested = []
+
+    def get_latest_release(self, owner, repo):
+        time.sleep(0.1)
+        self.requested.append((owner, repo))
+        return {"assets": [{"product_name": repo, "url": "https://github.com/{}/{}.zip".format(owner, repo)}]}
+
+class AsyncResourceFetcherTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.server = LocalServer(SlowHandler).start()
+        self.fetcher = isolated_fetcher(self.cache_dir)
+
+    def tearDown(self):
+        self.fetcher.pool.close()
+        self.server.stop()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_gather_runs_concurrently(self):
+        paths = ["/page-{}".format(index) for index in range(6)]
+
+        async def fetch_all():
+            fetcher = async_fetcher.AsyncResourceFetcher(self.fetcher, max_concurrency=6)
+            return await asyncio.gather(*(fetcher.fetch_content(self.server.url(path), max_age=0) for path in paths))
+
+        start_time = time.monotonic()
+        contents = asyncio.run(fetch_all())
+
+        self.assertEqual(contents, [path.encode("utf-8") for path in paths])
+        self.assertLess(time.monotonic() - start_time, 0.2 * len(paths) / 2)
+
+    def test_metadata_pass_keeps_repo_order(self):
+        gathering = gathering_files.gatheringFiles(ReleaseSource())
+        try:
+            repos = [("acidanthera", "Lilu"), ("OpenIntelWireless", "itlwm"), ("acidanthera", "VirtualSMC")]
+            latest_releases = asyncio.run(gathering.fetch_latest_releases(repos))
+        finally:
+            shutil.rmtree(gathering.temporary_dir, ignore_errors=True)
+
+        self.assertEqual(list(latest_releases), ["Lilu", "itlwm", "VirtualSMC"])
+        self.assertEqual(latest_releases["itlwm"]["assets"][0]["url"], "https://github.com/OpenIntelWireless/itlwm.zip")
+        self.assertEqual(sorted(gathering.source.requested), sorted(repos))
+
+if __name__ == "__main__":
+    unittest.main()
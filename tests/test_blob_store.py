@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from Scripts import blob_store
+from Scripts import integrity_checker
+
+class CountingChecker(integrity_checker.IntegrityChecker):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.hashed = []
+
+    def get_sha256(self, file_path, block_size=integrity_checker.HASH_BLOCK_SIZE):
+        self.hashed.append(file_path)
+        return super().get_sha256(file_path, block_size)
+
+class BlobStoreManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.store = blob_store.BlobStore(os.path.join(self.work_dir, "blobs"))
+        self.checker = CountingChecker()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def install_product(self, name, files):
+        """按 gatheringFiles._install_downloaded_product 的顺序写入产品、生成清单并加入存储"""
+        product_dir = os.path.join(self.work_dir, name)
+        for relative_path, content in files.items():
+            file_path = os.path.join(product_dir, *relative_path.split("/"))
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as file:
+                file.write(content)
+
+        manifest_path = os.path.join(product_dir, "manifest.json")
+        manifest_data = self.checker.generate_folder_manifest(product_dir, manifest_path)
+        replaced_files = self.store.ingest_folder(product_dir, manifest_data)
+        self.checker.refresh_manifest_entries(product_dir, manifest_path, manifest_data, replaced_files)
+        return product_dir, replaced_files
+
+    def test_deduplicated_files_keep_stat_fast_path(self):
+        shared = b"Lilu binary" * 1000
+        self.install_product("Lilu", {"Lilu.kext/Contents/MacOS/Lilu": shared, "Lilu.kext/Contents/Info.plist": b"lilu"})
+        # 确保第二个产品的文件与 blob 的修改时间不同
+        time.sleep(0.01)
+        product_dir, replaced_files = self.install_product("Other", {"Lilu.kext/Contents/MacOS/Lilu": shared, "Other.kext/Info.plist": b"other"})
+
+        self.assertEqual(replaced_files, ["Lilu.kext/Contents/MacOS/Lilu"])
+        self.assertTrue(os.path.samefile(
+            os.path.join(product_dir, "Lilu.kext", "Contents", "MacOS", "Lilu"),
+            os.path.join(self.work_dir, "Lilu", "Lilu.kext", "Contents", "MacOS", "Lilu")
+        ))
+
+        self.checker.hashed.clear()
+        is_valid, issues = self.checker.verify_folder_integrity(product_dir)
+        self.assertTrue(is_valid, issues)
+        self.assertEqual(self.checker.hashed, [])
+
+    def test_result_folder_is_not_linked(self):
+        product_dir, _ = self.install_product("OpenCorePkg", {"EFI/OC/OpenCore.efi": b"opencore", "EFI/OC/config.plist": b"config"})
+        result_dir = os.path.join(self.work_dir, "Results")
+        self.store.clone_tree(product_dir, result_dir)
+
+        # 用户直接编辑结果文件夹中的文件，不能改动 OCK_Files 中的文件和存储中的 blob
+        result_path = os.path.join(result_dir, "EFI", "OC", "OpenCore.efi")
+        self.assertEqual(os.stat(result_path).st_nlink, 1)
+        with open(result_path, "wb") as file:
+            file.write(b"edited")
+
+        with open(os.path.join(product_dir, "EFI", "OC", "OpenCore.efi"), "rb") as file:
+            self.assertEqual(file.read(), b"opencore")
+        self.assertTrue(self.checker.verify_folder_integrity(product_dir)[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from local_server import LocalServer, QuietHandler
+from Scripts import connection_pool
+
+class ClosingHandler(QuietHandler):
+    """声明 keep-alive 但在每个响应后关闭连接，模拟服务器关闭空闲连接"""
+
+    def do_GET(self):
+        self.send_body(b"ok", headers={"Connection": "keep-alive"})
+        self.close_connection = True
+
+class StaleConnectionTest(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer(ClosingHandler).start()
+        self.url = self.server.url()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_all_idle_connections_stale(self):
+        pool = connection_pool.ConnectionPool()
+        # 同时持有两个响应，使连接池中留下两个已被服务器关闭的空闲连接
+        first = pool.request(self.url)
+        second = pool.request(self.url)
+        self.assertEqual(first.read(), b"ok")
+        self.assertEqual(second.read(), b"ok")
+        self.assertEqual(len(pool._idle[("http", "127.0.0.1", self.server.port)]), 2)
+
+        response = pool.request(self.url)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.read(), b"ok")
+        pool.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from Scripts import download_history
+
+class DownloadHistoryJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.history_path = os.path.join(self.work_dir, "history.json")
+        with open(self.history_path, "w") as file:
+            json.dump([
+                {"product_name": "Lilu", "id": 1, "url": "https://example.com/Lilu-1.zip", "sha256": "a"},
+                {"product_name": "VirtualSMC", "id": 1, "url": "https://example.com/VirtualSMC-1.zip", "sha256": "b"}
+            ], file)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_replay_journal(self):
+        history = download_history.DownloadHistory(self.history_path)
+        history.record("Lilu", 2, "https://example.com/Lilu-2.zip", "c")
+        history.remove("VirtualSMC")
+
+        # 没有 compact（例如程序崩溃），重新加载时重放日志
+        history = download_history.DownloadHistory(self.history_path)
+        self.assertEqual(sorted(history.entries), ["Lilu"])
+        self.assertEqual(history.get("Lilu")["id"], 2)
+
+    def test_torn_journal_line(self):
+        history = download_history.DownloadHistory(self.history_path)
+        history.record("Lilu", 2, "https://example.com/Lilu-2.zip", "c")
+        with open(history.journal_path, "a") as file:
+            file.write('{"product_name": "AppleALC", "id"')
+
+        history = download_history.DownloadHistory(self.history_path)
+        self.assertEqual(history.get("Lilu")["id"], 2)
+        self.assertIsNone(history.get("AppleALC"))
+
+        # 之后追加的记录不能与写了一半的行拼在一起
+        history.record("WhateverGreen", 1, "https://example.com/WhateverGreen-1.zip", "d")
+        history = download_history.DownloadHistory(self.history_path)
+        self.assertEqual(history.get("WhateverGreen")["sha256"], "d")
+
+    def test_compact(self):
+        history = download_history.DownloadHistory(self.history_path)
+        history.record("AppleALC", 1, "https://example.com/AppleALC-1.zip", "e")
+        history.remove("Lilu")
+        history.compact()
+
+        self.assertFalse(os.path.exists(history.journal_path))
+        with open(self.history_path, "r") as file:
+            self.assertEqual([entry["product_name"] for entry in json.load(file)], ["AppleALC", "VirtualSMC"])
+        self.assertEqual(download_history.DownloadHistory(self.history_path).entries, history.entries)
+
+if __name__ == "__main__":
+    unittest.main()
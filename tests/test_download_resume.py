@@ -0,0 +1,88 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+from local_server import LocalServer, QuietHandler, isolated_fetcher
+
+BLOB = bytes(range(256)) * 4096  # 1MB
+
+class RangeHandler(QuietHandler):
+    """支持 Range/If-Range 的文件服务器
+
+    state["truncate"] 为True时第一次响应只发送一半内容就断开连接，
+    state["etag"] 为当前文件的 ETag，state["ranges"] 记录收到的 (Range, If-Range)。
+    """
+
+    def do_GET(self):
+        state = self.server.state
+        body = state["body"]
+        range_header = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        state["ranges"].append((range_header, if_range))
+        headers = {"ETag": state["etag"], "Accept-Ranges": "bytes"}
+
+        if state.pop("truncate", False):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+
+        if range_header and (not if_range or if_range == state["etag"]):
+            start = int(range_header.split("=", 1)[1].split("-", 1)[0])
+            headers["Content-Range"] = "bytes {}-{}/{}".format(start, len(body) - 1, len(body))
+            self.send_body(body[start:], status=206, headers=headers)
+            return
+
+        self.send_body(body, headers=headers)
+
+class DownloadResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.server = LocalServer(RangeHandler, body=BLOB, etag='"v1"', truncate=True, ranges=[]).start()
+        self.fetcher = isolated_fetcher(os.path.join(self.work_dir, "http"))
+        self.destination_path = os.path.join(self.work_dir, "OpenCorePkg.zip")
+
+    def tearDown(self):
+        self.fetcher.pool.close()
+        self.server.stop()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def download_truncated(self):
+        self.assertIsNone(self.fetcher.download_file(self.server.url("/OpenCorePkg.zip"), self.destination_path))
+        self.assertEqual(os.path.getsize(self.destination_path + ".part"), len(BLOB) // 2)
+
+    def read_destination(self):
+        with open(self.destination_path, "rb") as file:
+            return file.read()
+
+    def test_resume_after_truncated_body(self):
+        self.download_truncated()
+
+        sha256 = self.fetcher.download_file(self.server.url("/OpenCorePkg.zip"), self.destination_path, hashlib.sha256(BLOB).hexdigest())
+
+        self.assertEqual(sha256, hashlib.sha256(BLOB).hexdigest())
+        self.assertEqual(self.read_destination(), BLOB)
+        self.assertEqual(self.server.state["ranges"][-1], ("bytes={}-".format(len(BLOB) // 2), '"v1"'))
+        self.assertFalse(os.path.exists(self.destination_path + ".part"))
+        self.assertFalse(os.path.exists(self.destination_path + ".part.json"))
+
+    def test_changed_file_restarts(self):
+        self.download_truncated()
+
+        # 服务器上的文件已更新，If-Range 不匹配时服务器返回完整的新文件
+        new_blob = BLOB[::-1]
+        self.server.state.update(body=new_blob, etag='"v2"')
+        sha256 = self.fetcher.download_file(self.server.url("/OpenCorePkg.zip"), self.destination_path)
+
+        self.assertEqual(sha256, hashlib.sha256(new_blob).hexdigest())
+        self.assertEqual(self.read_destination(), new_blob)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import shutil
+import unittest
+
+from Scripts import gathering_files
+from Scripts import utils
+
+class UnavailableSource:
+    def fetch_and_parse_content(self, resource_url, content_type=None, max_age=None):
+        return None
+
+class KernelPatchesTest(unittest.TestCase):
+    def setUp(self):
+        self.gathering = gathering_files.gatheringFiles(UnavailableSource())
+
+    def tearDown(self):
+        utils.set_headless(None)
+        shutil.rmtree(self.gathering.temporary_dir, ignore_errors=True)
+
+    def test_headless_build_aborts_without_patches(self):
+        utils.set_headless({})
+        with self.assertRaises(utils.HeadlessAbort):
+            self.gathering.get_kernel_patches("AMD Vanilla Patches", self.gathering.amd_vanilla_patches_url)
+
+if __name__ == "__main__":
+    unittest.main()
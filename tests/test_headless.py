@@ -0,0 +1,91 @@
+import builtins
+import contextlib
+import importlib.util
+import io
+import os
+import unittest
+
+from Scripts import download_scheduler
+from Scripts import utils
+
+def load_main_module():
+    """OpCore-Simplify.py 的文件名不能直接 import"""
+    spec = importlib.util.spec_from_file_location("opcore_simplify", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "OpCore-Simplify.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class HeadlessAnswersTest(unittest.TestCase):
+    def setUp(self):
+        self.utils = utils.Utils()
+        self.output = io.StringIO()
+        self.redirect = contextlib.redirect_stdout(self.output)
+        self.redirect.__enter__()
+
+        # 无人值守模式下不能读取标准输入
+        self.original_input = builtins.input
+        builtins.input = lambda prompt="": self.fail("无人值守模式读取了标准输入")
+
+    def tearDown(self):
+        builtins.input = self.original_input
+        self.redirect.__exit__(None, None, None)
+        utils.set_headless(None)
+
+    def test_answers_and_defaults(self):
+        utils.set_headless({"oclp": True, "macos_version": 22, "uefi": False})
+
+        self.assertEqual(self.utils.request_input("OCLP: ", answer_key="oclp", default="no"), "yes")
+        self.assertEqual(self.utils.request_input("UEFI: ", answer_key="uefi", default="yes"), "no")
+        self.assertEqual(self.utils.request_input("macOS: ", answer_key="macos_version"), "22")
+        self.assertEqual(self.utils.request_input("WiFi: ", answer_key="scan_wifi_profiles", default="no"), "no")
+        self.assertEqual(self.utils.request_input(), "")
+        self.assertIn("OCLP: yes", self.output.getvalue())
+
+    def test_same_answer_can_be_requested_again(self):
+        utils.set_headless({"gpu": "1"})
+        for _ in range(3):
+            self.assertEqual(self.utils.request_input("GPU: ", answer_key="gpu", default="1"), "1")
+
+    def test_reject_answer(self):
+        self.utils.reject_answer("oclp", "maybe")
+
+        utils.set_headless({})
+        with self.assertRaises(utils.HeadlessAbort):
+            self.utils.reject_answer("oclp", "maybe")
+
+    def test_invalid_answer_aborts_prompt_loop(self):
+        ocpe = load_main_module().OCPE()
+
+        utils.set_headless({"oclp": "maybe"})
+        with self.assertRaises(utils.HeadlessAbort):
+            ocpe.show_oclp_warning()
+
+        utils.set_headless({"oclp": True})
+        self.assertTrue(ocpe.show_oclp_warning())
+        utils.set_headless({})
+        self.assertFalse(ocpe.show_oclp_warning())
+
+        # 输出写入日志，不能清屏
+        self.assertNotIn("\033[H", self.output.getvalue())
+
+    def test_scheduler_prints_plain_lines(self):
+        utils.set_headless({})
+        scheduler = download_scheduler.DownloadScheduler(fetcher=object())
+        task = download_scheduler.DownloadTask("Lilu", "https://example.com/Lilu.zip", os.devnull)
+        scheduler.tasks.append(task)
+
+        scheduler.render()
+        scheduler.render()
+        task.status = "已完成"
+        task.update_progress(1024 * 1024, 1024 * 1024)
+        scheduler.render()
+        scheduler.shutdown()
+
+        lines = self.output.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("Lilu"))
+        self.assertIn("已完成", lines[1])
+        self.assertNotIn("\033", self.output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import email.utils
+import shutil
+import tempfile
+import unittest
+
+from local_server import LocalServer, QuietHandler
+from Scripts import connection_pool
+from Scripts import http_cache
+from Scripts import resource_fetcher
+from Scripts import retry
+
+class RevalidatingHandler(QuietHandler):
+    """/etag 按 ETag、/last-modified 按 Last-Modified 响应条件请求"""
+
+    def do_GET(self):
+        state = self.server.state
+        state["requests"].append((self.path, dict(self.headers)))
+
+        if self.path == "/etag":
+            etag = '"{}"'.format(state["version"])
+            if self.headers.get("If-None-Match") == etag:
+                return self.send_body(b"", 304, {"ETag": etag})
+            return self.send_body(state["body"], headers={"ETag": etag})
+
+        last_modified = email.utils.formatdate(state["modified"], usegmt=True)
+        if self.headers.get("If-Modified-Since") == last_modified:
+            return self.send_body(b"", 304)
+        return self.send_body(state["body"], headers={"Last-Modified": last_modified})
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.server = LocalServer(RevalidatingHandler, requests=[], version=1, modified=1700000000, body=b"one").start()
+        self.pool = connection_pool.ConnectionPool()
+        self.fetcher = resource_fetcher.ResourceFetcher(
+            quiet=True,
+            pool=self.pool,
+            cache=http_cache.HttpCache(self.cache_dir),
+            retry_policy=retry.RetryPolicy(max_attempts=1, budget=retry.RetryBudget())
+        )
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.stop()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def conditional_headers(self):
+        headers = self.server.state["requests"][-1][1]
+        return headers.get("If-None-Match"), headers.get("If-Modified-Since")
+
+    def test_etag_revalidation(self):
+        url = self.server.url("/etag")
+        self.assertEqual(self.fetcher.fetch_content(url, max_age=0), b"one")
+        self.assertEqual(self.conditional_headers(), (None, None))
+
+        # 未修改：服务器返回 304，使用缓存内容
+        self.server.state["body"] = b"changed without new etag"
+        self.assertEqual(self.fetcher.fetch_content(url, max_age=0), b"one")
+        self.assertEqual(self.conditional_headers()[0], '"1"')
+
+        # 已修改：200 替换缓存条目
+        self.server.state.update(version=2, body=b"two")
+        self.assertEqual(self.fetcher.fetch_content(url, max_age=0), b"two")
+        self.assertEqual(self.fetcher.cache.lookup(url).metadata.get("etag"), '"2"')
+        self.assertEqual(self.fetcher.cache.lookup(url).read_body(), b"two")
+
+    def test_last_modified_revalidation(self):
+        url = self.server.url("/last-modified")
+        self.assertEqual(self.fetcher.fetch_content(url, max_age=0), b"one")
+
+        self.server.state["body"] = b"changed without new date"
+        self.assertEqual(self.fetcher.fetch_content(url, max_age=0), b"one")
+        self.assertIsNotNone(self.conditional_headers()[1])
+
+        self.server.state.update(modified=1700000100, body=b"two")
+        self.assertEqual(self.fetcher.fetch_content(url, max_age=0), b"two")
+        self.assertEqual(self.fetcher.cache.lookup(url).read_body(), b"two")
+
+    def test_fresh_entry_skips_network(self):
+        url = self.server.url("/etag")
+        self.fetcher.fetch_content(url)
+        request_count = len(self.server.state["requests"])
+        self.assertEqual(self.fetcher.fetch_content(url), b"one")
+        self.assertEqual(len(self.server.state["requests"]), request_count)
+
+    def test_offline_fallback(self):
+        url = self.server.url("/etag")
+        self.assertEqual(self.fetcher.fetch_content(url, max_age=0), b"one")
+
+        # 服务器不可用时使用过期的缓存内容
+        self.pool.close()
+        self.server.stop()
+        self.assertEqual(self.fetcher.fetch_content(url, max_age=0), b"one")
+        self.assertIsNone(self.fetcher.fetch_content(self.server.url("/uncached"), max_age=0))
+
+if __name__ == "__main__":
+    unittest.main()
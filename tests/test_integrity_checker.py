@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from Scripts import integrity_checker
+
+FILES = {
+    "EFI/OC/OpenCore.efi": b"opencore",
+    "EFI/OC/Drivers/OpenRuntime.efi": b"runtime",
+    "EFI/OC/Drivers/HfsPlus.efi": b"hfsplus",
+    "EFI/OC/Kexts/Lilu.kext/Contents/Info.plist": b"lilu plist",
+    "EFI/OC/Kexts/Lilu.kext/Contents/MacOS/Lilu": b"lilu binary"
+}
+
+class MerkleManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.folder = os.path.join(self.work_dir, "OpenCorePkg")
+        for relative_path, content in FILES.items():
+            self.write(relative_path, content)
+
+        self.checker = integrity_checker.IntegrityChecker(max_workers=1)
+        self.manifest_path = os.path.join(self.folder, "manifest.json")
+        self.checker.generate_folder_manifest(self.folder, self.manifest_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def write(self, relative_path, content):
+        file_path = os.path.join(self.folder, *relative_path.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as file:
+            file.write(content)
+
+    def modify_lilu(self):
+        # 确保修改时间与清单不同
+        time.sleep(0.01)
+        self.write("EFI/OC/Kexts/Lilu.kext/Contents/MacOS/Lilu", b"patched lilu")
+
+    def test_diff_skips_unchanged_sibling_directory(self):
+        old_manifest = self.checker.load_manifest(self.manifest_path)
+        self.modify_lilu()
+        self.checker.generate_folder_manifest(self.folder, self.manifest_path)
+        new_manifest = self.checker.load_manifest(self.manifest_path)
+
+        self.assertEqual(old_manifest["directories"]["EFI/OC/Drivers"], new_manifest["directories"]["EFI/OC/Drivers"])
+        self.assertNotEqual(old_manifest["directories"]["EFI/OC"], new_manifest["directories"]["EFI/OC"])
+
+        # 目录哈希值相同时不进入该目录：即使其中的文件记录被改动也不会被比较
+        new_manifest["files"]["EFI/OC/Drivers/HfsPlus.efi"] = {"sha256": "0" * 64}
+        self.assertEqual(self.checker.diff_manifests(old_manifest, new_manifest), {
+            "added": [],
+            "removed": [],
+            "modified": ["EFI/OC/Kexts/Lilu.kext/Contents/MacOS/Lilu"]
+        })
+        self.assertEqual(self.checker.diff_manifests(old_manifest, new_manifest, "EFI/OC/Drivers")["modified"], [])
+
+    def test_verify_modified_file(self):
+        self.modify_lilu()
+        is_valid, issues = self.checker.verify_folder_integrity(self.folder, self.manifest_path)
+
+        self.assertFalse(is_valid)
+        self.assertEqual(issues, {"modified": ["EFI/OC/Kexts/Lilu.kext/Contents/MacOS/Lilu"], "missing": [], "untracked": []})
+        self.assertTrue(self.checker.verify_folder_integrity(self.folder, self.manifest_path, subtree="EFI/OC/Drivers")[0])
+
+    def test_verify_file_subtree(self):
+        subtree = "EFI/OC/Kexts/Lilu.kext/Contents/MacOS/Lilu"
+        self.assertEqual(self.checker.verify_folder_integrity(self.folder, self.manifest_path, subtree=subtree), (True, {"modified": [], "missing": [], "untracked": []}))
+
+        self.modify_lilu()
+        self.assertEqual(self.checker.verify_folder_integrity(self.folder, self.manifest_path, subtree=subtree)[1]["modified"], [subtree])
+
+        os.remove(os.path.join(self.folder, *subtree.split("/")))
+        self.assertEqual(self.checker.verify_folder_integrity(self.folder, self.manifest_path, subtree=subtree)[1]["missing"], [subtree])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from local_server import LocalServer, QuietHandler, isolated_fetcher
+from Scripts import artifact_sources
+from Scripts import prefetch
+
+class SlowDownloadHandler(QuietHandler):
+    """缓慢发送一个较大的文件，客户端断开时设置 state["client_closed"]"""
+
+    def do_GET(self):
+        chunk = b"x" * 64 * 1024
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(chunk) * 200))
+        self.end_headers()
+        try:
+            for _ in range(200):
+                self.wfile.write(chunk)
+                self.wfile.flush()
+                time.sleep(0.02)
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.state["client_closed"].set()
+
+class PrefetcherTest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.work_dir, "prefetch")
+        self.server = LocalServer(SlowDownloadHandler, client_closed=threading.Event()).start()
+        self.fetcher = isolated_fetcher(os.path.join(self.work_dir, "http"))
+        self.prefetcher = prefetch.Prefetcher(artifact_sources.GithubSource(self.fetcher), self.cache_dir, max_rate=None)
+
+    def tearDown(self):
+        self.prefetcher.discard()
+        self.fetcher.pool.close()
+        self.server.stop()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_cancel_waits_for_plan(self):
+        planning = threading.Event()
+
+        def plan():
+            planning.set()
+            time.sleep(0.5)
+            return [{"product_name": "Lilu", "url": self.server.url("/Lilu.zip"), "sha256": None}]
+
+        self.prefetcher.start("plan", plan)
+        self.assertTrue(planning.wait(5))
+        self.prefetcher.cancel()
+
+        # 取消后线程已经退出，不会再创建预取目录或开始下载
+        self.assertFalse(self.prefetcher.is_running())
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_restart_does_not_wait_for_plan(self):
+        planning = threading.Event()
+        release_plan = threading.Event()
+
+        def slow_plan():
+            planning.set()
+            release_plan.wait(5)
+            return [{"product_name": "Lilu", "url": self.server.url("/Lilu.zip"), "sha256": None}]
+
+        self.prefetcher.start("old", slow_plan)
+        self.assertTrue(planning.wait(5))
+
+        # 旧线程还在获取下载计划，重新开始不应等待它
+        start_time = time.monotonic()
+        self.prefetcher.start("new", lambda: [])
+        self.assertLess(time.monotonic() - start_time, 1)
+        self.assertEqual(self.prefetcher.plan_key, "new")
+
+        release_plan.set()
+        self.prefetcher.cancel()
+        # 旧线程的计划已被取消，不会开始下载
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_download_moves_prefetched_file(self):
+        self.server.stop()
+        cache_path = self.prefetcher._cache_path("https://example.com/Lilu.zip")
+        os.makedirs(self.cache_dir)
+        with open(cache_path, "wb") as f:
+            f.write(b"kext")
+        self.prefetcher._ready["https://example.com/Lilu.zip"] = (cache_path, "abc")
+
+        destination_path = os.path.join(self.work_dir, "Lilu.zip")
+        self.assertEqual(self.prefetcher.download_file("https://example.com/Lilu.zip", destination_path), "abc")
+        self.assertFalse(os.path.exists(cache_path))
+        with open(destination_path, "rb") as f:
+            self.assertEqual(f.read(), b"kext")
+
+    def test_cancel_closes_download(self):
+        self.prefetcher.start("plan", lambda: [{"product_name": "Lilu", "url": self.server.url("/Lilu.zip"), "sha256": None}])
+
+        deadline = time.monotonic() + 5
+        while not (os.path.isdir(self.cache_dir) and any(name.endswith(".part") for name in os.listdir(self.cache_dir))):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+        self.prefetcher.discard()
+        self.assertFalse(self.prefetcher.is_running())
+        self.assertFalse(os.path.exists(self.cache_dir))
+        self.assertTrue(self.server.state["client_closed"].wait(5))
+        self.assertFalse(any(self.fetcher.pool._idle.values()))
+
+if __name__ == "__main__":
+    unittest.main()
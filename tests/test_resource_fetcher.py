@@ -0,0 +1,68 @@
+import gzip
+import shutil
+import tempfile
+import unittest
+
+from local_server import LocalServer, QuietHandler, isolated_fetcher
+from Scripts import resource_fetcher
+
+PAGE = "\n".join("line {}".format(index) for index in range(2000)).encode("utf-8")
+
+class CompressedHandler(QuietHandler):
+    """/gzip 返回正确的 gzip 内容，/corrupt 的 gzip 数据在中途损坏"""
+
+    def do_GET(self):
+        body = gzip.compress(PAGE)
+        if self.path == "/corrupt":
+            body = body[:len(body) // 2] + b"\x00" * 64 + body[len(body) // 2:]
+        self.send_body(body, headers={"Content-Encoding": "gzip"})
+
+class ScanLinesTest(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.server = LocalServer(CompressedHandler).start()
+        self.fetcher = isolated_fetcher(self.cache_dir)
+        self.fetcher.buffer_size = 256
+
+    def tearDown(self):
+        self.fetcher.pool.close()
+        self.server.stop()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_complete_scan(self):
+        lines = []
+        self.assertTrue(self.fetcher.scan_lines(self.server.url("/gzip"), lambda line: lines.append(line) and False, max_age=0))
+        self.assertEqual("\n".join(lines).encode("utf-8"), PAGE)
+        self.assertIsNotNone(self.fetcher.cache.lookup(self.server.url("/gzip")))
+
+    def test_early_stop_drains_small_page(self):
+        # 页面剩余部分较小时读完：写入缓存，连接放回连接池
+        self.assertTrue(self.fetcher.scan_lines(self.server.url("/gzip"), lambda line: line == "line 10", max_age=0))
+        self.assertIsNotNone(self.fetcher.cache.lookup(self.server.url("/gzip")))
+        self.assertTrue(any(self.fetcher.pool._idle.values()))
+
+        lines = []
+        self.assertTrue(self.fetcher.scan_lines(self.server.url("/gzip"), lambda line: lines.append(line) and False))
+        self.assertEqual("\n".join(lines).encode("utf-8"), PAGE)
+
+    def test_early_stop_closes_large_page(self):
+        drain_limit = resource_fetcher.SCAN_DRAIN_LIMIT
+        resource_fetcher.SCAN_DRAIN_LIMIT = 16
+        try:
+            self.assertTrue(self.fetcher.scan_lines(self.server.url("/gzip"), lambda line: line == "line 10", max_age=0))
+        finally:
+            resource_fetcher.SCAN_DRAIN_LIMIT = drain_limit
+
+        self.assertIsNone(self.fetcher.cache.lookup(self.server.url("/gzip")))
+        self.assertFalse(any(self.fetcher.pool._idle.values()))
+
+    def test_decode_failure(self):
+        lines = []
+        self.assertFalse(self.fetcher.scan_lines(self.server.url("/corrupt"), lambda line: lines.append(line) and False, max_age=0))
+        self.assertLess(len(lines), 2000)
+        self.assertIsNone(self.fetcher.cache.lookup(self.server.url("/corrupt")))
+        # 连接已关闭，不会被放回连接池
+        self.assertFalse(any(self.fetcher.pool._idle.values()))
+
+if __name__ == "__main__":
+    unittest.main()
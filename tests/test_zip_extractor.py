@@ -0,0 +1,76 @@
+import io
+import os
+import plistlib
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from Scripts import gathering_files
+from Scripts import zip_extractor
+
+INFO_PLIST = plistlib.dumps({"CFBundleIdentifier": "com.zxystd.itlwm"})
+
+def build_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+class NestedZipTest(unittest.TestCase):
+    """发布 zip 中再套一层按系统版本区分的 zip（如 itlwm）"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.zip_path = os.path.join(self.work_dir, "itlwm.zip")
+        with open(self.zip_path, "wb") as file:
+            file.write(build_zip({
+                "README.md": b"readme",
+                "../escape.txt": b"outside",
+                "Release/itlwm_v2.3.0_stable.zip": build_zip({
+                    "itlwm.kext/Contents/Info.plist": INFO_PLIST,
+                    "itlwm.kext/Contents/MacOS/itlwm": b"itlwm binary"
+                }),
+                "Debug/itlwm_v2.3.0_debug.zip": build_zip({
+                    "itlwm.kext/Contents/Info.plist": INFO_PLIST,
+                    "itlwm.kext/Contents/MacOS/itlwm": b"debug binary"
+                })
+            }))
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_nested_members_use_virtual_paths(self):
+        with zip_extractor.ZipExtractor(skip_archive=lambda path: "debug" in path.lower()) as extractor:
+            members = extractor.list_members(self.zip_path)
+
+            self.assertEqual(sorted(members), [
+                "README.md",
+                "Release/itlwm_v2.3.0_stable/itlwm.kext/Contents/Info.plist",
+                "Release/itlwm_v2.3.0_stable/itlwm.kext/Contents/MacOS/itlwm"
+            ])
+
+            destination_path = os.path.join(self.work_dir, "out", "itlwm")
+            members["Release/itlwm_v2.3.0_stable/itlwm.kext/Contents/MacOS/itlwm"].extract_to(destination_path)
+
+        with open(destination_path, "rb") as file:
+            self.assertEqual(file.read(), b"itlwm binary")
+
+    def test_extract_kexts_from_nested_zip(self):
+        gathering = gathering_files.gatheringFiles(object())
+        gathering.ock_files_dir = os.path.join(self.work_dir, "OCK_Files")
+        try:
+            gathering.extract_bootloader_kexts_to_product_directory("itlwm", self.zip_path)
+        finally:
+            shutil.rmtree(gathering.temporary_dir, ignore_errors=True)
+
+        product_dir = os.path.join(gathering.ock_files_dir, "itlwm")
+        extracted_files = sorted(os.path.relpath(os.path.join(root, name), product_dir).replace("\\", "/") for root, _, files in os.walk(product_dir) for name in files)
+        self.assertEqual(extracted_files, ["itlwm.kext/Contents/Info.plist", "itlwm.kext/Contents/MacOS/itlwm"])
+        with open(os.path.join(product_dir, "itlwm.kext", "Contents", "MacOS", "itlwm"), "rb") as file:
+            self.assertEqual(file.read(), b"itlwm binary")
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, "escape.txt")))
+
+if __name__ == "__main__":
+    unittest.main()
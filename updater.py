@@ -2,45 +2,94 @@ from Scripts import resource_fetcher
 from Scripts import github
 from Scripts import run
 from Scripts import utils
+import json
 import os
 import tempfile
+import threading
 import shutil
+import time
+
+CHECK_INTERVAL = 60 * 60  # 两次后台版本检查之间的最小间隔（秒）
 
 class Updater:
     def __init__(self):
-        self.github = github.Github()
+        self.github = github.Github(resource_fetcher.ResourceFetcher(quiet=True))
         self.fetcher = resource_fetcher.ResourceFetcher()
         self.run = run.Run().run
         self.utils = utils.Utils()
         self.sha_version = os.path.join(os.path.dirname(os.path.realpath(__file__)), "sha_version.txt")
+        self.update_check_file = os.path.join(os.path.dirname(os.path.realpath(__file__)), "update_check.json")
         self.download_repo_url = "https://github.com/eanchao/OpCore-Simplify-CN/archive/refs/heads/main.zip"
         self.temporary_dir = tempfile.mkdtemp()
         self.current_step = 0
 
-    def get_current_sha_version(self):
-        print("正在检查当前版本...")
+    def get_current_sha_version(self, verbose=True):
+        if verbose:
+            print("正在检查当前版本...")
         try:
             current_sha_version = self.utils.read_file(self.sha_version)
 
             if not current_sha_version:
-                print("SHA 版本信息缺失。")
+                if verbose:
+                    print("SHA 版本信息缺失。")
                 return "missing_sha_version"
 
             return current_sha_version.decode()
         except Exception as e:
-            print("读取当前 SHA 版本时出错: {}".format(str(e)))
+            if verbose:
+                print("读取当前 SHA 版本时出错: {}".format(str(e)))
             return "error_reading_sha_version"
 
-    def get_latest_sha_version(self):
-        print("正在从 GitHub 获取最新版本...")
+    def get_latest_sha_version(self, verbose=True):
+        if verbose:
+            print("正在从 GitHub 获取最新版本...")
         try:
             commits = self.github.get_commits("lzhoang2801", "OpCore-Simplify")
             return commits["commitGroups"][0]["commits"][0]["oid"]
         except Exception as e:
-            print("获取最新 SHA 版本时出错: {}".format(str(e)))
+            if verbose:
+                print("获取最新 SHA 版本时出错: {}".format(str(e)))
         
         return None
 
+    def read_update_check(self):
+        try:
+            update_check = self.utils.read_file(self.update_check_file)
+        except Exception:
+            update_check = None
+
+        return update_check if isinstance(update_check, dict) else {}
+
+    def check_for_update(self):
+        latest_sha_version = self.get_latest_sha_version(verbose=False)
+
+        update_check = {
+            "checked_at": time.time(),
+            "current_sha": self.get_current_sha_version(verbose=False),
+            "latest_sha": latest_sha_version
+        }
+
+        try:
+            temporary_path = self.update_check_file + ".tmp"
+            with open(temporary_path, "w") as file:
+                json.dump(update_check, file, indent=4)
+            os.replace(temporary_path, self.update_check_file)
+        except Exception:
+            pass
+
+        return update_check
+
+    def start_background_check(self, force=False):
+        """在后台线程中检查最新版本，结果保存到 update_check.json，下次启动时再应用更新"""
+        update_check = self.read_update_check()
+        if not force and update_check.get("latest_sha") and time.time() - update_check.get("checked_at", 0) < CHECK_INTERVAL:
+            return None
+
+        thread = threading.Thread(target=self.check_for_update, name="update-check")
+        thread.daemon = True
+        thread.start()
+        return thread
+
     def download_update(self):
         self.current_step += 1
         print("")
@@ -131,71 +180,61 @@ class Updater:
             return False
 
     def run_update(self):
+        update_check = self.read_update_check()
+        current_sha_version = self.get_current_sha_version(verbose=False)
+        latest_sha_version = update_check.get("latest_sha")
+
+        # 仅使用上次后台检查的结果，启动时不访问网络
+        if not latest_sha_version or latest_sha_version == current_sha_version:
+            return False
+
         self.utils.head("检查更新")
         print("")
-        
-        current_sha_version = self.get_current_sha_version()
-        latest_sha_version = self.get_latest_sha_version()
-        
+        print("上次检查时间: {}".format(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(update_check.get("checked_at", 0)))))
+        print("当前脚本 SHA 版本: {}".format(current_sha_version))
+        print("最新脚本 SHA 版本: {}".format(latest_sha_version))
+        print("")
+        print("有可用更新！")
         print("")
 
-        if latest_sha_version is None:
-            print("无法从 GitHub 验证最新版本。")
-            print("当前脚本 SHA 版本: {}".format(current_sha_version))
-            print("请检查您的网络连接并重试。")
-            print("")
-            
-            while True:
-                user_input = self.utils.request_input("是否跳过更新过程？(yes/no): ").strip().lower()
-                if user_input == "yes":
-                    print("")
-                    print("更新过程已跳过。")
-                    return False
-                elif user_input == "no":
-                    print("")
-                    print("使用默认版本检查继续更新...")
-                    latest_sha_version = "update_forced_by_user"
-                    break
-                else:
-                    print("\033[91m无效选择，请重试。\033[0m\n\n")
-        else:
-            print("当前脚本 SHA 版本: {}".format(current_sha_version))
-            print("最新脚本 SHA 版本: {}".format(latest_sha_version))
-        
+        while True:
+            user_input = self.utils.request_input("是否立即更新？(yes/no): ").strip().lower()
+            if user_input == "yes":
+                break
+            elif user_input == "no":
+                print("")
+                print("更新过程已跳过。")
+                return False
+            else:
+                print("\033[91m无效选择，请重试。\033[0m\n\n")
+
+        print("正在从版本 {} 更新到 {}".format(current_sha_version, latest_sha_version))
         print("")
+        print("开始更新过程...")
         
-        if latest_sha_version != current_sha_version:
-            print("有可用更新！")
-            print("正在从版本 {} 更新到 {}".format(current_sha_version, latest_sha_version))
+        if not self.download_update():
             print("")
-            print("开始更新过程...")
-            
-            if not self.download_update():
-                print("")
-                print("  更新失败: 无法下载或解压更新包")
+            print("  更新失败: 无法下载或解压更新包")
 
-                if os.path.exists(self.temporary_dir):
-                    self.current_step += 1
-                    print("步骤 {}: 清理临时文件...".format(self.current_step))
-                    shutil.rmtree(self.temporary_dir)
-                    print("  清理完成")
+            if os.path.exists(self.temporary_dir):
+                self.current_step += 1
+                print("步骤 {}: 清理临时文件...".format(self.current_step))
+                shutil.rmtree(self.temporary_dir)
+                print("  清理完成")
 
-                return False
-                
-            if not self.update_files():
-                print("")
-                print("  更新失败: 无法更新文件")
-                return False
-                
-            if not self.save_latest_sha_version(latest_sha_version):
-                print("")
-                print("  更新已完成，但版本信息无法保存")
+            return False
             
+        if not self.update_files():
             print("")
-            print("更新成功完成！")
+            print("  更新失败: 无法更新文件")
+            return False
+            
+        if not self.save_latest_sha_version(latest_sha_version):
             print("")
-            print("程序需要重启以完成更新过程。")
-            return True
-        else:
-            print("您已经在使用最新版本")
-            return False
\ No newline at end of file
+            print("  更新已完成，但版本信息无法保存")
+        
+        print("")
+        print("更新成功完成！")
+        print("")
+        print("程序需要重启以完成更新过程。")
+        return True
\ No newline at end of file